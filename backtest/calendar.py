@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest.core import BacktestError
+
+_SCHEDULE_FREQUENCIES = {
+    "weekly": "W",
+    "biweekly": "2W",
+    "monthly": "ME",
+}
+SCHEDULE_FREQUENCIES = list(_SCHEDULE_FREQUENCIES)
+
+# Calendars kept for reuse; Monte Carlo blocks and repeated backtests share a handful
+TRADING_CALENDAR_CACHE_SIZE = 64
+
+
+class TradingCalendar:
+    """
+    Sorted int64 trading days with cached buy schedules.
+
+    A schedule's calendar dates are mapped to the last trading day on or before each of
+    them with one searchsorted call (O(m log n) for m scheduled dates), and the
+    resulting columns are memoized per (frequency, schedule range).
+    """
+
+    def __init__(self, days: np.ndarray):
+        self.days = np.ascontiguousarray(days, dtype=np.int64)
+        self.days.flags.writeable = False
+        self._columns: Dict[Tuple[str, int, int], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def buy_columns(self, frequency: str, schedule: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        Column indices of the scheduled buy days (read-only, shared between callers).
+
+        schedule is the (first, last) calendar day of the schedule; it defaults to the
+        first and last trading day. Scheduled dates before the first trading day are
+        dropped, and several dates mapping to the same trading day count once.
+
+        Raises:
+            BacktestError: For an unknown frequency
+        """
+        freq = _SCHEDULE_FREQUENCIES.get(frequency)
+        if freq is None:
+            raise BacktestError("Invalid frequency.")
+        first, last = schedule if schedule is not None else (self.days[0], self.days[-1])
+        key = (frequency, int(first), int(last))
+        columns = self._columns.get(key)
+        if columns is None:
+            scheduled = pd.date_range(
+                pd.Timestamp(np.datetime64(int(first), "D")), pd.Timestamp(np.datetime64(int(last), "D")), freq=freq
+            )
+            scheduled_days = scheduled.values.astype("datetime64[D]").astype(np.int64)
+            positions = np.searchsorted(self.days, scheduled_days, side="right") - 1
+            columns = np.unique(positions[positions >= 0])
+            columns.flags.writeable = False
+            self._columns[key] = columns
+        return columns
+
+    def buy_mask(self, frequency: str, schedule: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Boolean mask aligned with the days, True on scheduled buy days."""
+        mask = np.zeros(len(self.days), dtype=bool)
+        mask[self.buy_columns(frequency, schedule)] = True
+        return mask
+
+
+_calendars: "OrderedDict[bytes, TradingCalendar]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def trading_calendar(days: np.ndarray) -> TradingCalendar:
+    """Shared TradingCalendar for these trading days, so its schedules are computed once."""
+    key = np.ascontiguousarray(days, dtype=np.int64).tobytes()
+    with _lock:
+        calendar = _calendars.get(key)
+        if calendar is not None:
+            _calendars.move_to_end(key)
+            return calendar
+    calendar = TradingCalendar(days)
+    with _lock:
+        calendar = _calendars.setdefault(key, calendar)
+        _calendars.move_to_end(key)
+        while len(_calendars) > TRADING_CALENDAR_CACHE_SIZE:
+            _calendars.popitem(last=False)
+    return calendar
@@ -0,0 +1,219 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Protocol, Tuple
+
+import numpy as np
+import pandas as pd
+
+from market_data.prices import get_price_history, get_stored_closes
+
+# Array backtest core shared by the strategy endpoints and Monte Carlo. Prices are a
+# contiguous float64 (paths, days) matrix whose columns share one calendar of int64 day
+# numbers (days since 1970-01-01); a single historical backtest is a one-row matrix.
+# Strategy results keep the price dtype, so float32 paths give float32 equity curves.
+
+
+class BacktestError(ValueError):
+    """Invalid request or data for a backtest; the message is returned to the client."""
+
+
+class PriceSource(NamedTuple):
+    """
+    The full stored history a historical price series was cut from.
+
+    Indicators are computed once over it (keyed by key) and the series' range sliced out,
+    so requests for other date ranges of the ticker reuse them.
+    """
+
+    key: str  # Ticker and store fingerprint
+    days: np.ndarray
+    prices: np.ndarray
+
+
+class Strategy(Protocol):
+    """
+    A trading strategy, implemented once for every caller.
+
+    name: Strategy type as used in URLs and saved strategies
+    default_capital: Capital used when a request doesn't give one (None: required)
+    positive_capital: Reject capital <= 0
+    capital_first: Validate capital before the strategy parameters (the endpoint's check order)
+    date_order_message: Error when the start date isn't before the end date
+    """
+
+    name: str
+    default_capital: Optional[float]
+    positive_capital: bool
+    capital_first: bool
+    date_order_message: str
+
+    def parse_params(self, source: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate strategy parameters from a request body or saved metadata; raises BacktestError."""
+        ...
+
+    def min_days(self, params: Dict[str, Any]) -> int:
+        """Trading days a historical backtest needs."""
+        ...
+
+    def run(
+        self,
+        prices: np.ndarray,
+        days: np.ndarray,
+        capital: float,
+        params: Dict[str, Any],
+        schedule: Optional[Tuple[int, int]] = None,
+        detail: bool = False,
+        source: Optional[PriceSource] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Evaluate every row of prices at once.
+
+        Returns {"equity": (paths, days) matrix of the invested value}, plus "cash", the
+        capital not invested yet (same shape, possibly a broadcast view), for strategies
+        that don't invest all of it on the first day, and the per-day columns the endpoint reports (moving
+        averages, shares, contributions, ...) when detail is set.
+        schedule is the (first, last) day of the buy calendar; it defaults to the price dates.
+        source is the stored history a single historical row was cut from, if known.
+        """
+        ...
+
+    def report(
+        self,
+        days: np.ndarray,
+        prices: np.ndarray,
+        result: Dict[str, np.ndarray],
+        capital: float,
+        params: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Response data of a single historical backtest from the first row of a detailed run."""
+        ...
+
+
+def day_numbers(index) -> np.ndarray:
+    """int64 day numbers of a DatetimeIndex (or anything pandas can convert to one)."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return np.ascontiguousarray(index.values.astype("datetime64[D]").astype(np.int64))
+
+
+def day_strings(days: np.ndarray) -> List[str]:
+    """YYYY-MM-DD strings of int64 day numbers."""
+    return np.datetime_as_string(np.asarray(days).astype("datetime64[D]")).tolist()
+
+
+def close_prices(hist: pd.DataFrame, ticker: str) -> pd.Series:
+    """
+    Closing prices of a price frame (plain or yfinance-style MultiIndex columns), without NaNs.
+
+    Raises:
+        BacktestError: If the frame has no usable close column or no prices
+    """
+    if hist is None or hist.empty:
+        raise BacktestError("No data returned for ticker/date range")
+
+    prices = None
+    if isinstance(hist.columns, pd.MultiIndex):
+        if ("Close", ticker) in hist.columns:
+            prices = hist[("Close", ticker)]
+        else:
+            close_candidates = [col for col in hist.columns if str(col[0]).lower() == "close"]
+            if close_candidates:
+                prices = hist[close_candidates[0]]
+    elif "Close" in hist.columns:
+        prices = hist["Close"]
+
+    if prices is None:
+        raise BacktestError("Unable to determine closing prices for ticker")
+    if isinstance(prices, pd.DataFrame):
+        if prices.shape[1] != 1:
+            raise BacktestError("Ambiguous closing price data returned")
+        prices = prices.iloc[:, 0]
+
+    prices = prices.dropna()
+    if prices.empty:
+        raise BacktestError("No closing prices available")
+    return prices
+
+
+def load_prices(ticker: str, start, end) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Daily closes of a ticker as contiguous arrays.
+
+    Returns:
+        (int64 day numbers, float64 prices)
+
+    Raises:
+        BacktestError: If there is no usable price data in the range
+    """
+    prices = close_prices(get_price_history(ticker, start, end), ticker)
+    return day_numbers(prices.index), np.ascontiguousarray(prices.to_numpy(dtype=np.float64))
+
+
+def load_price_series(ticker: str, start, end) -> Tuple[np.ndarray, np.ndarray, Optional[PriceSource]]:
+    """
+    load_prices, plus the ticker's stored history when the series is a contiguous part
+    of it (not when it includes today's still-moving bar, or the provider isn't stored).
+
+    Returns:
+        (int64 day numbers, float64 prices, PriceSource or None)
+
+    Raises:
+        BacktestError: If there is no usable price data in the range
+    """
+    days, prices = load_prices(ticker, start, end)
+    history = get_stored_closes(ticker.upper().strip())
+    if history is None:
+        return days, prices, None
+    history_days, history_prices, fingerprint = history
+    lo = int(np.searchsorted(history_days, days[0]))
+    hi = lo + len(days)
+    if (
+        hi > len(history_days)
+        or not np.array_equal(history_days[lo:hi], days)
+        or not np.array_equal(history_prices[lo:hi], prices)
+    ):
+        return days, prices, None
+    return days, prices, PriceSource(f"{ticker.upper().strip()}:{fingerprint}", history_days, history_prices)
+
+
+def series_rows(days: np.ndarray, columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Per-day response rows: the date followed by the given (already formatted) columns."""
+    names = ["date", *columns]
+    return [dict(zip(names, row)) for row in zip(day_strings(days), *columns.values())]
+
+
+def rounded(values: np.ndarray, digits: int) -> List[float]:
+    return [round(value, digits) for value in values.tolist()]
+
+
+def total_return_pct(final_value: float, invested: float) -> float:
+    return ((final_value - invested) / invested) * 100.0 if invested else 0.0
+
+
+def total_wealth(result: Dict[str, np.ndarray]) -> np.ndarray:
+    """Invested value plus uninvested cash of a strategy run, in the equity's dtype."""
+    if "cash" not in result:
+        return result["equity"]
+    return np.add(result["equity"], result["cash"], dtype=result["equity"].dtype)
+
+
+def run_backtest(
+    strategy: Strategy,
+    days: np.ndarray,
+    prices: np.ndarray,
+    capital: float,
+    params: Dict[str, Any],
+    schedule: Optional[Tuple[int, int]] = None,
+    source: Optional[PriceSource] = None,
+) -> Dict[str, Any]:
+    """
+    Historical backtest of one price series, returning the endpoint's response data.
+
+    Raises:
+        BacktestError: If the series is too short for the strategy, or the strategy
+            rejects the data (e.g. no buy dates in range)
+    """
+    needed = strategy.min_days(params)
+    if len(prices) < needed:
+        raise BacktestError(f"Insufficient data: need at least {needed} trading days, got {len(prices)}")
+    result = strategy.run(prices[None, :], days, capital, params, schedule=schedule, detail=True, source=source)
+    return strategy.report(days, prices, {name: column[0] for name, column in result.items()}, capital, params)
@@ -0,0 +1,123 @@
+import hashlib
+import os
+from typing import Any, Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from backtest import indicators
+from market_data.price_cache import PriceSeriesCache
+
+# Computed indicator arrays are a few bytes per bar, so this holds thousands of them
+INDICATOR_CACHE_MAX_BYTES = int(os.getenv("INDICATOR_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+
+# name: (batch function, number of input series, number of output arrays)
+_INDICATORS = {
+    "sma": (indicators.sma, 1, 1),
+    "ema": (indicators.ema, 1, 1),
+    "rsi": (indicators.rsi, 1, 1),
+    "macd": (indicators.macd, 1, 3),
+    "bollinger_bands": (indicators.bollinger_bands, 1, 3),
+    "atr": (indicators.atr, 3, 1),
+    "rolling_volatility": (indicators.rolling_volatility, 1, 1),
+}
+INDICATOR_NAMES = list(_INDICATORS)
+
+# Indicators whose value on a bar depends only on a fixed number of bars before it:
+# name -> leading bars that are NaN when the series starts at that range. Their values
+# over a full history, sliced, and with these bars blanked, are the values of the range.
+_WARMUP_BARS = {
+    "sma": lambda params: params["window"] - 1,
+    "bollinger_bands": lambda params: params.get("window", 20) - 1,
+    "rolling_volatility": lambda params: params.get("window", 20),
+}
+
+_cache = PriceSeriesCache(max_bytes=INDICATOR_CACHE_MAX_BYTES)
+
+
+def series_fingerprint(days: np.ndarray, *columns: np.ndarray) -> str:
+    """Content hash of a day index and the value columns aligned with it."""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(days, dtype=np.int64).tobytes())
+    for column in columns:
+        digest.update(np.ascontiguousarray(column, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def cached_indicator(
+    name: str,
+    days: np.ndarray,
+    inputs: Union[np.ndarray, Sequence[np.ndarray]],
+    params: Optional[Dict[str, Any]] = None,
+    fingerprint: Optional[str] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+):
+    """
+    Memoized batch indicator of one series, keyed by (series fingerprint, name, params).
+
+    The indicator is computed over the whole series and the result sliced to the
+    [start, end) day range, so callers can compute once over a long history and read any
+    window of it. Returned arrays are shared between callers and read-only.
+
+    Args:
+        name: One of INDICATOR_NAMES
+        days: int64 day numbers of the series
+        inputs: The price array, or (high, low, close) for atr
+        params: Keyword arguments of the indicator (e.g. {"window": 20})
+        fingerprint: Identity of the series if the caller already has one (e.g. a
+            calibration fingerprint); hashed from days and inputs otherwise
+        start / end: Optional day-number range to slice the result to
+
+    Returns:
+        An array, or a tuple of arrays for macd and bollinger_bands
+    """
+    function, num_inputs, num_outputs = _INDICATORS[name]
+    inputs = [inputs] if num_inputs == 1 else list(inputs)
+    params = params or {}
+    if fingerprint is None:
+        fingerprint = series_fingerprint(days, *inputs)
+    key = (fingerprint, name, tuple(sorted(params.items())))
+
+    def compute() -> np.ndarray:
+        # Multi-output indicators are stacked into one array so the cache can size them
+        result = np.stack(function(*inputs, **params)) if num_outputs > 1 else function(*inputs, **params)
+        result.flags.writeable = False
+        return result
+
+    result = _cache.get_or_load(key, compute)
+    if start is not None or end is not None:
+        lo = 0 if start is None else int(np.searchsorted(days, start, side="left"))
+        hi = len(days) if end is None else int(np.searchsorted(days, end, side="left"))
+        result = result[..., lo:hi]
+    return tuple(result) if num_outputs > 1 else result
+
+
+def indicator_rows(name: str, prices: np.ndarray, days: np.ndarray, source=None, **params) -> np.ndarray:
+    """
+    Single-input indicator of every row of a (paths, days) price matrix.
+
+    A single row is a historical series that what-if requests repeat, so it is memoized.
+    When its source (backtest.core.PriceSource) is known and the indicator has a fixed
+    warm-up, the indicator is computed once over the ticker's stored history and the
+    row's range sliced out, so requests for other dates of the same ticker hit the cache.
+    Simulated paths are never seen twice and are computed directly.
+    """
+    function, _, num_outputs = _INDICATORS[name]
+    if prices.shape[0] != 1:
+        return function(prices, **params)
+
+    warmup = _WARMUP_BARS.get(name)
+    if source is not None and warmup is not None:
+        result = cached_indicator(
+            name, source.days, source.prices, params, fingerprint=source.key, start=int(days[0]), end=int(days[-1]) + 1
+        )
+        rows = np.array(result if num_outputs > 1 else [result])
+        rows[:, :warmup(params)] = np.nan
+        return tuple(row[None, :] for row in rows) if num_outputs > 1 else rows
+    result = cached_indicator(name, days, prices[0], params)
+    return tuple(row[None, :] for row in result) if num_outputs > 1 else result[None, :]
+
+
+def indicator_cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction counters for the indicator cache."""
+    return _cache.stats()
@@ -0,0 +1,320 @@
+import math
+from collections import deque
+from typing import Tuple
+
+import numpy as np
+
+# Technical indicators in two forms that give identical numbers:
+#
+# - batch functions work on the last axis of an array (one series, or a (paths, days)
+#   matrix of them) and return float64 arrays with NaN during the warm-up period;
+# - streaming classes take one bar per update() call in O(1) time and return the
+#   value for that bar (NaN during warm-up).
+#
+# Both forms perform the same float64 operations in the same order: window sums come
+# from running totals (shifted by the first value to limit cancellation), and the
+# exponential filters are evaluated bar by bar. EMA and MACD follow pandas'
+# ewm(span=n, adjust=False); RSI and ATR use Wilder's smoothing seeded with a simple mean.
+
+
+def _as_float64(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum of the last window values (running totals), NaN before window values are seen."""
+    out = np.full(values.shape, np.nan)
+    if window > values.shape[-1]:
+        return out
+    csum = np.cumsum(values, axis=-1)
+    out[..., window - 1] = csum[..., window - 1]
+    out[..., window:] = csum[..., window:] - csum[..., :-window]
+    return out
+
+
+def _window_sums(values: np.ndarray, window: int, squares: bool = True):
+    """
+    (shift, window sum of values - shift, window sum of its squares or None) over the last axis.
+
+    The shift is each series' first value.
+    """
+    shift = values[..., :1]
+    deviations = values - shift
+    sums = _rolling_sum(deviations, window)
+    return shift, sums, _rolling_sum(deviations * deviations, window) if squares else None
+
+
+def _window_std(sums: np.ndarray, squares: np.ndarray, window: int, ddof: int) -> np.ndarray:
+    m2 = np.maximum(squares - sums * sums / window, 0.0)
+    return np.sqrt(m2 / (window - ddof))
+
+
+class _WindowSums:
+    """Streaming counterpart of _window_sums for one series."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.shift = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._history = deque(maxlen=window + 1)
+
+    def update(self, value: float) -> Tuple[float, float]:
+        if self.shift is None:
+            self.shift = value
+        deviation = value - self.shift
+        self.total += deviation
+        self.total_sq += deviation * deviation
+        self._history.append((self.total, self.total_sq))
+        if len(self._history) < self.window:
+            return math.nan, math.nan
+        if len(self._history) == self.window:
+            return self.total, self.total_sq
+        oldest, oldest_sq = self._history[0]
+        return self.total - oldest, self.total_sq - oldest_sq
+
+
+def _std(sums: float, squares: float, window: int, ddof: int) -> float:
+    if math.isnan(sums):
+        return math.nan
+    return math.sqrt(max(squares - sums * sums / window, 0.0) / (window - ddof))
+
+
+# Simple moving average
+
+def sma(values, window: int) -> np.ndarray:
+    """Trailing mean over the last window values."""
+    values = _as_float64(values)
+    shift, sums, _ = _window_sums(values, window, squares=False)
+    return shift + sums / window
+
+
+class SMA:
+    def __init__(self, window: int):
+        self.window = window
+        self._sums = _WindowSums(window)
+
+    def update(self, value: float) -> float:
+        sums, _ = self._sums.update(float(value))
+        return self._sums.shift + sums / self.window
+
+
+# Exponential moving average
+
+def _ema_alpha(span: int) -> float:
+    return 2.0 / (span + 1.0)
+
+
+def ema(values, span: int) -> np.ndarray:
+    """Exponential moving average with alpha = 2 / (span + 1), seeded with the first value."""
+    values = _as_float64(values)
+    alpha = _ema_alpha(span)
+    out = np.empty(values.shape)
+    if values.shape[-1] == 0:
+        return out
+    current = values[..., 0]
+    out[..., 0] = current
+    for i in range(1, values.shape[-1]):
+        current = current + alpha * (values[..., i] - current)
+        out[..., i] = current
+    return out
+
+
+class EMA:
+    def __init__(self, span: int):
+        self.alpha = _ema_alpha(span)
+        self.value = None
+
+    def update(self, value: float) -> float:
+        value = float(value)
+        if self.value is None:
+            self.value = value
+        else:
+            self.value = self.value + self.alpha * (value - self.value)
+        return self.value
+
+
+# Relative strength index (Wilder)
+
+def _rsi_value(gain, loss):
+    total = gain + loss
+    return np.where(total > 0, 100.0 * gain / np.where(total > 0, total, 1.0), 50.0)
+
+
+def rsi(values, window: int = 14) -> np.ndarray:
+    """RSI from Wilder-smoothed average gains and losses; the first value is at index window."""
+    values = _as_float64(values)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] <= window:
+        return out
+    gain_sum = np.zeros(values.shape[:-1])
+    loss_sum = np.zeros(values.shape[:-1])
+    for i in range(1, window + 1):
+        change = values[..., i] - values[..., i - 1]
+        gain_sum = gain_sum + np.maximum(change, 0.0)
+        loss_sum = loss_sum + np.maximum(-change, 0.0)
+    gain, loss = gain_sum / window, loss_sum / window
+    out[..., window] = _rsi_value(gain, loss)
+    for i in range(window + 1, values.shape[-1]):
+        change = values[..., i] - values[..., i - 1]
+        gain = (gain * (window - 1) + np.maximum(change, 0.0)) / window
+        loss = (loss * (window - 1) + np.maximum(-change, 0.0)) / window
+        out[..., i] = _rsi_value(gain, loss)
+    return out
+
+
+class RSI:
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.previous = None
+        self.count = 0
+        self.gain = 0.0
+        self.loss = 0.0
+
+    def update(self, value: float) -> float:
+        value = float(value)
+        previous, self.previous = self.previous, value
+        if previous is None:
+            return math.nan
+        change = value - previous
+        self.count += 1
+        if self.count <= self.window:
+            # Sums of the first window changes, averaged once complete
+            self.gain = self.gain + max(change, 0.0)
+            self.loss = self.loss + max(-change, 0.0)
+            if self.count < self.window:
+                return math.nan
+            self.gain, self.loss = self.gain / self.window, self.loss / self.window
+        else:
+            self.gain = (self.gain * (self.window - 1) + max(change, 0.0)) / self.window
+            self.loss = (self.loss * (self.window - 1) + max(-change, 0.0)) / self.window
+        total = self.gain + self.loss
+        return 100.0 * self.gain / total if total > 0 else 50.0
+
+
+# MACD
+
+def macd(values, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(MACD line, signal line, histogram): EMA(fast) - EMA(slow), its EMA(signal), and their difference."""
+    values = _as_float64(values)
+    line = ema(values, fast) - ema(values, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+class MACD:
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    def update(self, value: float) -> Tuple[float, float, float]:
+        line = self.fast.update(value) - self.slow.update(value)
+        signal_line = self.signal.update(line)
+        return line, signal_line, line - signal_line
+
+
+# Bollinger bands
+
+def bollinger_bands(values, window: int = 20, num_std: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(middle, upper, lower): the SMA and the SMA +/- num_std population standard deviations."""
+    values = _as_float64(values)
+    shift, sums, squares = _window_sums(values, window)
+    middle = shift + sums / window
+    width = num_std * _window_std(sums, squares, window, ddof=0)
+    return middle, middle + width, middle - width
+
+
+class BollingerBands:
+    def __init__(self, window: int = 20, num_std: float = 2.0):
+        self.window = window
+        self.num_std = num_std
+        self._sums = _WindowSums(window)
+
+    def update(self, value: float) -> Tuple[float, float, float]:
+        sums, squares = self._sums.update(float(value))
+        middle = self._sums.shift + sums / self.window
+        width = self.num_std * _std(sums, squares, self.window, ddof=0)
+        return middle, middle + width, middle - width
+
+
+# Average true range (Wilder)
+
+def atr(high, low, close, window: int = 14) -> np.ndarray:
+    """Wilder-smoothed true range; the first value (mean of window true ranges) is at index window - 1."""
+    high, low, close = _as_float64(high), _as_float64(low), _as_float64(close)
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] < window:
+        return out
+    true_range = high - low
+    true_range[..., 1:] = np.maximum(
+        true_range[..., 1:],
+        np.maximum(np.abs(high[..., 1:] - close[..., :-1]), np.abs(low[..., 1:] - close[..., :-1])),
+    )
+    total = np.zeros(close.shape[:-1])
+    for i in range(window):
+        total = total + true_range[..., i]
+    current = total / window
+    out[..., window - 1] = current
+    for i in range(window, close.shape[-1]):
+        current = (current * (window - 1) + true_range[..., i]) / window
+        out[..., i] = current
+    return out
+
+
+class ATR:
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.previous_close = None
+        self.count = 0
+        self.value = 0.0
+
+    def update(self, high: float, low: float, close: float) -> float:
+        high, low, close = float(high), float(low), float(close)
+        true_range = high - low
+        if self.previous_close is not None:
+            true_range = max(true_range, max(abs(high - self.previous_close), abs(low - self.previous_close)))
+        self.previous_close = close
+        self.count += 1
+        if self.count < self.window:
+            self.value = self.value + true_range
+            return math.nan
+        if self.count == self.window:
+            self.value = (self.value + true_range) / self.window
+        else:
+            self.value = (self.value * (self.window - 1) + true_range) / self.window
+        return self.value
+
+
+# Rolling volatility
+
+def rolling_volatility(values, window: int = 20, periods_per_year: int = 252) -> np.ndarray:
+    """
+    Annualized sample standard deviation of the last window simple returns.
+
+    The first value is at index window (window returns need window + 1 prices).
+    """
+    values = _as_float64(values)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] < 2:
+        return out
+    returns = values[..., 1:] / values[..., :-1] - 1.0
+    _, sums, squares = _window_sums(returns, window)
+    out[..., 1:] = _window_std(sums, squares, window, ddof=1) * math.sqrt(periods_per_year)
+    return out
+
+
+class RollingVolatility:
+    def __init__(self, window: int = 20, periods_per_year: int = 252):
+        self.window = window
+        self.scale = math.sqrt(periods_per_year)
+        self.previous = None
+        self._sums = _WindowSums(window)
+
+    def update(self, value: float) -> float:
+        value = float(value)
+        previous, self.previous = self.previous, value
+        if previous is None:
+            return math.nan
+        sums, squares = self._sums.update(value / previous - 1.0)
+        return _std(sums, squares, self.window, ddof=1) * self.scale
@@ -0,0 +1,396 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backtest.core import (
+    BacktestError,
+    PriceSource,
+    Strategy,
+    day_numbers,
+    day_strings,
+    load_price_series,
+    load_prices,
+    rounded,
+    run_backtest,
+    series_rows,
+)
+from backtest.strategies import get_strategy
+from backtest.sweep import SMA_SWEEP_MAX_WINDOWS, best_pair, sma_crossover_sweep
+from backtest.walk_forward import (
+    DEFAULT_TEST_DAYS,
+    DEFAULT_TRAIN_DAYS,
+    WALK_FORWARD_STRATEGIES,
+    candidate_grid,
+    run_walk_forward,
+)
+from blocking_io import run_compute, run_yahoo
+
+# Most strategy configurations one batch request may run against its shared prices
+BATCH_BACKTEST_MAX_CONFIGURATIONS = 20
+
+
+def parse_capital(payload: Dict[str, Any], default_capital: Optional[float] = None, positive_capital: bool = False) -> float:
+    """
+    Capital of a request, or default_capital when it doesn't give one.
+
+    Raises:
+        BacktestError: If capital is missing (without a default), not a number, or not
+            positive when positive_capital is set
+    """
+    try:
+        capital = float(payload.get("capital", default_capital))
+    except (TypeError, ValueError):
+        raise BacktestError("Invalid capital amount")
+    if positive_capital and capital <= 0:
+        raise BacktestError("Invalid capital amount")
+    return capital
+
+
+def parse_date_range(
+    payload: Dict[str, Any],
+    date_order_message: str = "Start date must be before end date",
+) -> Tuple[str, datetime, datetime]:
+    """
+    Validate the ticker and date range every backtest request shares.
+
+    Returns:
+        (ticker, start, end)
+
+    Raises:
+        BacktestError: With the message to return to the client
+    """
+    ticker = (payload.get("ticker") or "").upper().strip()
+    start_date = payload.get("start_date")
+    end_date = payload.get("end_date")
+    if not ticker or not start_date or not end_date:
+        raise BacktestError("Missing required fields")
+    try:
+        start_dt = datetime.fromisoformat(start_date)
+        end_dt = datetime.fromisoformat(end_date)
+    except Exception:
+        raise BacktestError("Invalid date format. Use YYYY-MM-DD")
+    if start_dt >= end_dt:
+        raise BacktestError(date_order_message)
+    return ticker, start_dt, end_dt
+
+
+def parse_market_fields(
+    payload: Dict[str, Any],
+    default_capital: Optional[float] = None,
+    positive_capital: bool = False,
+) -> Tuple[str, datetime, datetime, float]:
+    """
+    Validate the capital, ticker and date range every backtest request shares.
+
+    Returns:
+        (ticker, start, end, capital)
+
+    Raises:
+        BacktestError: With the message to return to the client
+    """
+    capital = parse_capital(payload, default_capital, positive_capital)
+    ticker, start_dt, end_dt = parse_date_range(payload)
+    return ticker, start_dt, end_dt, capital
+
+
+def parse_backtest_request(strategy: Strategy, payload: Dict[str, Any]) -> Tuple[str, datetime, datetime, float, Dict[str, Any]]:
+    """
+    Validate a strategy endpoint's request in the order (and with the messages) the
+    strategy's endpoint has always used.
+
+    Returns:
+        (ticker, start, end, capital, params)
+
+    Raises:
+        BacktestError: With the message to return to the client
+    """
+    if strategy.capital_first:
+        capital = parse_capital(payload, strategy.default_capital, strategy.positive_capital)
+        params = strategy.parse_params(payload)
+    else:
+        params = strategy.parse_params(payload)
+        capital = parse_capital(payload, strategy.default_capital, strategy.positive_capital)
+    ticker, start_dt, end_dt = parse_date_range(payload, strategy.date_order_message)
+    return ticker, start_dt, end_dt, capital, params
+
+
+def parse_window_range(payload: Dict[str, Any], key: str) -> List[int]:
+    """
+    Windows from a [start, stop] or [start, stop, step] list (stop inclusive).
+
+    Raises:
+        BacktestError: If the range is malformed, not positive, or too long
+    """
+    bounds = payload.get(key)
+    try:
+        if not isinstance(bounds, (list, tuple)) or len(bounds) not in (2, 3):
+            raise ValueError
+        start, stop = int(bounds[0]), int(bounds[1])
+        step = int(bounds[2]) if len(bounds) == 3 else 1
+    except (TypeError, ValueError):
+        raise BacktestError(f"{key} must be [start, stop] or [start, stop, step] integers")
+    if start <= 0 or stop < start or step <= 0:
+        raise BacktestError(f"{key} must have 0 < start <= stop and a positive step")
+    windows = list(range(start, stop + 1, step))
+    if len(windows) > SMA_SWEEP_MAX_WINDOWS:
+        raise BacktestError(f"{key} may cover at most {SMA_SWEEP_MAX_WINDOWS} windows")
+    return windows
+
+
+async def run_backtest_request(strategy_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Historical backtest of a strategy endpoint.
+
+    Args:
+        strategy_type: Name of a registered strategy (see backtest.strategies)
+        payload: Request body (ticker, start_date, end_date, capital and strategy parameters)
+
+    Returns:
+        API response dict with "status" and either "data" or "message".
+    """
+    try:
+        strategy = get_strategy(strategy_type)
+        ticker, start_dt, end_dt, capital, params = parse_backtest_request(strategy, payload)
+    except BacktestError as e:
+        return {"status": "error", "message": str(e)}
+
+    try:
+        days, prices, source = await run_yahoo(load_price_series, ticker, start_dt, end_dt)
+    except BacktestError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Data fetch failed: {e}"}
+
+    # Scheduled buys follow the requested range, not just the dates with prices
+    schedule = (int(day_numbers([start_dt])[0]), int(day_numbers([end_dt])[0]))
+    try:
+        data = await run_compute(run_backtest, strategy, days, prices, capital, params, schedule, source)
+    except BacktestError as e:
+        return {"status": "error", "message": str(e)}
+    return {"status": "success", "data": data}
+
+
+def parse_batch_configurations(payload: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    (key, configuration) pairs of a batch request; the key is the configuration's "id",
+    or its strategy_type when no id is given.
+
+    Raises:
+        BacktestError: If the list is missing, too long, malformed, or keys repeat
+    """
+    configurations = payload.get("configurations")
+    if not isinstance(configurations, list) or not configurations:
+        raise BacktestError("configurations must be a non-empty list")
+    if len(configurations) > BATCH_BACKTEST_MAX_CONFIGURATIONS:
+        raise BacktestError(f"At most {BATCH_BACKTEST_MAX_CONFIGURATIONS} configurations per batch")
+
+    keyed = []
+    for configuration in configurations:
+        if not isinstance(configuration, dict) or not isinstance(configuration.get("params", {}), dict):
+            raise BacktestError("Each configuration must be {strategy_type, params}")
+        key = str(configuration.get("id") or configuration.get("strategy_type"))
+        if key in (k for k, _ in keyed):
+            raise BacktestError(f"Duplicate configuration '{key}': give each one a unique id")
+        keyed.append((key, configuration))
+    return keyed
+
+
+def run_batch_configurations(
+    configurations: List[Tuple[str, Dict[str, Any]]],
+    payload: Dict[str, Any],
+    days: np.ndarray,
+    prices: np.ndarray,
+    schedule: Tuple[int, int],
+    source: Optional[PriceSource] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Backtest every configuration against one set of price arrays.
+
+    A configuration that fails validation or can't run on the data gets its own error
+    entry; the others still run.
+    """
+    results = {}
+    for key, configuration in configurations:
+        # Shared fields first, so each configuration may override capital
+        fields = {**payload, **configuration.get("params", {})}
+        if configuration.get("capital") is not None:
+            fields["capital"] = configuration["capital"]
+        try:
+            strategy = get_strategy(configuration.get("strategy_type"))
+            _, _, _, capital, params = parse_backtest_request(strategy, fields)
+            data = run_backtest(strategy, days, prices, capital, params, schedule, source)
+        except BacktestError as e:
+            results[key] = {"status": "error", "message": str(e)}
+            continue
+        results[key] = {"status": "success", "strategy_type": strategy.name, "data": data}
+    return results
+
+
+async def run_batch_backtest_request(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Several strategy configurations on one ticker and date range, from a single download.
+
+    Args:
+        payload: Request body (ticker, start_date, end_date, optional shared capital, and
+            configurations: [{strategy_type, params, optional id and capital}, ...])
+
+    Returns:
+        API response dict; "data" maps each configuration key to the response the
+        matching strategy endpoint would give ({"status", "data"} or {"status", "message"}).
+    """
+    try:
+        configurations = parse_batch_configurations(payload)
+        # Capital is validated per configuration, against each strategy's own rules
+        ticker, start_dt, end_dt, _ = parse_market_fields({**payload, "capital": 0.0})
+    except BacktestError as e:
+        return {"status": "error", "message": str(e)}
+
+    try:
+        days, prices, source = await run_yahoo(load_price_series, ticker, start_dt, end_dt)
+    except BacktestError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Data fetch failed: {e}"}
+
+    schedule = (int(day_numbers([start_dt])[0]), int(day_numbers([end_dt])[0]))
+    results = await run_compute(run_batch_configurations, configurations, payload, days, prices, schedule, source)
+    return {"status": "success", "data": results}
+
+
+def _grid(values: np.ndarray, digits: int) -> List[List[Optional[float]]]:
+    return [[None if np.isnan(value) else round(value, digits) for value in row] for row in values.tolist()]
+
+
+async def run_sma_sweep_request(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    SMA crossover over a grid of window pairs on one price download.
+
+    Args:
+        payload: Request body (ticker, start_date, end_date, capital,
+            short_window_range and long_window_range as [start, stop(, step)])
+
+    Returns:
+        API response dict; "data" holds the windows and heatmaps of final value, return
+        and max drawdown (rows: short windows, columns: long windows; null where invalid).
+    """
+    try:
+        short_windows = parse_window_range(payload, "short_window_range")
+        long_windows = parse_window_range(payload, "long_window_range")
+        ticker, start_dt, end_dt, capital = parse_market_fields(payload)
+    except BacktestError as e:
+        return {"status": "error", "message": str(e)}
+
+    try:
+        days, prices = await run_yahoo(load_prices, ticker, start_dt, end_dt)
+    except BacktestError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Data fetch failed: {e}"}
+
+    result = await run_compute(sma_crossover_sweep, prices, capital, short_windows, long_windows)
+    best = best_pair(result, short_windows, long_windows)
+    if best is None:
+        return {
+            "status": "error",
+            "message": f"No valid window pairs: need short < long <= {len(prices)} trading days",
+        }
+    return {
+        "status": "success",
+        "data": {
+            "ticker": ticker,
+            "start_date": day_strings(days[:1])[0],
+            "end_date": day_strings(days[-1:])[0],
+            "num_days": len(prices),
+            "short_windows": short_windows,
+            "long_windows": long_windows,
+            "final_value": _grid(result["final_value"], 2),
+            "total_return_pct": _grid(result["total_return_pct"], 2),
+            "max_drawdown_pct": _grid(result["max_drawdown_pct"], 2),
+            "best": best,
+        },
+    }
+
+
+def parse_walk_forward_request(payload: Dict[str, Any]) -> Tuple[str, Dict[str, Any], int, int, int]:
+    """
+    Validate the strategy, its parameter grid and the fold layout of a walk-forward request.
+
+    Returns:
+        (strategy_type, grid, train_days, test_days, workers)
+
+    Raises:
+        BacktestError: With the message to return to the client
+    """
+    strategy_type = payload.get("strategy_type")
+    if strategy_type not in WALK_FORWARD_STRATEGIES:
+        raise BacktestError(f"strategy_type must be one of {', '.join(WALK_FORWARD_STRATEGIES)}")
+    try:
+        train_days = int(payload.get("train_days") or DEFAULT_TRAIN_DAYS)
+        test_days = int(payload.get("test_days") or DEFAULT_TEST_DAYS)
+        workers = int(payload.get("workers") or 1)  # Worker processes to spread the folds across
+    except (TypeError, ValueError):
+        raise BacktestError("train_days, test_days and workers must be integers")
+    if train_days <= 1 or test_days <= 0:
+        raise BacktestError("train_days must be greater than 1 and test_days positive")
+
+    if strategy_type == "simple_moving_average_crossover":
+        grid = {
+            "short_windows": parse_window_range({"short_window_range": [10, 100, 10], **payload}, "short_window_range"),
+            "long_windows": parse_window_range({"long_window_range": [50, 250, 25], **payload}, "long_window_range"),
+        }
+    else:
+        grid = {"candidates": candidate_grid(strategy_type, payload)}
+    return strategy_type, grid, train_days, test_days, workers
+
+
+async def run_walk_forward_request(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Walk-forward optimization: re-optimize on each rolling train window, trade the
+    chosen parameters on the following test window, and stitch the test windows into
+    one out-of-sample equity curve.
+
+    Args:
+        payload: Request body (strategy_type, ticker, start_date, end_date, capital,
+            train_days, test_days, workers, and the parameter grid: short_window_range /
+            long_window_range for the SMA crossover, frequencies (and target_growth_rates
+            for value averaging, contribution for DCA) otherwise)
+
+    Returns:
+        API response dict; "data" holds the per-fold parameters and returns, and the
+        out-of-sample series with its summary.
+    """
+    try:
+        strategy_type, grid, train_days, test_days, workers = parse_walk_forward_request(payload)
+        ticker, start_dt, end_dt, capital = parse_market_fields(payload, positive_capital=True)
+    except BacktestError as e:
+        return {"status": "error", "message": str(e)}
+
+    try:
+        days, prices = await run_yahoo(load_prices, ticker, start_dt, end_dt)
+    except BacktestError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Data fetch failed: {e}"}
+
+    try:
+        result = await run_compute(
+            run_walk_forward, strategy_type, days, prices, capital, grid, train_days, test_days, workers
+        )
+    except BacktestError as e:
+        return {"status": "error", "message": str(e)}
+    return {
+        "status": "success",
+        "data": {
+            "ticker": ticker,
+            "strategy_type": strategy_type,
+            "train_days": train_days,
+            "test_days": test_days,
+            "folds": result["folds"],
+            "final_value": round(result["final_value"], 2),
+            "total_return_pct": round(result["total_return_pct"], 2),
+            "max_drawdown_pct": round(result["max_drawdown_pct"], 2),
+            "buy_hold_return_pct": round(result["buy_hold_return_pct"], 2),
+            "series": series_rows(result["days"], {"value": rounded(result["equity"], 2)}),
+        },
+    }
@@ -0,0 +1,368 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from backtest.calendar import trading_calendar
+from backtest.core import BacktestError, Strategy, rounded, series_rows, total_return_pct
+from backtest.indicator_cache import indicator_rows
+
+
+def _optional_float(source: Dict[str, Any], key: str, message: str) -> Optional[float]:
+    value = source.get(key)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise BacktestError(message)
+
+
+class BuyHold:
+    """Invest all capital on the first day and hold."""
+
+    name = "buy_hold"
+    default_capital = None
+    positive_capital = False
+    capital_first = False
+    date_order_message = "Buy date must be before sell date"
+
+    def parse_params(self, source: Dict[str, Any]) -> Dict[str, Any]:
+        return {}
+
+    def min_days(self, params: Dict[str, Any]) -> int:
+        return 1
+
+    def run(self, prices, days, capital, params, schedule=None, detail=False, source=None):
+        first = prices[:, 0]
+        shares = np.where(first > 0, capital / np.where(first > 0, first, 1.0), 0.0)
+        return {"equity": shares.astype(prices.dtype)[:, None] * prices}
+
+    def report(self, days, prices, result, capital, params):
+        buy_price = float(prices[0])
+        sell_price = float(prices[-1])
+        final_value = float(result["equity"][-1])
+        return {
+            "buy_price": round(buy_price, 4),
+            "sell_price": round(sell_price, 4),
+            "final_value": round(final_value, 2),
+            "total_return_pct": round(total_return_pct(final_value, capital), 2),
+            "series": series_rows(days, {"price": prices.tolist(), "value": rounded(result["equity"], 2)}),
+        }
+
+
+class SmaCrossover:
+    """Hold the asset while the short moving average is above the long one (yesterday's signal)."""
+
+    name = "simple_moving_average_crossover"
+    default_capital = None
+    positive_capital = False
+    capital_first = False
+    date_order_message = "Start date must be before end date"
+
+    def parse_params(self, source: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            short_window = int(source.get("short_window", 100))
+            long_window = int(source.get("long_window", 250))
+        except (TypeError, ValueError):
+            raise BacktestError("Window sizes must be positive integers")
+        if short_window >= long_window:
+            raise BacktestError("Short window must be less than long window")
+        if short_window <= 0 or long_window <= 0:
+            raise BacktestError("Window sizes must be positive integers")
+        return {"short_window": short_window, "long_window": long_window}
+
+    def min_days(self, params: Dict[str, Any]) -> int:
+        return params["long_window"]
+
+    def run(self, prices, days, capital, params, schedule=None, detail=False, source=None):
+        if prices.shape[1] < params["long_window"]:
+            # Too short for a signal: the capital is never invested
+            return {"equity": np.full(prices.shape, float(capital), dtype=prices.dtype)}
+
+        short_ma = indicator_rows("sma", prices, days, source, window=params["short_window"])
+        long_ma = indicator_rows("sma", prices, days, source, window=params["long_window"])
+        signal = short_ma > long_ma
+
+        # Yesterday's signal sets today's position
+        strategy_returns = np.zeros(prices.shape, dtype=prices.dtype)
+        strategy_returns[:, 1:] = (prices[:, 1:] / prices[:, :-1] - 1.0) * signal[:, :-1]
+        result = {"equity": np.cumprod(1.0 + strategy_returns, axis=1) * capital}
+        if detail:
+            position = np.zeros(prices.shape, dtype=np.int64)
+            position[:, 1:] = signal[:, :-1]
+            result.update({"short_ma": short_ma, "long_ma": long_ma, "signal": position})
+        return result
+
+    def report(self, days, prices, result, capital, params):
+        final_value = float(result["equity"][-1])
+
+        def moving_average(values):
+            return [None if np.isnan(value) else value for value in values.tolist()]
+
+        return {
+            "short_window": params["short_window"],
+            "long_window": params["long_window"],
+            "final_value": round(final_value, 2),
+            "total_return_pct": round(total_return_pct(final_value, capital), 2),
+            "series": series_rows(days, {
+                "price": prices.tolist(),
+                "short_ma": moving_average(result["short_ma"]),
+                "long_ma": moving_average(result["long_ma"]),
+                "signal": result["signal"].tolist(),
+                "value": rounded(result["equity"], 2),
+            }),
+        }
+
+
+def _parse_frequency(source: Dict[str, Any]) -> str:
+    # An unknown frequency is rejected when the buy calendar is built, after the prices
+    # have loaded, as the endpoints have always done
+    return (source.get("frequency") or "monthly").lower()
+
+
+class DollarCostAveraging:
+    """Invest a fixed contribution on every scheduled buy day until the capital is used."""
+
+    name = "dca"
+    default_capital = None
+    positive_capital = True
+    capital_first = True
+    date_order_message = "Buy date must be before sell date"
+
+    def parse_params(self, source: Dict[str, Any]) -> Dict[str, Any]:
+        contribution = _optional_float(source, "contribution", "Invalid contribution amount")
+        if contribution is not None and contribution <= 0:
+            raise BacktestError("Invalid contribution amount")
+        return {"frequency": _parse_frequency(source), "contribution": contribution}
+
+    def min_days(self, params: Dict[str, Any]) -> int:
+        return 1
+
+    def run(self, prices, days, capital, params, schedule=None, detail=False, source=None):
+        buy_columns = trading_calendar(days).buy_columns(params["frequency"], schedule)
+        if len(buy_columns) == 0:
+            # No buy dates: the capital is never invested
+            result = {"equity": np.full(prices.shape, float(capital), dtype=prices.dtype)}
+            if detail:
+                result["signal"] = np.zeros(prices.shape, dtype=np.int64)
+            return result
+
+        contribution = params.get("contribution")
+        if contribution is None:
+            contribution = capital / len(buy_columns)
+
+        # Contribution sizes don't depend on price, so they are the same for every path
+        amounts = np.zeros(len(buy_columns))
+        total_contributed = 0.0
+        for i in range(len(buy_columns)):
+            if total_contributed >= capital:
+                break
+            amounts[i] = min(contribution, capital - total_contributed)
+            total_contributed += amounts[i]
+
+        shares_bought = np.zeros(prices.shape, dtype=prices.dtype)
+        shares_bought[:, buy_columns] = amounts / prices[:, buy_columns]
+        shares = np.cumsum(shares_bought, axis=1)
+        contributed = np.zeros(prices.shape[1])
+        contributed[buy_columns] = amounts
+        contributed = np.cumsum(contributed)
+        result = {"equity": shares * prices, "cash": np.broadcast_to(capital - contributed, prices.shape)}
+        if detail:
+            buy_mask = trading_calendar(days).buy_mask(params["frequency"], schedule)
+            signal = np.broadcast_to(buy_mask.astype(np.int64), prices.shape)
+            result.update({
+                "shares": shares,
+                "contributed": np.broadcast_to(contributed, prices.shape),
+                "signal": signal,
+            })
+        return result
+
+    def report(self, days, prices, result, capital, params):
+        if not result["signal"].any():
+            raise BacktestError("No valid DCA buy dates available in price data")
+        contribution = params["contribution"]
+        if contribution is None:
+            contribution = capital / int(result["signal"].sum())
+        final_value = round(float(result["equity"][-1]), 2)
+        total_contributed = float(result["contributed"][-1])
+        return {
+            "frequency": params["frequency"],
+            "contribution": round(contribution, 2),
+            "total_contributed": round(total_contributed, 2),
+            "final_value": final_value,
+            "total_return_pct": round(total_return_pct(final_value, total_contributed), 2),
+            "series": series_rows(days, {
+                "price": prices.tolist(),
+                "shares": result["shares"].tolist(),
+                "contributed": rounded(result["contributed"], 2),
+                "value": rounded(result["equity"], 2),
+                "signal": result["signal"].tolist(),
+            }),
+        }
+
+
+class ValueAveraging:
+    """Buy on scheduled days up to a target portfolio value that grows each period (buy-only)."""
+
+    name = "value_averaging"
+    default_capital = None
+    positive_capital = True
+    capital_first = True
+    date_order_message = "Buy date must be before sell date"
+
+    def parse_params(self, source: Dict[str, Any]) -> Dict[str, Any]:
+        # Given as a percentage per period
+        target_growth_rate = _optional_float(source, "target_growth_rate", "Invalid target growth rate")
+        if target_growth_rate is not None and target_growth_rate < 0:
+            raise BacktestError("Invalid target growth rate")
+        return {
+            "frequency": _parse_frequency(source),
+            "target_growth_rate": target_growth_rate / 100.0 if target_growth_rate is not None else None,
+        }
+
+    def min_days(self, params: Dict[str, Any]) -> int:
+        return 1
+
+    @staticmethod
+    def _growth_rate(params: Dict[str, Any], num_buys: int) -> float:
+        if params.get("target_growth_rate") is not None:
+            return params["target_growth_rate"]
+        return 0.01 if num_buys > 1 else 0.0
+
+    def run(self, prices, days, capital, params, schedule=None, detail=False, source=None):
+        buy_columns = trading_calendar(days).buy_columns(params["frequency"], schedule)
+        if len(buy_columns) == 0:
+            # No buy dates: the capital is never invested
+            result = {"equity": np.full(prices.shape, float(capital), dtype=prices.dtype)}
+            if detail:
+                result["signal"] = np.zeros(prices.shape, dtype=np.int64)
+            return result
+
+        target_growth_rate = self._growth_rate(params, len(buy_columns))
+        num_paths = prices.shape[0]
+        initial_target = capital / len(buy_columns)
+        shares = np.zeros(num_paths)
+        contributed = np.zeros(num_paths)
+        shares_bought = np.zeros(prices.shape, dtype=prices.dtype)
+        invested = np.zeros(prices.shape)
+
+        # Sequential over buy dates only; each step is vectorized across paths
+        for period, col in enumerate(buy_columns):
+            price = prices[:, col]
+            target_value = initial_target * ((1 + target_growth_rate) ** period)
+            difference = target_value - shares * price
+            investment = np.where(difference > 0, np.minimum(difference, capital - contributed), 0.0)
+            investment = np.maximum(investment, 0.0)
+            bought = investment / price
+            shares += bought
+            contributed += investment
+            shares_bought[:, col] = bought
+            invested[:, col] = investment
+
+        total_shares = np.cumsum(shares_bought, axis=1)
+        contributed = np.cumsum(invested, axis=1, out=invested)
+        result = {"equity": total_shares * prices, "cash": capital - contributed}
+        if detail:
+            buy_mask = trading_calendar(days).buy_mask(params["frequency"], schedule)
+            signal = np.broadcast_to(buy_mask.astype(np.int64), prices.shape)
+            result.update({"shares": total_shares, "contributed": contributed, "signal": signal})
+        return result
+
+    def report(self, days, prices, result, capital, params):
+        if not result["signal"].any():
+            raise BacktestError("No valid value averaging buy dates available in price data")
+        target_growth_rate = self._growth_rate(params, int(result["signal"].sum()))
+        final_value = round(float(result["equity"][-1]), 2)
+        total_contributed = float(result["contributed"][-1])
+        return {
+            "frequency": params["frequency"],
+            "target_growth_rate": round(target_growth_rate * 100, 2) if target_growth_rate else None,
+            "total_contributed": round(total_contributed, 2),
+            "final_value": final_value,
+            "total_return_pct": round(total_return_pct(final_value, total_contributed), 2),
+            "series": series_rows(days, {
+                "price": prices.tolist(),
+                "value": rounded(result["equity"], 2),
+                "shares": rounded(result["shares"], 6),
+                "contributed": rounded(result["contributed"], 2),
+            }),
+        }
+
+
+class BuyHoldMarkers:
+    """Buy & hold with position sizing, optional fixed entry/exit prices and per-trade commissions."""
+
+    name = "buy_hold_markers"
+    default_capital = 1000.0
+    positive_capital = False
+    capital_first = False
+    date_order_message = "Buy date must be before sell date"
+
+    def parse_params(self, source: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            entry_price = source.get("entry_price")
+            exit_price = source.get("exit_price")
+            return {
+                "entry_price": float(entry_price) if entry_price else None,
+                "exit_price": float(exit_price) if exit_price else None,
+                "position_percent": float(source.get("position_percent", 100.0)),
+                "commission_dollars": float(source.get("commission_dollars", 0.0)),
+            }
+        except (TypeError, ValueError):
+            raise BacktestError("Invalid entry/exit price, position percent or commission")
+
+    def min_days(self, params: Dict[str, Any]) -> int:
+        return 1
+
+    def run(self, prices, days, capital, params, schedule=None, detail=False, source=None):
+        entry_price, exit_price = params.get("entry_price"), params.get("exit_price")
+        buy_price = np.full(prices.shape[0], float(entry_price)) if entry_price else prices[:, 0]
+        position_capital = capital * (params.get("position_percent", 100.0) / 100.0)
+        shares = np.where(buy_price > 0, position_capital / np.where(buy_price > 0, buy_price, 1.0), 0.0)
+
+        total_trading_costs = params.get("commission_dollars", 0.0) * 2
+        position_value = shares.astype(prices.dtype)[:, None] * prices
+        equity = position_value - total_trading_costs
+        if exit_price:
+            equity[:, -1] = shares * float(exit_price) - total_trading_costs
+        result = {"equity": equity, "cash": np.broadcast_to(float(capital - position_capital), prices.shape)}
+        if detail:
+            result.update({"position_value": position_value, "shares": np.broadcast_to(shares[:, None], prices.shape)})
+        return result
+
+    def report(self, days, prices, result, capital, params):
+        shares = float(result["shares"][0])
+        buy_price = params["entry_price"] or float(prices[0])
+        sell_price = params["exit_price"] or float(prices[-1])
+        position_capital = capital * (params["position_percent"] / 100.0)
+        final_value = float(result["equity"][-1])
+        return {
+            "buy_price": round(buy_price, 4),
+            "sell_price": round(sell_price, 4),
+            "final_value": round(final_value, 2),
+            "total_return_pct": round(total_return_pct(final_value, position_capital), 2) if position_capital > 0 else 0.0,
+            "shares": round(shares, 6),
+            "commission_dollars": round(params["commission_dollars"], 2),
+            "position_percent": round(params["position_percent"], 2),
+            "trading_costs": round(params["commission_dollars"] * 2, 2),
+            "series": series_rows(days, {
+                "price": prices.tolist(),
+                "value": rounded(result["position_value"], 2),
+                "is_entry": (prices == prices[0]).tolist(),
+                "is_exit": (prices == prices[-1]).tolist(),
+                "shares": [shares] * len(prices),
+            }),
+        }
+
+
+STRATEGIES: Dict[str, Strategy] = {
+    strategy.name: strategy
+    for strategy in (BuyHold(), SmaCrossover(), DollarCostAveraging(), ValueAveraging(), BuyHoldMarkers())
+}
+
+
+def get_strategy(name: str) -> Strategy:
+    strategy = STRATEGIES.get(name)
+    if strategy is None:
+        raise BacktestError(f"Unknown strategy type '{name}'")
+    return strategy
@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Elements per (pairs, days) working matrix while sweeping; bounds memory per chunk
+SWEEP_CHUNK_ELEMENTS = 4_000_000
+# Largest number of values per window axis a sweep may request
+SMA_SWEEP_MAX_WINDOWS = 200
+
+
+def moving_averages(prices: np.ndarray, windows: np.ndarray) -> np.ndarray:
+    """
+    (len(windows), days) matrix of trailing means, all read off one cumulative-sum array.
+
+    Uses the same shifted running totals as backtest.indicators.sma, so every row equals
+    sma(prices, window) exactly.
+    """
+    num_days = len(prices)
+    shift = prices[0]
+    csum = np.cumsum(prices - shift)
+    start = np.arange(num_days)[None, :] - windows[:, None]  # Last index before each window
+    previous = np.where(start >= 0, csum[np.maximum(start, 0)], 0.0)
+    sums = csum[None, :] - previous
+    sums[start < -1] = np.nan  # Fewer than window values seen
+    return shift + sums / windows[:, None]
+
+
+def sma_crossover_sweep(
+    prices: np.ndarray,
+    capital: float,
+    short_windows: List[int],
+    long_windows: List[int],
+) -> Dict[str, Any]:
+    """
+    Evaluate the SMA crossover for every (short, long) window pair in one vectorized pass.
+
+    Pairs are evaluated in chunks of rows of a (pairs, days) matrix with the same
+    arithmetic as the strategy, so each cell matches a single
+    /api/strategies/simple_moving_average_crossover run.
+
+    Returns:
+        {"final_value", "total_return_pct", "max_drawdown_pct"}: (len(short_windows),
+        len(long_windows)) arrays, NaN where short >= long or the series is shorter than long.
+    """
+    short_windows = np.asarray(short_windows, dtype=np.int64)
+    long_windows = np.asarray(long_windows, dtype=np.int64)
+    num_days = len(prices)
+    shape = (len(short_windows), len(long_windows))
+    final_value = np.full(shape, np.nan)
+    max_drawdown = np.full(shape, np.nan)
+
+    short_idx, long_idx = np.nonzero(
+        (short_windows[:, None] < long_windows[None, :]) & (long_windows[None, :] <= num_days)
+    )
+    if len(short_idx):
+        windows, inverse = np.unique(np.concatenate([short_windows, long_windows]), return_inverse=True)
+        averages = moving_averages(prices, windows)
+        short_rows = inverse[short_idx]
+        long_rows = inverse[len(short_windows) + long_idx]
+        daily_returns = prices[1:] / prices[:-1] - 1.0
+
+        chunk = max(1, SWEEP_CHUNK_ELEMENTS // num_days)
+        for lo in range(0, len(short_idx), chunk):
+            hi = lo + chunk
+            signal = averages[short_rows[lo:hi]] > averages[long_rows[lo:hi]]
+            # Yesterday's signal sets today's position
+            strategy_returns = np.zeros(signal.shape)
+            strategy_returns[:, 1:] = daily_returns * signal[:, :-1]
+            equity = np.cumprod(1.0 + strategy_returns, axis=1) * capital
+            drawdown = 1.0 - equity / np.maximum.accumulate(equity, axis=1)
+            final_value[short_idx[lo:hi], long_idx[lo:hi]] = equity[:, -1]
+            max_drawdown[short_idx[lo:hi], long_idx[lo:hi]] = drawdown.max(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total_return = (final_value - capital) / capital * 100.0 if capital else np.zeros(shape)
+    return {
+        "final_value": final_value,
+        "total_return_pct": total_return,
+        "max_drawdown_pct": max_drawdown * 100.0,
+    }
+
+
+def best_pair(result: Dict[str, np.ndarray], short_windows: List[int], long_windows: List[int]) -> Optional[Dict[str, Any]]:
+    """The window pair with the highest final value, or None if no pair was valid."""
+    final_value = result["final_value"]
+    if np.isnan(final_value).all():
+        return None
+    i, j = np.unravel_index(np.nanargmax(final_value), final_value.shape)
+    return {
+        "short_window": int(short_windows[i]),
+        "long_window": int(long_windows[j]),
+        "final_value": round(float(final_value[i, j]), 2),
+        "total_return_pct": round(float(result["total_return_pct"][i, j]), 2),
+        "max_drawdown_pct": round(float(result["max_drawdown_pct"][i, j]), 2),
+    }
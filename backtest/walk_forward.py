@@ -0,0 +1,191 @@
+from concurrent.futures import Future
+from itertools import product
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from backtest.calendar import SCHEDULE_FREQUENCIES
+from backtest.core import BacktestError, day_strings, total_wealth
+from backtest.strategies import STRATEGIES
+from backtest.sweep import best_pair, sma_crossover_sweep
+from process_pool import PROCESS_POOL_WORKERS, get_process_pool
+
+WALK_FORWARD_STRATEGIES = ["simple_moving_average_crossover", "dca", "value_averaging"]
+# Train / test window lengths in trading days (two years / six months)
+DEFAULT_TRAIN_DAYS = 504
+DEFAULT_TEST_DAYS = 126
+# Largest parameter grid of a scheduled strategy (frequencies x growth rates)
+WALK_FORWARD_MAX_CANDIDATES = 50
+
+
+def walk_forward_folds(num_days: int, train_days: int, test_days: int) -> List[Tuple[int, int, int]]:
+    """
+    Rolling (train_start, test_start, test_end) index triples.
+
+    Each fold trains on train_days bars and tests on the next test_days (the last test
+    window may be shorter); windows then roll forward by test_days, so test windows
+    tile the period after the first train window without overlapping.
+    """
+    folds = []
+    test_start = train_days
+    while test_start < num_days:
+        folds.append((test_start - train_days, test_start, min(test_start + test_days, num_days)))
+        test_start += test_days
+    return folds
+
+
+def _optimize(spec: Dict[str, Any], lo: int, hi: int) -> Tuple[Dict[str, Any], float]:
+    """Best parameters on prices[lo:hi] by final wealth, and that wealth's growth."""
+    prices, days, capital = spec["prices"][lo:hi], spec["days"][lo:hi], spec["capital"]
+    if spec["strategy_type"] == "simple_moving_average_crossover":
+        result = sma_crossover_sweep(prices, capital, spec["short_windows"], spec["long_windows"])
+        best = best_pair(result, spec["short_windows"], spec["long_windows"])
+        if best is None:
+            raise BacktestError("No valid window pairs fit in the train window")
+        params = {"short_window": best["short_window"], "long_window": best["long_window"]}
+        return params, best["final_value"] / capital
+
+    strategy = STRATEGIES[spec["strategy_type"]]
+    best_params, best_growth = None, -np.inf
+    for params in spec["candidates"]:
+        result = strategy.run(prices[None, :], days, capital, params)
+        growth = float(total_wealth(result)[0, -1]) / capital
+        if growth > best_growth:
+            best_params, best_growth = params, growth
+    return best_params, best_growth
+
+
+def _test_growth(spec: Dict[str, Any], params: Dict[str, Any], fold: Tuple[int, int, int]) -> np.ndarray:
+    """Wealth on each test day relative to the wealth at the start of the test window."""
+    train_start, test_start, test_end = fold
+    strategy = STRATEGIES[spec["strategy_type"]]
+    capital = spec["capital"]
+    if spec["strategy_type"] == "simple_moving_average_crossover":
+        # Run from the train start so the moving averages are warm on the first test day,
+        # and measure growth from the close before it
+        lo = train_start
+        result = strategy.run(spec["prices"][None, lo:test_end], spec["days"][lo:test_end], capital, params)
+        equity = result["equity"][0]
+        return equity[test_start - lo:] / equity[test_start - lo - 1]
+
+    # Scheduled strategies start a fresh plan with the full capital in each test window
+    prices, days = spec["prices"][test_start:test_end], spec["days"][test_start:test_end]
+    result = strategy.run(prices[None, :], days, capital, params)
+    return total_wealth(result)[0] / capital
+
+
+def _request_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Chosen parameters in the units a request gives them (growth rates in percent)."""
+    if params.get("target_growth_rate") is None:
+        return params
+    return {**params, "target_growth_rate": round(params["target_growth_rate"] * 100.0, 10)}
+
+
+def evaluate_fold(spec: Dict[str, Any], fold: Tuple[int, int, int]) -> Dict[str, Any]:
+    """Optimize on a fold's train window and evaluate the chosen parameters on its test window."""
+    train_start, test_start, test_end = fold
+    params, train_growth = _optimize(spec, train_start, test_start)
+    return {"fold": fold, "params": params, "train_growth": train_growth, "test_growth": _test_growth(spec, params, fold)}
+
+
+def _evaluate_shard(spec: Dict[str, Any], folds: List[Tuple[int, int, int]]) -> List[Dict[str, Any]]:
+    """Process-pool entry point: evaluate a worker's share of folds in order."""
+    return [evaluate_fold(spec, fold) for fold in folds]
+
+
+def run_walk_forward(
+    strategy_type: str,
+    days: np.ndarray,
+    prices: np.ndarray,
+    capital: float,
+    grid: Dict[str, Any],
+    train_days: int = DEFAULT_TRAIN_DAYS,
+    test_days: int = DEFAULT_TEST_DAYS,
+    workers: int = 1,
+) -> Dict[str, Any]:
+    """
+    Walk-forward optimization of a strategy over one price series.
+
+    Every fold is independent, so folds are split into contiguous shards and evaluated on
+    the shared process pool when workers > 1; results are the same for any worker count.
+    Test-window growth is compounded from capital into one out-of-sample equity curve.
+
+    Args:
+        grid: {"short_windows", "long_windows"} for the SMA crossover, or
+            {"candidates": [params, ...]} for the scheduled strategies
+
+    Raises:
+        BacktestError: If the series is too short for one fold, or no parameters fit a train window
+    """
+    folds = walk_forward_folds(len(prices), train_days, test_days)
+    if not folds:
+        raise BacktestError(f"Insufficient data: need more than {train_days} trading days, got {len(prices)}")
+
+    spec = {"strategy_type": strategy_type, "days": days, "prices": prices, "capital": capital, **grid}
+    workers = max(1, min(int(workers or 1), PROCESS_POOL_WORKERS, len(folds)))
+    if workers == 1:
+        results = _evaluate_shard(spec, folds)
+    else:
+        bounds = np.linspace(0, len(folds), workers + 1).astype(int)
+        pool = get_process_pool()
+        futures: List[Future] = [
+            pool.submit(_evaluate_shard, spec, folds[lo:hi]) for lo, hi in zip(bounds[:-1], bounds[1:])
+        ]
+        results = [result for future in futures for result in future.result()]
+
+    # Stitch: each test window starts from the wealth the previous one ended with
+    equity_parts = []
+    wealth = capital
+    fold_reports = []
+    for result in results:
+        train_start, test_start, test_end = result["fold"]
+        curve = wealth * result["test_growth"]
+        equity_parts.append(curve)
+        fold_reports.append({
+            "train_start": day_strings(days[train_start:train_start + 1])[0],
+            "train_end": day_strings(days[test_start - 1:test_start])[0],
+            "test_start": day_strings(days[test_start:test_start + 1])[0],
+            "test_end": day_strings(days[test_end - 1:test_end])[0],
+            "params": _request_params(result["params"]),
+            "train_return_pct": round((result["train_growth"] - 1.0) * 100.0, 2),
+            "test_return_pct": round((float(result["test_growth"][-1]) - 1.0) * 100.0, 2),
+        })
+        wealth = float(curve[-1])
+
+    equity = np.concatenate(equity_parts)
+    first_test = folds[0][1]
+    peak = np.maximum.accumulate(np.concatenate([[capital], equity]))[1:]
+    buy_hold_growth = prices[-1] / prices[first_test - 1]
+    return {
+        "folds": fold_reports,
+        "days": days[first_test:],
+        "equity": equity,
+        "final_value": wealth,
+        "total_return_pct": (wealth - capital) / capital * 100.0,
+        "max_drawdown_pct": float((1.0 - equity / peak).max()) * 100.0,
+        "buy_hold_return_pct": (buy_hold_growth - 1.0) * 100.0,
+    }
+
+
+def candidate_grid(strategy_type: str, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Parameter candidates of a scheduled strategy: every frequency in "frequencies"
+    (default all), times every percentage in "target_growth_rates" for value averaging.
+
+    Raises:
+        BacktestError: If a candidate is invalid
+    """
+    strategy = STRATEGIES[strategy_type]
+    frequencies = payload.get("frequencies") or ["weekly", "biweekly", "monthly"]
+    rates = payload.get("target_growth_rates") or [0.5, 1.0, 2.0]
+    if not isinstance(frequencies, list) or not isinstance(rates, list):
+        raise BacktestError("frequencies and target_growth_rates must be lists")
+    if any(str(frequency).lower() not in SCHEDULE_FREQUENCIES for frequency in frequencies):
+        raise BacktestError("Invalid frequency.")
+    if strategy_type == "value_averaging":
+        sources = [{"frequency": f, "target_growth_rate": r} for f, r in product(frequencies, rates)]
+    else:
+        sources = [{"frequency": f, "contribution": payload.get("contribution")} for f in frequencies]
+    if len(sources) > WALK_FORWARD_MAX_CANDIDATES:
+        raise BacktestError(f"At most {WALK_FORWARD_MAX_CANDIDATES} parameter combinations per walk-forward")
+    return [strategy.parse_params(source) for source in sources]
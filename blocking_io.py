@@ -0,0 +1,50 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# Each upstream gets its own bounded thread pool so a burst of slow Yahoo downloads
+# can't use up the threads Supabase lookups need (and vice versa). Requests beyond the
+# limit wait in the pool's queue instead of blocking the event loop.
+YAHOO_MAX_CONCURRENCY = int(os.getenv("YAHOO_MAX_CONCURRENCY", "8"))
+SUPABASE_MAX_CONCURRENCY = int(os.getenv("SUPABASE_MAX_CONCURRENCY", "16"))
+# Long-running simulations (which may in turn wait on the process pool)
+COMPUTE_MAX_CONCURRENCY = int(os.getenv("COMPUTE_MAX_CONCURRENCY", "4"))
+
+_executors: Dict[str, ThreadPoolExecutor] = {
+    "yahoo": ThreadPoolExecutor(max_workers=YAHOO_MAX_CONCURRENCY, thread_name_prefix="yahoo-io"),
+    "supabase": ThreadPoolExecutor(max_workers=SUPABASE_MAX_CONCURRENCY, thread_name_prefix="supabase-io"),
+    "compute": ThreadPoolExecutor(max_workers=COMPUTE_MAX_CONCURRENCY, thread_name_prefix="compute"),
+}
+
+
+async def run_blocking(upstream: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking call on the executor reserved for an upstream and await its result.
+
+    Args:
+        upstream: Executor name ("yahoo", "supabase" or "compute")
+        func: Blocking callable
+        *args, **kwargs: Passed through to func
+
+    Returns:
+        Whatever func returns; exceptions raised by func propagate to the caller.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executors[upstream], functools.partial(func, *args, **kwargs))
+
+
+async def run_yahoo(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await a blocking yfinance / market data call."""
+    return await run_blocking("yahoo", func, *args, **kwargs)
+
+
+async def run_supabase(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await a blocking Supabase (or other db_supabase helper) call."""
+    return await run_blocking("supabase", func, *args, **kwargs)
+
+
+async def run_compute(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await a CPU-heavy call (e.g. a Monte Carlo run) without blocking the event loop."""
+    return await run_blocking("compute", func, *args, **kwargs)
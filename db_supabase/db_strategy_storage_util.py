@@ -10,6 +10,22 @@ SUPABASE_PASS = os.getenv("SUPABASE_PASS")
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_PASS)
 
+# Callbacks run with a strategy_id whenever that row is updated or deleted, so caches
+# built from it (e.g. Monte Carlo results) can drop their entries.
+_strategy_change_listeners = []
+
+def on_strategy_change(listener):
+    """Register a callable(strategy_id) to run after a strategy is updated or deleted."""
+    _strategy_change_listeners.append(listener)
+    return listener
+
+def _notify_strategy_change(strategy_id):
+    for listener in _strategy_change_listeners:
+        try:
+            listener(str(strategy_id))
+        except Exception as e:
+            print(f"Strategy change listener failed for {strategy_id}: {e}")
+
 def save_strategy(user_id: str, ticker_name: str, strategy_type: str, money_invested: int, start_date: str, end_date: str, metadata: dict | None = None):
     try:
         converted_start_date = datetime.fromisoformat(start_date).date()
@@ -89,6 +105,7 @@ def update_strategy(strategy_id: str, updates: dict):
             updates["metadata"] = new_meta
 
     response = (supabase.table("user_strategies").update(updates).eq("strategy_id", strategy_id).execute())
+    _notify_strategy_change(strategy_id)
 
     if not response.data:
         print(f"Failed to update strategy {strategy_id}.")
@@ -97,6 +114,7 @@ def update_strategy(strategy_id: str, updates: dict):
 
 def delete_strategy(strategy_id: str):
     response = supabase.table("user_strategies").delete().eq("strategy_id", strategy_id).execute()
+    _notify_strategy_change(strategy_id)
     if response.data:
         print(f"Strategy {strategy_id} deleted.")
     else:
@@ -111,6 +129,8 @@ def delete_all_user_strategies(user_id: str) -> bool:
             return False
 
         response = supabase.table("user_strategies").delete().eq("user_id", user_id).execute()
+        for row in existing.data:
+            _notify_strategy_change(row["strategy_id"])
         print(f"Deleted {len(response.data)} strategies for user {user_id}.")
         return True
 
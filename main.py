@@ -1,5 +1,5 @@
 ﻿from datetime import datetime
-from typing import Any, Dict, List
+import asyncio
 import os
 import time
 
@@ -52,20 +52,37 @@ from db_supabase.db_strategy_storage_util import (
     get_all_strategies_by_user,
     update_strategy,
     delete_strategy,
-    get_strategy_by_id,
 )
 
-try:
-    import yfinance as yf
-except Exception:
-    yf = None
+from market_data.calibration import calibration_cache_stats
+from market_data.prices import market_data_available, price_cache_stats
+from market_data.providers import get_provider
+
+from blocking_io import run_supabase, run_yahoo
+
+from backtest.indicator_cache import indicator_cache_stats
+from backtest.service import (
+    run_backtest_request,
+    run_batch_backtest_request,
+    run_sma_sweep_request,
+    run_walk_forward_request,
+)
+
+from monte_carlo.service import (
+    monte_carlo_cache_stats,
+    monte_carlo_memory_stats,
+    run_monte_carlo_comparison,
+    run_monte_carlo_request,
+)
+from monte_carlo.jobs import MonteCarloJobManager, QueueFullError
 
 import pandas as pd
-import numpy as np
 
 
 app = FastAPI()
 
+monte_carlo_jobs = MonteCarloJobManager(run_monte_carlo_request)
+
 # Get allowed origins from environment variable
 # For production, set ALLOWED_ORIGINS as comma-separated list of URLs
 # Example: ALLOWED_ORIGINS=https://yourapp.vercel.app,https://www.yourapp.com
@@ -95,7 +112,7 @@ async def get_quiz_root(request: Request):
     if not lesson:
         return {"status": "error", "message": "No lesson"}
     try:
-        quizInfo = get_quiz(level,lesson);
+        quizInfo = await run_supabase(get_quiz, level, lesson)
         if not quizInfo:
             return {"status": "error", "message": "No quiz found"}
         return {"status": "success", "data": quizInfo}
@@ -114,14 +131,14 @@ async def get_user_learning_progress_root(request: Request):
         return {"status": "error", "message": "No User"}
     try:
         # Ensure user exists
-        user = get_user(uid)
+        user = await run_supabase(get_user, uid)
         if not user:
             return {"status": "error", "message": "User not found"}
 
         # Fetch progress; initialize if missing
-        progress = get_user_learning_progress(uid)
+        progress = await run_supabase(get_user_learning_progress, uid)
         if not progress:
-            init = add_learning_user(uid)
+            init = await run_supabase(add_learning_user, uid)
             if not init or not init.get("success"):
                 return {"status": "error", "message": "Unable to initialize learning progress"}
             progress = init["user"]
@@ -152,7 +169,7 @@ async def get_lesson_root(request: Request):
     if level is None or lesson is None:
         return {"status": "error", "message": "No level or lesson_number"}
     try:
-        result = get_lesson(level, lesson)
+        result = await run_supabase(get_lesson, level, lesson)
         if not result:
             return {"status": "error", "message": "Lesson not found"}
         # db_lessons.get_lesson returns a list; return the first matching row
@@ -166,7 +183,7 @@ async def get_lesson_root(request: Request):
 @app.get("/api/lessons/{level}")
 async def get_lessons_for_level(level: int):
     try:
-        lessons = get_lessons_by_level(level)
+        lessons = await run_supabase(get_lessons_by_level, level)
         if not lessons:
             # Return success with empty array instead of error - this is expected when checking if a level exists
             return {"status": "success", "data": []}
@@ -182,7 +199,7 @@ async def add_learning_user_root(request: Request):
     uid = data.get("uid")
     if not uid:
         return {"status": "error", "message": "Missing uid"}
-    result = add_learning_user(uid)
+    result = await run_supabase(add_learning_user, uid)
     if result and result.get("success"):
         user_progress = result.get("user", {})
         response_data = {
@@ -217,7 +234,8 @@ async def set_user_learning_progress_root(request: Request):
         if completed_lessons_raw is not None:
             completed_lessons = parse_completed_lessons(completed_lessons_raw)
 
-        updated = set_user_learning_progress(
+        updated = await run_supabase(
+            set_user_learning_progress,
             uid,
             int(level_progress),
             int(lesson_progress),
@@ -251,7 +269,7 @@ async def set_user_completed_lessons_root(request: Request):
     completed_lessons = parse_completed_lessons(completed_lessons_raw)
 
     try:
-        updated = set_user_completed_lessons(uid, completed_lessons)
+        updated = await run_supabase(set_user_completed_lessons, uid, completed_lessons)
         if not updated:
             return {"status": "error", "message": "Unable to update completed lessons"}
         return {
@@ -275,7 +293,7 @@ async def send_verification_email_root(request: Request):
         return {"status": "error", "message": "Missing email"}
 
     try:
-        result = send_verification_email_service(email)
+        result = await run_supabase(send_verification_email_service, email)
         return {"status": "success", "data": result}
     except Exception as e:
         print(" Error sending verification email:", e)
@@ -285,33 +303,33 @@ async def send_verification_email_root(request: Request):
 @app.post("/api/verify_email")
 async def verify_email_root(request: Request):
     data = await request.json()
-    result = verify_email_service(data["email"], data["verification_code"])
+    result = await run_supabase(verify_email_service, data["email"], data["verification_code"])
     return {"status": "success", "data": result}
 
 
 @app.post("/api/is_user_verified")
 async def is_user_verified_root(request: Request):
     data = await request.json()
-    result = user_verified(data["email"])
+    result = await run_supabase(user_verified, data["email"])
     return {"status": "success", "data": result}
 
 
 @app.post("/api/add_user")
 async def add_user_root(request: Request):
     data = await request.json()
-    result = add_user(data["name"], data["email"], data["password_hash"])
+    result = await run_supabase(add_user, data["name"], data["email"], data["password_hash"])
     return {"status": "success", "data": result}
 
 
 @app.post("/api/login_user")
 async def login_user_root(request: Request):
     data = await request.json()
-    result = login_user(data["email"], data["password_hash"])
+    result = await run_supabase(login_user, data["email"], data["password_hash"])
     return {"status": "success", "data": result}
 
 @app.get("/api/user/{user_id}")
 async def get_user_root(user_id: str):
-    result = get_user(user_id)
+    result = await run_supabase(get_user, user_id)
     if not result:
         return {"status": "error", "message": "user not found"}
     return {"status": "success", "data": result}
@@ -322,7 +340,7 @@ async def get_user_id_root(request: Request):
     email = (data.get("email") or "").strip().lower()
     if not email:
         return {"status": "error", "message": "Missing email"}
-    user = get_user_by_email_service(email)
+    user = await run_supabase(get_user_by_email_service, email)
     if not user:
         return {"status": "error", "message": "User not found"}
     return {"status": "success", "data": {"id": user["id"]}}
@@ -336,7 +354,7 @@ async def forgot_password_root(request: Request):
         if not email:
             return {"status": "error", "message": "Missing email"}
         
-        result = send_password_reset_email_service(email)
+        result = await run_supabase(send_password_reset_email_service, email)
         if result.get("success"):
             return {"status": "success", "data": result}
         else:
@@ -363,7 +381,7 @@ async def verify_reset_code_root(request: Request):
         except ValueError:
             return {"status": "error", "message": "Invalid reset code format"}
         
-        is_valid = verify_password_reset_code_service(email, reset_code_int)
+        is_valid = await run_supabase(verify_password_reset_code_service, email, reset_code_int)
         if is_valid:
             return {"status": "success", "data": {"valid": True}}
         else:
@@ -396,7 +414,7 @@ async def reset_password_root(request: Request):
         except ValueError:
             return {"status": "error", "message": "Invalid reset code format"}
         
-        result = reset_password_service(email, reset_code_int, new_password)
+        result = await run_supabase(reset_password_service, email, reset_code_int, new_password)
         if result.get("success"):
             return {"status": "success", "data": result}
         else:
@@ -430,7 +448,7 @@ async def update_profile_root(request: Request):
             updates["profile_image"] = profile_image
         
         # Use the new update_user_profile function to handle the update
-        result = update_user_profile(uid, updates)
+        result = await run_supabase(update_user_profile, uid, updates)
         
         if not result.get("success"):
             return {"status": "error", "message": result.get("message", "Failed to update profile")}
@@ -450,9 +468,16 @@ async def update_profile_root(request: Request):
         return {"status": "error", "message": f"An error occurred: {str(e)}"}
 
 
+def fetch_ticker_news_and_info(ticker: str):
+    """Blocking provider lookup of a ticker's latest news plus its quote info."""
+    print(f"Fetching news for ticker: {ticker}")
+    provider = get_provider()
+    return provider.get_news(ticker, count=5), provider.get_quote(ticker)
+
+
 @app.get("/api/market-news/latest")
 async def get_latest_market_news(limit: int = 10):
-    if yf is None:
+    if not market_data_available():
         print("ERROR: yfinance is not installed")
         return JSONResponse(
             status_code=500,
@@ -466,15 +491,20 @@ async def get_latest_market_news(limit: int = 10):
     popular_tickers = ['SPY', 'QQQ', 'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'NVDA', 'META']
     
     all_news = []
+
+    # Fetch every ticker concurrently on the Yahoo executor instead of one after another
+    fetched = await asyncio.gather(
+        *(run_yahoo(fetch_ticker_news_and_info, ticker) for ticker in popular_tickers),
+        return_exceptions=True,
+    )
     
-    for ticker in popular_tickers:
+    for ticker, result in zip(popular_tickers, fetched):
         try:
-            print(f"Fetching news for ticker: {ticker}")
-            ticker_obj = yf.Ticker(ticker)
-            news = ticker_obj.get_news(count=5, tab="all")
+            if isinstance(result, Exception):
+                raise result
+            news, ticker_info = result
 
             # Get ticker info for price data
-            ticker_info = ticker_obj.info
             current_price = ticker_info.get('regularMarketPrice', 0)
             change = ticker_info.get('regularMarketChange', 0)
             change_percent = ticker_info.get('regularMarketChangePercent', 0)
@@ -486,7 +516,7 @@ async def get_latest_market_news(limit: int = 10):
             
             for article in news:
                 content = article.get('content', {})
-                provider = content.get('provider', {})
+                publisher = content.get('provider', {})
                 pub_date = content.get("pubDate")
                 
                 publish_time = current_time
@@ -508,13 +538,13 @@ async def get_latest_market_news(limit: int = 10):
                 
                 all_news.append({
                     "title": content.get("title", "No title available"),
-                    "publisher": provider.get("displayName", "Unknown source"),
+                    "publisher": publisher.get("displayName", "Unknown source"),
                     "link": content.get("canonicalUrl", {}).get("url", "#"),
                     "publish_time": publish_time,
                     "published_at": datetime.fromtimestamp(publish_time).strftime('%Y-%m-%d %H:%M:%S'),
                     "type": content.get("type", "news"),
                     "ticker": ticker,
-                    "ticker_name": ticker_obj.info.get('shortName', ticker) if hasattr(ticker_obj, 'info') else ticker,
+                    "ticker_name": ticker_info.get('shortName', ticker) if ticker_info else ticker,
                     "price": f"${current_price:.2f}",
                     "change": f"{'+' if change >= 0 else '-'}{change:.2f}",
                     "changePercent": f"{'+' if change_percent >= 0 else '-'}{change_percent:.2f}%"
@@ -542,6 +572,14 @@ async def get_latest_market_news(limit: int = 10):
         "data": unique_news[:limit]
     }
 
+@app.get("/api/market-data/cache_stats")
+async def get_price_cache_stats():
+    return {"status": "success", "data": price_cache_stats()}
+
+@app.get("/api/market-data/calibration_cache_stats")
+async def get_calibration_cache_stats():
+    return {"status": "success", "data": calibration_cache_stats()}
+
 @app.post("/api/strategies/save")
 async def save_strategy_root(request: Request):
     try:
@@ -569,7 +607,8 @@ async def save_strategy_root(request: Request):
         if strategy_name:
             metadata["strategy_name"] = strategy_name
 
-        result = save_strategy(
+        result = await run_supabase(
+            save_strategy,
             user_id=user_id,
             ticker_name=ticker,
             strategy_type=strategy_type,
@@ -592,7 +631,7 @@ async def save_strategy_root(request: Request):
 @app.get("/api/strategies/user/{user_id}")
 async def get_user_strategies(user_id: str):
     try:
-        strategies = get_all_strategies_by_user(user_id)
+        strategies = await run_supabase(get_all_strategies_by_user, user_id)
         return {"status": "success", "data": strategies}
     except Exception as e:
         print(f"Error getting user strategies: {str(e)}")
@@ -602,7 +641,7 @@ async def get_user_strategies(user_id: str):
 @app.delete("/api/strategies/{strategy_id}")
 async def delete_strategy_root(strategy_id: str):
     try:
-        result = delete_strategy(strategy_id)
+        result = await run_supabase(delete_strategy, strategy_id)
         if result:
             return {"status": "success", "message": "Strategy deleted successfully"}
         else:
@@ -612,9 +651,8 @@ async def delete_strategy_root(strategy_id: str):
         return {"status": "error", "message": f"An error occurred: {str(e)}"}
 
 
-@app.post("/api/strategies/buy_hold")
-async def run_buy_and_hold(request: Request):
-    if yf is None:
+async def _run_strategy_endpoint(request: Request, strategy_type: str):
+    if not market_data_available():
         return JSONResponse(
             status_code=500,
             content={
@@ -628,116 +666,23 @@ async def run_buy_and_hold(request: Request):
     except Exception:
         return {"status": "error", "message": "Invalid JSON body"}
 
-    ticker = (payload.get("ticker") or "").upper().strip()
-    start_date = payload.get("start_date")
-    end_date = payload.get("end_date")
-    capital_raw = payload.get("capital")
-
-    try:
-        capital = float(capital_raw)
-    except (TypeError, ValueError):
-        return {"status": "error", "message": "Invalid capital amount"}
-
-    if not ticker or not start_date or not end_date:
-        return {"status": "error", "message": "Missing required fields"}
-
-    try:
-        start_dt = datetime.fromisoformat(start_date)
-        end_dt = datetime.fromisoformat(end_date)
-    except Exception:
-        return {
-            "status": "error",
-            "message": "Invalid date format. Use YYYY-MM-DD",
-        }
-
-    if start_dt >= end_dt:
-        return {"status": "error", "message": "Buy date must be before sell date"}
-
-    try:
-        hist = yf.download(
-            ticker,
-            start=start_dt.strftime("%Y-%m-%d"),
-            end=end_dt.strftime("%Y-%m-%d"),
-            progress=False,
-            auto_adjust=True,
-        )
-    except Exception as exc:
-        return {"status": "error", "message": f"Data fetch failed: {exc}"}
-
-    if hist is None or hist.empty:
-        return {
-            "status": "error",
-            "message": "No data returned for ticker/date range",
-        }
+    return await run_backtest_request(strategy_type, payload)
 
-    prices_series = None
-    if isinstance(hist.columns, pd.MultiIndex):
-        if ("Close", ticker) in hist.columns:
-            prices_series = hist[("Close", ticker)]
-        else:
-            close_candidates = [col for col in hist.columns if str(col[0]).lower() == "close"]
-            if close_candidates:
-                prices_series = hist[close_candidates[0]]
-    else:
-        if "Close" in hist.columns:
-            prices_series = hist["Close"]
-
-    if prices_series is None:
-        return {
-            "status": "error",
-            "message": "Unable to determine closing prices for ticker",
-        }
+@app.get("/api/strategies/indicator_cache_stats")
+async def get_indicator_cache_stats():
+    return {"status": "success", "data": indicator_cache_stats()}
 
-    if isinstance(prices_series, pd.DataFrame):
-        if prices_series.shape[1] == 1:
-            prices = prices_series.iloc[:, 0]
-        else:
-            return {
-                "status": "error",
-                "message": "Ambiguous closing price data returned",
-            }
-    else:
-        prices = prices_series
-
-    prices = prices.dropna()
-    if prices.empty:
-        return {"status": "error", "message": "No closing prices available"}
-
-    buy_price = float(prices.iloc[0])
-    sell_price = float(prices.iloc[-1])
-    shares = capital / buy_price if buy_price > 0 else 0.0
-
-    series: List[Dict[str, Any]] = []
-    for idx, price in prices.items():
-        value = float(price) * shares
-        date_str = idx.strftime("%Y-%m-%d") if hasattr(idx, "strftime") else str(idx)
-        series.append(
-            {
-                "date": date_str,
-                "price": float(price),
-                "value": round(value, 2),
-            }
-        )
-
-    final_value = shares * sell_price
-    total_return_pct = (
-        ((final_value - capital) / capital) * 100.0 if capital else 0.0
-    )
-
-    return {
-        "status": "success",
-        "data": {
-            "buy_price": round(buy_price, 4),
-            "sell_price": round(sell_price, 4),
-            "final_value": round(final_value, 2),
-            "total_return_pct": round(total_return_pct, 2),
-            "series": series,
-        },
-    }
+@app.post("/api/strategies/buy_hold")
+async def run_buy_and_hold(request: Request):
+    return await _run_strategy_endpoint(request, "buy_hold")
 
 @app.post("/api/strategies/simple_moving_average_crossover")
 async def run_simple_moving_average_crossover(request: Request):
-    if yf is None:
+    return await _run_strategy_endpoint(request, "simple_moving_average_crossover")
+
+@app.post("/api/strategies/simple_moving_average_crossover/sweep")
+async def run_simple_moving_average_crossover_sweep(request: Request):
+    if not market_data_available():
         return JSONResponse(
             status_code=500,
             content={
@@ -751,155 +696,11 @@ async def run_simple_moving_average_crossover(request: Request):
     except Exception:
         return {"status": "error", "message": "Invalid JSON body"}
 
-    ticker = (payload.get("ticker") or "").upper().strip()
-    start_date = payload.get("start_date")
-    end_date = payload.get("end_date")
-    capital_raw = payload.get("capital")
-    short_window = int(payload.get("short_window", 100)) #if value is not given, default value is 100
-    long_window = int(payload.get("long_window", 250)) #if value is not given, default value is 250
-
-    # Validate window sizes
-    if short_window >= long_window:
-        return {"status": "error", "message": "Short window must be less than long window"}
-    if short_window <= 0 or long_window <= 0:
-        return {"status": "error", "message": "Window sizes must be positive integers"}
-
-    try:
-        capital = float(capital_raw)
-    except (TypeError, ValueError):
-        return {"status": "error", "message": "Invalid capital amount"}
-
-    if not ticker or not start_date or not end_date:
-        return {"status": "error", "message": "Missing required fields"}
-
-    try:
-        start_dt = datetime.fromisoformat(start_date)
-        end_dt = datetime.fromisoformat(end_date)
-    except Exception:
-        return {
-            "status": "error",
-            "message": "Invalid date format. Use YYYY-MM-DD",
-        }
-
-    if start_dt >= end_dt:
-        return {"status": "error", "message": "Start date must be before end date"}
-
-    try:
-        hist = yf.download(
-            ticker,
-            start=start_dt.strftime("%Y-%m-%d"),
-            end=end_dt.strftime("%Y-%m-%d"),
-            progress=False,
-            auto_adjust=True,
-        )
-    except Exception as exc:
-        return {"status": "error", "message": f"Data fetch failed: {exc}"}
-
-    if hist is None or hist.empty:
-        return {
-            "status": "error",
-            "message": "No data returned for ticker/date range",
-        }
-
-    prices_series = None
-    if isinstance(hist.columns, pd.MultiIndex):
-        if ("Close", ticker) in hist.columns:
-            prices_series = hist[("Close", ticker)]
-        else:
-            close_candidates = [col for col in hist.columns if str(col[0]).lower() == "close"]
-            if close_candidates:
-                prices_series = hist[close_candidates[0]]
-    else:
-        if "Close" in hist.columns:
-            prices_series = hist["Close"]
-
-    if prices_series is None:
-        return {
-            "status": "error",
-            "message": "Unable to determine closing prices for ticker",
-        }
-
-    if isinstance(prices_series, pd.DataFrame):
-        if prices_series.shape[1] == 1:
-            prices = prices_series.iloc[:, 0]
-        else:
-            return {
-                "status": "error",
-                "message": "Ambiguous closing price data returned",
-            }
-    else:
-        prices = prices_series
-
-    prices = prices.dropna()
-    if prices.empty:
-        return {"status": "error", "message": "No closing prices available"}
-
-    # Validate data length
-    if len(prices) < long_window:
-        return {
-            "status": "error",
-            "message": f"Insufficient data: need at least {long_window} trading days, got {len(prices)}",
-        }
-
-    short_moving_average = prices.rolling(window=short_window).mean()
-    long_moving_average = prices.rolling(window=long_window).mean()
-
-    signal = (short_moving_average > long_moving_average).astype(int)
-    signal_shifted = signal.shift(1).fillna(0)
-
-    daily_returns = prices.pct_change().fillna(0)
-    strategy_returns = daily_returns * signal_shifted
-
-    equity_curve = (1 + strategy_returns).cumprod() * capital
-
-    series = []
-    for idx, price in prices.items():
-        if hasattr(idx, "strftime"):
-            date_str = idx.strftime("%Y-%m-%d")
-        else:
-            date_str = str(idx)
-        if not pd.isna(short_moving_average.loc[idx]):
-            ma_short = short_moving_average.loc[idx]
-        else:
-            ma_short = None
-        if not pd.isna(long_moving_average.loc[idx]):
-            ma_long = long_moving_average.loc[idx]
-        else:
-            ma_long = None
-
-        # Use signal_shifted to reflect the actual position used for returns
-        signal_val = int(signal_shifted.loc[idx])
-        equity_val = round(equity_curve.loc[idx], 2)
-        series.append(
-            {
-                "date": date_str,
-                "price": float(price),
-                "short_ma": float(ma_short) if ma_short is not None else None,
-                "long_ma": float(ma_long) if ma_long is not None else None,
-                "signal": signal_val,
-                "value": equity_val,
-            }
-        )
-
-    final_value = float(equity_curve.iloc[-1])
-    total_return_pct = (
-        ((final_value - capital) / capital) * 100.0 if capital else 0.0
-    )
+    return await run_sma_sweep_request(payload)
 
-    return {
-        "status": "success",
-        "data": {
-            "short_window": short_window,
-            "long_window": long_window,
-            "final_value": round(final_value, 2),
-            "total_return_pct": round(total_return_pct, 2),
-            "series": series,
-        },
-    }
-
-@app.post("/api/strategies/dca")
-async def run_dollar_cost_average(request: Request):
-    if yf is None:
+@app.post("/api/strategies/batch")
+async def run_strategy_batch(request: Request):
+    if not market_data_available():
         return JSONResponse(
             status_code=500,
             content={
@@ -913,142 +714,11 @@ async def run_dollar_cost_average(request: Request):
     except Exception:
         return {"status": "error", "message": "Invalid JSON body"}
 
-    ticker = (payload.get("ticker") or "").upper().strip()
-    start_date = payload.get("start_date")
-    end_date = payload.get("end_date")
-    capital_raw = payload.get("capital")
-    frequency = (payload.get("frequency") or "monthly").lower()
-    contribution_raw = payload.get("contribution")
-
-    try:
-        capital = float(capital_raw)
-        if capital <= 0:
-            raise ValueError
-    except Exception:
-        return {"status": "error", "message": "Invalid capital amount"}
-
-    contribution = None
-    if contribution_raw is not None:
-        try:
-            contribution = float(contribution_raw)
-            if contribution <= 0:
-                raise ValueError
-        except Exception:
-            return {"status": "error", "message": "Invalid contribution amount"}
-
-    if not ticker or not start_date or not end_date:
-        return {"status": "error", "message": "Missing required fields"}
-
-    try:
-        start_dt = datetime.fromisoformat(start_date)
-        end_dt = datetime.fromisoformat(end_date)
-    except Exception:
-        return {
-            "status": "error",
-            "message": "Invalid date format. Use YYYY-MM-DD",
-        }
-
-    if start_dt >= end_dt:
-        return {"status": "error", "message": "Buy date must be before sell date"}
-
-    try:
-        hist = yf.download(
-            ticker,
-            start=start_dt.strftime("%Y-%m-%d"),
-            end=end_dt.strftime("%Y-%m-%d"),
-            progress=False,
-            auto_adjust=True,
-        )
-    except Exception as e:
-        return {"status": "error", "message": f"Data fetch failed: {e}"}
-
-    if hist is None or hist.empty:
-        return {"status": "error", "message": "No data returned for ticker/date range"}
+    return await run_batch_backtest_request(payload)
 
-    prices = hist["Close"]
-    if isinstance(prices, pd.DataFrame):
-        prices = prices.iloc[:, 0]
-    prices = prices.dropna()
-
-    if prices.empty:
-        return {"status": "error", "message": "No closing price data available"}
-
-    if frequency == "weekly":
-        buy_dates = pd.date_range(start_dt, end_dt, freq="W")
-    elif frequency == "biweekly":
-        buy_dates = pd.date_range(start_dt, end_dt, freq="2W")
-    elif frequency == "monthly":
-        buy_dates = pd.date_range(start_dt, end_dt, freq="M")
-    else:
-        return {"status": "error", "message": "Invalid frequency."}
-
-    trading_days = prices.index
-
-    mapped_buy_dates = []
-    for d in buy_dates:
-        valid_days = trading_days[trading_days <= d]
-        if len(valid_days) > 0:
-            mapped_buy_dates.append(valid_days[-1])
-
-    buy_dates = list(dict.fromkeys(mapped_buy_dates))
-
-    if not buy_dates:
-        return {"status": "error", "message": "No valid DCA buy dates available in price data"}
-
-
-    if contribution is None:
-        contribution = capital / len(buy_dates)
-
-    total_contributed = 0.0
-    total_shares = 0.0
-
-    equity_curve = []
-    series = []
-
-    for date, price in prices.items():
-        if hasattr(date, "strftime"):
-            date_str = date.strftime("%Y-%m-%d")
-        else:
-            date_str = str(date)
-
-        if date in buy_dates and total_contributed < capital:
-            amount = min(contribution, capital - total_contributed)
-            shares_bought = amount / price
-            total_shares += shares_bought
-            total_contributed += amount
-
-        portfolio_value = total_shares * price
-
-        series.append({
-            "date": date_str,
-            "price": float(price),
-            "shares": float(total_shares),
-            "contributed": round(total_contributed, 2),
-            "value": round(portfolio_value, 2),
-            "signal": 1 if date in buy_dates else 0,
-        })
-
-    final_value = series[-1]["value"]
-    if total_contributed > 0:
-        total_return_pct = ((final_value - total_contributed) / total_contributed * 100)
-    else:
-        total_contributed = 0
-
-    return {
-        "status": "success",
-        "data": {
-            "frequency": frequency,
-            "contribution": round(contribution, 2),
-            "total_contributed": round(total_contributed, 2),
-            "final_value": round(final_value, 2),
-            "total_return_pct": round(total_return_pct, 2),
-            "series": series,
-        },
-    }
-
-@app.post("/api/strategies/value_averaging")
-async def run_value_averaging(request: Request):
-    if yf is None:
+@app.post("/api/strategies/walk_forward")
+async def run_strategy_walk_forward(request: Request):
+    if not market_data_available():
         return JSONResponse(
             status_code=500,
             content={
@@ -1062,172 +732,19 @@ async def run_value_averaging(request: Request):
     except Exception:
         return {"status": "error", "message": "Invalid JSON body"}
 
-    ticker = (payload.get("ticker") or "").upper().strip()
-    start_date = payload.get("start_date")
-    end_date = payload.get("end_date")
-    capital_raw = payload.get("capital")
-    frequency = (payload.get("frequency") or "monthly").lower()
-    target_growth_rate_raw = payload.get("target_growth_rate")
-
-    try:
-        capital = float(capital_raw)
-        if capital <= 0:
-            raise ValueError
-    except Exception:
-        return {"status": "error", "message": "Invalid capital amount"}
-
-    target_growth_rate = None
-    if target_growth_rate_raw is not None:
-        try:
-            target_growth_rate = float(target_growth_rate_raw) / 100.0  # Convert percentage to decimal
-            if target_growth_rate < 0:
-                raise ValueError
-        except Exception:
-            return {"status": "error", "message": "Invalid target growth rate"}
-
-    if not ticker or not start_date or not end_date:
-        return {"status": "error", "message": "Missing required fields"}
-
-    try:
-        start_dt = datetime.fromisoformat(start_date)
-        end_dt = datetime.fromisoformat(end_date)
-    except Exception:
-        return {
-            "status": "error",
-            "message": "Invalid date format. Use YYYY-MM-DD",
-        }
-
-    if start_dt >= end_dt:
-        return {"status": "error", "message": "Buy date must be before sell date"}
-
-    try:
-        hist = yf.download(
-            ticker,
-            start=start_dt.strftime("%Y-%m-%d"),
-            end=end_dt.strftime("%Y-%m-%d"),
-            progress=False,
-            auto_adjust=True,
-        )
-    except Exception as e:
-        return {"status": "error", "message": f"Data fetch failed: {e}"}
-
-    if hist is None or hist.empty:
-        return {"status": "error", "message": "No data returned for ticker/date range"}
-
-    prices = hist["Close"]
-    if isinstance(prices, pd.DataFrame):
-        prices = prices.iloc[:, 0]
-    prices = prices.dropna()
-
-    if prices.empty:
-        return {"status": "error", "message": "No closing price data available"}
-
-    if frequency == "weekly":
-        buy_dates = pd.date_range(start_dt, end_dt, freq="W")
-    elif frequency == "biweekly":
-        buy_dates = pd.date_range(start_dt, end_dt, freq="2W")
-    elif frequency == "monthly":
-        buy_dates = pd.date_range(start_dt, end_dt, freq="M")
-    else:
-        return {"status": "error", "message": "Invalid frequency."}
-
-    trading_days = prices.index
-
-    mapped_buy_dates = []
-    for d in buy_dates:
-        valid_days = trading_days[trading_days <= d]
-        if len(valid_days) > 0:
-            mapped_buy_dates.append(valid_days[-1])
-
-    buy_dates = list(dict.fromkeys(mapped_buy_dates))
-
-    if not buy_dates:
-        return {"status": "error", "message": "No valid value averaging buy dates available in price data"}
-
-    # Default target growth rate: distribute capital evenly if not specified
-    if target_growth_rate is None:
-        # Calculate growth rate that would use all capital evenly
-        num_periods = len(buy_dates)
-        if num_periods > 1:
-            target_growth_rate = 0.01  # 1% default growth per period
-        else:
-            target_growth_rate = 0.0
-
-    # Initialize value averaging
-    total_shares = 0.0
-    total_contributed = 0.0
-    initial_target = capital / len(buy_dates) if len(buy_dates) > 0 else capital
-    current_period = 0
-
-    series = []
-
-    for date, price in prices.items():
-        if hasattr(date, "strftime"):
-            date_str = date.strftime("%Y-%m-%d")
-        else:
-            date_str = str(date)
-
-        current_portfolio_value = total_shares * price
-
-        # Check if this is a buy date
-        if date in buy_dates:
-            # Calculate target value for this period
-            if current_period == 0:
-                target_value = initial_target
-            else:
-                target_value = initial_target * ((1 + target_growth_rate) ** current_period)
-
-            # Calculate how much we need to invest or sell
-            difference = target_value - current_portfolio_value
-
-            if difference > 0:
-                # Need to invest more
-                # Only invest if we have capital left
-                available_capital = capital - total_contributed
-                investment_amount = min(difference, available_capital)
-                
-                if investment_amount > 0:
-                    shares_bought = investment_amount / price
-                    total_shares += shares_bought
-                    total_contributed += investment_amount
-
-            # Note: We don't sell if above target in this implementation
-            # (value averaging typically allows selling, but we'll keep it simple)
-
-            current_period += 1
-
-        # Update portfolio value after any trades
-        portfolio_value = total_shares * price
-
-        series.append({
-            "date": date_str,
-            "price": float(price),
-            "value": round(portfolio_value, 2),
-            "shares": round(total_shares, 6),
-            "contributed": round(total_contributed, 2),
-        })
+    return await run_walk_forward_request(payload)
 
-    final_value = series[-1]["value"]
-    if total_contributed > 0:
-        total_return_pct = ((final_value - total_contributed) / total_contributed * 100)
-    else:
-        total_return_pct = 0.0
+@app.post("/api/strategies/dca")
+async def run_dollar_cost_average(request: Request):
+    return await _run_strategy_endpoint(request, "dca")
 
-    return {
-        "status": "success",
-        "data": {
-            "frequency": frequency,
-            "target_growth_rate": round(target_growth_rate * 100, 2) if target_growth_rate else None,
-            "total_contributed": round(total_contributed, 2),
-            "final_value": round(final_value, 2),
-            "total_return_pct": round(total_return_pct, 2),
-            "series": series,
-        },
-    }
+@app.post("/api/strategies/value_averaging")
+async def run_value_averaging(request: Request):
+    return await _run_strategy_endpoint(request, "value_averaging")
 
 @app.get("/api/ticker/{ticker}/news")
 async def get_ticker_news(ticker: str):
-    if yf is None:
+    if not market_data_available():
         print("ERROR: yfinance is not installed")
         return JSONResponse(
             status_code=500,
@@ -1243,18 +760,16 @@ async def get_ticker_news(ticker: str):
 
     try:
         print(f"Fetching news for ticker: {ticker_upper}")
-        ticker_obj = yf.Ticker(ticker_upper)
-        
-        print(f"Ticker info available: {hasattr(ticker_obj, 'info')}")
+        provider = get_provider()
         
-        news = ticker_obj.get_news(count=5, tab="all")
+        news = await run_yahoo(provider.get_news, ticker_upper, count=5)
         print(f"Raw news data: {news}")
         
         if not news:
             print(f"No news found for {ticker_upper}")
             try:
                 print("Trying alternative news fetch method...")
-                hist = ticker_obj.history(period="1d")
+                hist = await run_yahoo(provider.get_bars, ticker_upper, period="1d")
                 if hist.empty:
                     print("No historical data available")
                 else:
@@ -1268,7 +783,7 @@ async def get_ticker_news(ticker: str):
         current_time = int(time.time())
         for article in news:
             content = article.get('content', {})
-            provider = content.get('provider', {})
+            publisher = content.get('provider', {})
             pub_date = content.get("pubDate")
             
             publish_time = current_time
@@ -1290,7 +805,7 @@ async def get_ticker_news(ticker: str):
                 
             formatted_news.append({
                 "title": content.get("title", "No title available"),
-                "publisher": provider.get("displayName", "Unknown source"),
+                "publisher": publisher.get("displayName", "Unknown source"),
                 "link": content.get("canonicalUrl", {}).get("url", "#"),
                 "publish_time": publish_time,
                 "published_at": datetime.fromtimestamp(publish_time).strftime('%Y-%m-%d %H:%M:%S'),
@@ -1317,7 +832,7 @@ async def get_drag_and_drop_root(request: Request):
     
     try:
         import json
-        dragAndDropInfo = get_drag_and_drop(level, lesson)
+        dragAndDropInfo = await run_supabase(get_drag_and_drop, level, lesson)
         
         if not dragAndDropInfo:
             print(f"No drag and drop found for level {level}, lesson {lesson}")
@@ -1342,7 +857,7 @@ async def get_drag_and_drop_root(request: Request):
 
 @app.get("/api/ticker/{ticker}/history")
 async def get_ticker_history(ticker: str, period: str = "1mo", interval: str = "1d"):
-    if yf is None:
+    if not market_data_available():
         return JSONResponse(
             status_code=500,
             content={
@@ -1356,8 +871,7 @@ async def get_ticker_history(ticker: str, period: str = "1mo", interval: str = "
         return {"status": "error", "message": "Invalid ticker"}
 
     try:
-        ticker_obj = yf.Ticker(ticker_upper)
-        hist = ticker_obj.history(period=period, interval=interval)
+        hist = await run_yahoo(get_provider().get_bars, ticker_upper, interval=interval, period=period)
         
         if hist is None or hist.empty:
             return {"status": "error", "message": "No historical data available"}
@@ -1385,7 +899,12 @@ async def get_ticker_history(ticker: str, period: str = "1mo", interval: str = "
 
 @app.post("/api/strategies/buy_hold_markers")
 async def run_buy_and_hold_markers(request: Request):
-    if yf is None:
+    return await _run_strategy_endpoint(request, "buy_hold_markers")
+
+@app.post("/api/montecarlo/run")
+async def run_monte_carlo(request: Request):
+    """Run Monte Carlo simulation on a saved strategy."""
+    if not market_data_available():
         return JSONResponse(
             status_code=500,
             content={
@@ -1393,357 +912,45 @@ async def run_buy_and_hold_markers(request: Request):
                 "message": "Server missing yfinance. Install backend requirements.",
             },
         )
-
+    
     try:
         payload = await request.json()
     except Exception:
         return {"status": "error", "message": "Invalid JSON body"}
+    
+    return await run_monte_carlo_request(payload)
 
-    ticker = (payload.get("ticker") or "").upper().strip()
-    start_date = payload.get("start_date")
-    end_date = payload.get("end_date")
-    capital = float(payload.get("capital", 1000))
-    commission_dollars = float(payload.get("commission_dollars", 0))
-    position_percent = float(payload.get("position_percent", 100))
-
-    if not ticker or not start_date or not end_date:
-        return {"status": "error", "message": "Missing required fields"}
-
+@app.post("/api/montecarlo/compare")
+async def compare_monte_carlo(request: Request):
+    """Run several saved strategies on the same ticker against one shared set of simulated paths."""
+    if not market_data_available():
+        return JSONResponse(
+            status_code=500,
+            content={
+                "status": "error",
+                "message": "Server missing yfinance. Install backend requirements.",
+            },
+        )
+    
     try:
-        start_dt = datetime.fromisoformat(start_date)
-        end_dt = datetime.fromisoformat(end_date)
+        payload = await request.json()
     except Exception:
-        return {"status": "error", "message": "Invalid date format. Use YYYY-MM-DD"}
-
-    if start_dt >= end_dt:
-        return {"status": "error", "message": "Buy date must be before sell date"}
-
-    try:
-        hist = yf.download(
-            ticker,
-            start=start_dt.strftime("%Y-%m-%d"),
-            end=end_dt.strftime("%Y-%m-%d"),
-            progress=False,
-            auto_adjust=True,
-        )
-    except Exception as e:
-        return {"status": "error", "message": f"Data fetch failed: {e}"}
-
-    if hist is None or hist.empty:
-        return {"status": "error", "message": "No data returned for ticker/date range"}
-
-    if isinstance(hist.columns, pd.MultiIndex):
-        possible = [c for c in hist.columns if c[0].lower() == "close"]
-        if not possible:
-            return {"status": "error", "message": "Unable to find closing prices (multi-index)"}
-        prices = hist[possible[0]]
-    else:
-        if "Close" not in hist.columns:
-            return {"status": "error", "message": "Unable to find closing prices"}
-        prices = hist["Close"]
-
-    prices = prices.dropna()
-    if prices.empty:
-        return {"status": "error", "message": "No valid closing prices"}
-
-    buy_price = float(payload.get("entry_price")) if payload.get("entry_price") else float(prices.iloc[0])
-    sell_price = float(payload.get("exit_price")) if payload.get("exit_price") else float(prices.iloc[-1])
-
-    position_capital = capital * (position_percent / 100.0)
-
-    shares = position_capital / buy_price if buy_price > 0 else 0.0
-
-    gross_value = shares * sell_price
-    gross_pl = gross_value - position_capital
-
-    total_trading_costs = commission_dollars * 2
-    net_pl = gross_pl - total_trading_costs
-    final_value = position_capital + net_pl     
-
-    total_return_pct = ((final_value - position_capital) / position_capital) * 100.0 if position_capital > 0 else 0.0
-
-    series = []
-    first_price = prices.iloc[0]
-    last_price = prices.iloc[-1]
-
-    for idx, price in prices.items():
-        series.append({
-            "date": idx.strftime("%Y-%m-%d"),
-            "price": float(price),
-            "value": round(float(price) * shares, 2),
-            "is_entry": bool(price == first_price),
-            "is_exit": bool(price == last_price),
-            "shares": float(shares),
-        })
-
-    return {
-        "status": "success",
-        "data": {
-            "buy_price": round(buy_price, 4),
-            "sell_price": round(sell_price, 4),
-            "final_value": round(final_value, 2),
-            "total_return_pct": round(total_return_pct, 2),
-            "shares": round(shares, 6),
-            "commission_dollars": round(commission_dollars, 2),
-            "position_percent": round(position_percent, 2),
-            "trading_costs": round(total_trading_costs, 2),
-            "series": series,
-        },
-    }
+        return {"status": "error", "message": "Invalid JSON body"}
+    
+    return await run_monte_carlo_comparison(payload)
 
-# ============================================================================
-# Monte Carlo Simulation Module
-# ============================================================================
+@app.get("/api/montecarlo/cache_stats")
+async def get_monte_carlo_cache_stats():
+    return {"status": "success", "data": monte_carlo_cache_stats()}
 
-def extract_prices_from_hist(hist, ticker: str):
-    """Extract price series from yfinance DataFrame."""
-    prices_series = None
-    if isinstance(hist.columns, pd.MultiIndex):
-        if ("Close", ticker) in hist.columns:
-            prices_series = hist[("Close", ticker)]
-        else:
-            close_candidates = [col for col in hist.columns if str(col[0]).lower() == "close"]
-            if close_candidates:
-                prices_series = hist[close_candidates[0]]
-    else:
-        if "Close" in hist.columns:
-            prices_series = hist["Close"]
-    
-    if prices_series is None:
-        return None
-    
-    if isinstance(prices_series, pd.DataFrame):
-        if prices_series.shape[1] == 1:
-            prices = prices_series.iloc[:, 0]
-        else:
-            return None
-    else:
-        prices = prices_series
-    
-    prices = prices.dropna()
-    return prices if not prices.empty else None
-
-def generate_bootstrap_path(returns: pd.Series, horizon_days: int, initial_price: float) -> pd.Series:
-    """Generate a synthetic price path by bootstrapping historical returns."""
-    returns_array = returns.values
-    if len(returns_array) == 0:
-        return None
-    
-    # Sample returns with replacement
-    sampled_returns = np.random.choice(returns_array, size=horizon_days, replace=True)
-    
-    # Generate price path
-    prices = [initial_price]
-    for ret in sampled_returns:
-        prices.append(prices[-1] * (1 + ret))
-    
-    # Create date index (use business days)
-    dates = pd.date_range(start=pd.Timestamp.now().normalize(), periods=horizon_days + 1, freq='B')
-    return pd.Series(prices, index=dates[:len(prices)])
-
-def generate_forward_sim_path(returns: pd.Series, horizon_days: int, initial_price: float) -> pd.Series:
-    """Generate a forward simulation path using estimated return distribution."""
-    returns_array = returns.values
-    if len(returns_array) == 0:
-        return None
-    
-    # Estimate distribution parameters
-    mean_return = np.mean(returns_array)
-    std_return = np.std(returns_array)
-    
-    # Generate random returns from normal distribution
-    sampled_returns = np.random.normal(mean_return, std_return, size=horizon_days)
-    
-    # Generate price path
-    prices = [initial_price]
-    for ret in sampled_returns:
-        prices.append(prices[-1] * (1 + ret))
-    
-    # Create date index (use business days)
-    dates = pd.date_range(start=pd.Timestamp.now().normalize(), periods=horizon_days + 1, freq='B')
-    return pd.Series(prices, index=dates[:len(prices)])
-
-def run_sma_crossover_on_prices(
-    prices: pd.Series,
-    capital: float,
-    short_window: int,
-    long_window: int
-) -> float:
-    """Run SMA crossover strategy on a custom price series. Returns final capital."""
-    if len(prices) < long_window:
-        return capital
-    
-    short_moving_average = prices.rolling(window=short_window).mean()
-    long_moving_average = prices.rolling(window=long_window).mean()
-    
-    signal = (short_moving_average > long_moving_average).astype(int)
-    signal_shifted = signal.shift(1).fillna(0)
-    
-    daily_returns = prices.pct_change().fillna(0)
-    strategy_returns = daily_returns * signal_shifted
-    
-    equity_curve = (1 + strategy_returns).cumprod() * capital
-    return float(equity_curve.iloc[-1])
-
-def run_dca_on_prices(
-    prices: pd.Series,
-    capital: float,
-    frequency: str,
-    contribution: float = None
-) -> float:
-    """Run DCA strategy on a custom price series. Returns final capital."""
-    if prices.empty:
-        return capital
-    
-    # Determine buy dates based on frequency
-    start_date = prices.index[0]
-    end_date = prices.index[-1]
-    
-    if frequency == "weekly":
-        buy_dates = pd.date_range(start_date, end_date, freq="W")
-    elif frequency == "biweekly":
-        buy_dates = pd.date_range(start_date, end_date, freq="2W")
-    elif frequency == "monthly":
-        buy_dates = pd.date_range(start_date, end_date, freq="M")
-    else:
-        return capital
-    
-    trading_days = prices.index
-    mapped_buy_dates = []
-    for d in buy_dates:
-        valid_days = trading_days[trading_days <= d]
-        if len(valid_days) > 0:
-            mapped_buy_dates.append(valid_days[-1])
-    
-    buy_dates = list(dict.fromkeys(mapped_buy_dates))
-    if not buy_dates:
-        return capital
-    
-    if contribution is None:
-        contribution = capital / len(buy_dates)
-    
-    total_contributed = 0.0
-    total_shares = 0.0
-    
-    for date, price in prices.items():
-        if date in buy_dates and total_contributed < capital:
-            amount = min(contribution, capital - total_contributed)
-            shares_bought = amount / price
-            total_shares += shares_bought
-            total_contributed += amount
-    
-    final_price = prices.iloc[-1]
-    portfolio_value = total_shares * final_price
-    return float(portfolio_value)
-
-def run_value_averaging_on_prices(
-    prices: pd.Series,
-    capital: float,
-    frequency: str,
-    target_growth_rate: float = None
-) -> float:
-    """Run Value Averaging strategy on a custom price series. Returns final capital."""
-    if prices.empty:
-        return capital
-    
-    # Determine buy dates based on frequency
-    start_date = prices.index[0]
-    end_date = prices.index[-1]
-    
-    if frequency == "weekly":
-        buy_dates = pd.date_range(start_date, end_date, freq="W")
-    elif frequency == "biweekly":
-        buy_dates = pd.date_range(start_date, end_date, freq="2W")
-    elif frequency == "monthly":
-        buy_dates = pd.date_range(start_date, end_date, freq="M")
-    else:
-        return capital
-    
-    trading_days = prices.index
-    mapped_buy_dates = []
-    for d in buy_dates:
-        valid_days = trading_days[trading_days <= d]
-        if len(valid_days) > 0:
-            mapped_buy_dates.append(valid_days[-1])
-    
-    buy_dates = list(dict.fromkeys(mapped_buy_dates))
-    if not buy_dates:
-        return capital
-    
-    # Default target growth rate
-    if target_growth_rate is None:
-        num_periods = len(buy_dates)
-        if num_periods > 1:
-            target_growth_rate = 0.01  # 1% default growth per period
-        else:
-            target_growth_rate = 0.0
-    
-    # Initialize value averaging
-    total_shares = 0.0
-    total_contributed = 0.0
-    initial_target = capital / len(buy_dates) if len(buy_dates) > 0 else capital
-    current_period = 0
-    
-    for date, price in prices.items():
-        current_portfolio_value = total_shares * price
-        
-        # Check if this is a buy date
-        if date in buy_dates:
-            # Calculate target value for this period
-            if current_period == 0:
-                target_value = initial_target
-            else:
-                target_value = initial_target * ((1 + target_growth_rate) ** current_period)
-            
-            # Calculate how much we need to invest
-            difference = target_value - current_portfolio_value
-            
-            if difference > 0:
-                # Need to invest more
-                available_capital = capital - total_contributed
-                investment_amount = min(difference, available_capital)
-                
-                if investment_amount > 0:
-                    shares_bought = investment_amount / price
-                    total_shares += shares_bought
-                    total_contributed += investment_amount
-            
-            current_period += 1
-    
-    final_price = prices.iloc[-1]
-    portfolio_value = total_shares * final_price
-    return float(portfolio_value)
-
-def run_buy_hold_advanced_on_prices(
-    prices: pd.Series,
-    capital: float,
-    entry_price: float = None,
-    exit_price: float = None,
-    position_percent: float = 100.0,
-    commission_dollars: float = 0.0
-) -> float:
-    """Run Buy & Hold Advanced strategy on a custom price series. Returns final capital."""
-    if prices.empty:
-        return capital
-    
-    buy_price = entry_price if entry_price else float(prices.iloc[0])
-    sell_price = exit_price if exit_price else float(prices.iloc[-1])
-    
-    position_capital = capital * (position_percent / 100.0)
-    shares = position_capital / buy_price if buy_price > 0 else 0.0
-    
-    gross_value = shares * sell_price
-    gross_pl = gross_value - position_capital
-    total_trading_costs = commission_dollars * 2
-    net_pl = gross_pl - total_trading_costs
-    final_value = position_capital + net_pl
-    
-    return float(final_value)
+@app.get("/api/montecarlo/memory_stats")
+async def get_monte_carlo_memory_stats():
+    return {"status": "success", "data": monte_carlo_memory_stats()}
 
-@app.post("/api/montecarlo/run")
-async def run_monte_carlo(request: Request):
-    """Run Monte Carlo simulation on a saved strategy."""
-    if yf is None:
+@app.post("/api/montecarlo/jobs")
+async def submit_monte_carlo_job(request: Request):
+    """Queue a Monte Carlo run in the background and return its job id."""
+    if not market_data_available():
         return JSONResponse(
             status_code=500,
             content={
@@ -1751,226 +958,44 @@ async def run_monte_carlo(request: Request):
                 "message": "Server missing yfinance. Install backend requirements.",
             },
         )
-    
+
     try:
         payload = await request.json()
     except Exception:
         return {"status": "error", "message": "Invalid JSON body"}
-    
-    strategy_id = payload.get("strategy_id")
-    user_id = payload.get("user_id")  # Optional, but recommended for security
-    mode = payload.get("mode")  # "historical_bootstrap" or "forward_sim"
-    horizon_days = payload.get("horizon_days")
-    horizon_years = payload.get("horizon_years")
-    num_simulations = payload.get("num_simulations", 1000)
-    
-    if not strategy_id:
+    if not payload.get("strategy_id"):
         return {"status": "error", "message": "Missing strategy_id"}
-    if mode not in ["historical_bootstrap", "forward_sim"]:
-        return {"status": "error", "message": "Invalid mode. Must be 'historical_bootstrap' or 'forward_sim'"}
-    if not horizon_days and not horizon_years:
-        return {"status": "error", "message": "Must provide either horizon_days or horizon_years"}
-    if num_simulations < 1 or num_simulations > 10000:
-        return {"status": "error", "message": "num_simulations must be between 1 and 10000"}
-    
-    # Convert years to days if needed (approximate 252 trading days per year)
-    if horizon_years:
-        horizon_days = int(horizon_years * 252)
-    
-    # Load strategy from database with user ownership validation
-    # This ensures users can only run MC on their own strategies
-    strategy = get_strategy_by_id(strategy_id, user_id)
-    if not strategy:
-        return {"status": "error", "message": "Strategy not found or access denied"}
-    
-    strategy_type = strategy.get("strategy_type")
-    ticker = strategy.get("ticker_name")
-    capital = float(strategy.get("money_invested", 1000))
-    start_date = strategy.get("start_date")
-    end_date = strategy.get("end_date")
-    metadata_raw = strategy.get("metadata", {})
-    
-    # Handle metadata - could be dict or JSON string
-    import json
-    if isinstance(metadata_raw, str):
-        try:
-            metadata = json.loads(metadata_raw)
-        except (json.JSONDecodeError, TypeError):
-            metadata = {}
-    elif isinstance(metadata_raw, dict):
-        metadata = metadata_raw
-    else:
-        metadata = {}
-    
-    # Check if strategy is eligible for Monte Carlo
-    eligible_types = ["simple_moving_average_crossover", "dca", "buy_hold_markers", "value_averaging"]
-    if strategy_type not in eligible_types:
-        return {
-            "status": "error",
-            "message": f"Strategy type '{strategy_type}' is not eligible for Monte Carlo simulation"
-        }
-    
-    # Fetch historical data for calibration
+
     try:
-        start_dt = datetime.fromisoformat(start_date) if isinstance(start_date, str) else start_date
-        end_dt = datetime.fromisoformat(end_date) if isinstance(end_date, str) else end_date
-        
-        # For forward_sim, use recent data (last 5 years or available)
-        if mode == "forward_sim":
-            # Get most recent price and recent historical data
-            recent_end = datetime.now()
-            recent_start = recent_end - pd.Timedelta(days=5*365)
-            hist_calibration = yf.download(
-                ticker,
-                start=recent_start.strftime("%Y-%m-%d"),
-                end=recent_end.strftime("%Y-%m-%d"),
-                progress=False,
-                auto_adjust=True,
-            )
-        else:
-            # For historical_bootstrap, use the strategy's date range or fallback to 5 years
-            if start_dt and end_dt:
-                hist_calibration = yf.download(
-                    ticker,
-                    start=start_dt.strftime("%Y-%m-%d") if hasattr(start_dt, 'strftime') else str(start_dt),
-                    end=end_dt.strftime("%Y-%m-%d") if hasattr(end_dt, 'strftime') else str(end_dt),
-                    progress=False,
-                    auto_adjust=True,
-                )
-            else:
-                # Fallback to 5 years
-                recent_end = datetime.now()
-                recent_start = recent_end - pd.Timedelta(days=5*365)
-                hist_calibration = yf.download(
-                    ticker,
-                    start=recent_start.strftime("%Y-%m-%d"),
-                    end=recent_end.strftime("%Y-%m-%d"),
-                    progress=False,
-                    auto_adjust=True,
-                )
-    except Exception as exc:
-        return {"status": "error", "message": f"Data fetch failed: {exc}"}
-    
-    if hist_calibration is None or hist_calibration.empty:
-        return {"status": "error", "message": "No calibration data available"}
-    
-    prices_calibration = extract_prices_from_hist(hist_calibration, ticker)
-    if prices_calibration is None or len(prices_calibration) < 10:
-        return {"status": "error", "message": "Insufficient calibration data"}
-    
-    # Calculate returns
-    returns = prices_calibration.pct_change().dropna()
-    if len(returns) == 0:
-        return {"status": "error", "message": "No valid returns calculated"}
-    
-    # Get initial price for simulation
-    if mode == "forward_sim":
-        initial_price = float(prices_calibration.iloc[-1])  # Most recent price
-    else:
-        initial_price = float(prices_calibration.iloc[0])  # Start of calibration period
-    
-    # Run simulations
-    final_capitals = []
-    
-    for _ in range(num_simulations):
-        if mode == "historical_bootstrap":
-            synthetic_prices = generate_bootstrap_path(returns, horizon_days, initial_price)
-        else:  # forward_sim
-            synthetic_prices = generate_forward_sim_path(returns, horizon_days, initial_price)
-        
-        if synthetic_prices is None or len(synthetic_prices) < 2:
-            continue
-        
-        # Run strategy on synthetic prices
-        try:
-            if strategy_type == "simple_moving_average_crossover":
-                short_window = metadata.get("short_window", 100)
-                long_window = metadata.get("long_window", 250)
-                final_capital = run_sma_crossover_on_prices(
-                    synthetic_prices, capital, short_window, long_window
-                )
-            elif strategy_type == "dca":
-                frequency = metadata.get("frequency", "monthly")
-                contribution = metadata.get("contribution")
-                final_capital = run_dca_on_prices(
-                    synthetic_prices, capital, frequency, contribution
-                )
-            elif strategy_type == "buy_hold_markers":
-                entry_price = metadata.get("entry_price")
-                exit_price = metadata.get("exit_price")
-                position_percent = metadata.get("position_percent", 100.0)
-                commission_dollars = metadata.get("commission_dollars", 0.0)
-                final_capital = run_buy_hold_advanced_on_prices(
-                    synthetic_prices, capital, entry_price, exit_price, position_percent, commission_dollars
-                )
-            elif strategy_type == "value_averaging":
-                frequency = metadata.get("frequency", "monthly")
-                target_growth_rate = metadata.get("target_growth_rate")
-                if target_growth_rate is not None:
-                    target_growth_rate = float(target_growth_rate) / 100.0  # Convert percentage to decimal
-                final_capital = run_value_averaging_on_prices(
-                    synthetic_prices, capital, frequency, target_growth_rate
-                )
-            else:
-                continue
-            
-            final_capitals.append(final_capital)
-        except Exception as e:
-            print(f"Error running strategy on synthetic path: {e}")
-            continue
-    
-    if len(final_capitals) == 0:
-        return {"status": "error", "message": "No valid simulations completed"}
-    
-    # Calculate statistics
-    final_capitals_array = np.array(final_capitals)
-    returns_array = ((final_capitals_array - capital) / capital) * 100.0
-    
-    percentiles = {
-        "p10": float(np.percentile(final_capitals_array, 10)),
-        "p25": float(np.percentile(final_capitals_array, 25)),
-        "p50": float(np.percentile(final_capitals_array, 50)),
-        "p75": float(np.percentile(final_capitals_array, 75)),
-        "p90": float(np.percentile(final_capitals_array, 90)),
-    }
-    
-    return_percentiles = {
-        "p10": float(np.percentile(returns_array, 10)),
-        "p25": float(np.percentile(returns_array, 25)),
-        "p50": float(np.percentile(returns_array, 50)),
-        "p75": float(np.percentile(returns_array, 75)),
-        "p90": float(np.percentile(returns_array, 90)),
-    }
-    
-    probability_of_loss = float(np.mean(final_capitals_array < capital)) * 100.0
-    mean_final_capital = float(np.mean(final_capitals_array))
-    std_final_capital = float(np.std(final_capitals_array))
-    
-    return {
-        "status": "success",
-        "data": {
-            "strategy_id": strategy_id,
-            "strategy_type": strategy_type,
-            "ticker": ticker,
-            "initial_capital": capital,
-            "mode": mode,
-            "horizon_days": horizon_days,
-            "num_simulations": len(final_capitals),
-            "statistics": {
-                "mean_final_capital": round(mean_final_capital, 2),
-                "std_final_capital": round(std_final_capital, 2),
-                "min_final_capital": float(np.min(final_capitals_array)),
-                "max_final_capital": float(np.max(final_capitals_array)),
-                "percentiles": {k: round(v, 2) for k, v in percentiles.items()},
-                "return_percentiles": {k: round(v, 2) for k, v in return_percentiles.items()},
-                "probability_of_loss": round(probability_of_loss, 2),
-            },
-            "distribution": {
-                "final_capitals": [round(float(x), 2) for x in final_capitals_array[:100]],  # First 100 for preview
-                "returns": [round(float(x), 2) for x in returns_array[:100]],
-            },
-        },
-    }
+        job = monte_carlo_jobs.submit(payload)
+    except QueueFullError as e:
+        return JSONResponse(status_code=429, content={"status": "error", "message": str(e)})
+    return {"status": "success", "data": job.status()}
+
+@app.get("/api/montecarlo/jobs/{job_id}")
+async def get_monte_carlo_job_status(job_id: str):
+    job = monte_carlo_jobs.get(job_id)
+    if not job:
+        return {"status": "error", "message": "Job not found or expired"}
+    return {"status": "success", "data": job.status()}
+
+@app.get("/api/montecarlo/jobs/{job_id}/result")
+async def get_monte_carlo_job_result(job_id: str):
+    job = monte_carlo_jobs.get(job_id)
+    if not job:
+        return {"status": "error", "message": "Job not found or expired"}
+    if job.state == "succeeded":
+        return {"status": "success", "data": job.result}
+    if job.state == "failed":
+        return {"status": "error", "message": job.error}
+    return {"status": "error", "message": f"Job is {job.state}", "data": job.status()}
+
+@app.delete("/api/montecarlo/jobs/{job_id}")
+async def cancel_monte_carlo_job(job_id: str):
+    job = monte_carlo_jobs.cancel(job_id)
+    if not job:
+        return {"status": "error", "message": "Job not found or expired"}
+    return {"status": "success", "data": job.status()}
 
 if __name__ == "__main__":
     import uvicorn
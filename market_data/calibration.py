@@ -0,0 +1,113 @@
+import os
+from datetime import date, timedelta
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from market_data.price_cache import PriceSeriesCache
+from market_data.price_store import day_to_str, to_day
+from market_data.prices import get_price_history, price_fingerprint, price_source_version
+
+# Calibrations are small (a few years of daily returns), so this bounds a few thousand
+# ticker / window combinations
+CALIBRATION_CACHE_MAX_BYTES = int(os.getenv("CALIBRATION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Window used when no explicit date range is given (forward_sim and undated strategies)
+CALIBRATION_LOOKBACK_DAYS = int(os.getenv("CALIBRATION_LOOKBACK_DAYS", str(5 * 365)))
+MIN_CALIBRATION_PRICES = 10
+
+
+class CalibrationError(ValueError):
+    """Raised when a ticker has too little price data in the window to calibrate."""
+
+
+class Calibration:
+    """
+    Daily close prices of one ticker over a window, their simple returns and fitted moments.
+
+    Instances are shared between requests through the cache and must be treated as read-only.
+    """
+
+    __slots__ = ("ticker", "start", "end", "as_of", "prices", "returns", "mean", "std", "fingerprint")
+
+    def __init__(self, ticker: str, start: str, end: str, as_of: str, prices: pd.Series):
+        self.ticker = ticker
+        self.start = start
+        self.end = end
+        self.as_of = as_of
+        self.prices = prices
+        self.returns = prices.pct_change().dropna().to_numpy(dtype=np.float64)
+        self.returns.flags.writeable = False
+        # Population moments, as fitted by forward_sim
+        self.mean = float(np.mean(self.returns)) if len(self.returns) else float("nan")
+        self.std = float(np.std(self.returns)) if len(self.returns) else float("nan")
+        self.fingerprint = price_fingerprint(prices)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.prices.memory_usage(index=True, deep=True)) + self.returns.nbytes
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary of the window and fitted moments for API responses."""
+        return {
+            "ticker": self.ticker,
+            "start": self.start,
+            "end": self.end,
+            "as_of": self.as_of,
+            "num_returns": len(self.returns),
+            "mean_daily_return": self.mean,
+            "daily_volatility": self.std,
+        }
+
+
+_cache = PriceSeriesCache(max_bytes=CALIBRATION_CACHE_MAX_BYTES)
+
+
+def _load(ticker: str, start: str, end: str, as_of: str) -> Calibration:
+    hist = get_price_history(ticker, start, end)
+    if hist is None or hist.empty or "Close" not in hist.columns:
+        raise CalibrationError("No calibration data available")
+    prices = hist["Close"].dropna()
+    if len(prices) < MIN_CALIBRATION_PRICES:
+        raise CalibrationError("Insufficient calibration data")
+    return Calibration(ticker, start, end, as_of, prices)
+
+
+def get_calibration(ticker: str, start=None, end=None, as_of=None) -> Calibration:
+    """
+    Calibration for a ticker, shared by every Monte Carlo mode and user.
+
+    Without start and end, the window is the CALIBRATION_LOOKBACK_DAYS before as_of
+    (exclusive, like get_price_history's end). Entries are keyed by the as-of date, so the
+    rolling window is rebuilt once per day; ranges that end before as_of don't depend
+    on it and are reused across days. Concurrent misses share one load.
+
+    Args:
+        ticker: Symbol to calibrate (case-insensitive)
+        start: First date of an explicit window (date, datetime or YYYY-MM-DD string)
+        end: Date to stop before for an explicit window
+        as_of: Date the calibration is made on; defaults to today
+
+    Raises:
+        CalibrationError: If the window has fewer than MIN_CALIBRATION_PRICES prices
+    """
+    ticker = ticker.upper().strip()
+    as_of_day = to_day(as_of if as_of is not None else date.today())
+    if start and end:
+        start_day, end_day = to_day(start), to_day(end)
+    else:
+        end_day = as_of_day
+        start_day = to_day(pd.Timestamp(day_to_str(as_of_day)) - timedelta(days=CALIBRATION_LOOKBACK_DAYS))
+
+    # Ranges that are already in the past give the same calibration on any day
+    key_as_of = day_to_str(as_of_day) if end_day >= as_of_day else None
+    key = (ticker, day_to_str(start_day), day_to_str(end_day), key_as_of, price_source_version(ticker))
+    return _cache.get_or_load(
+        key,
+        lambda: _load(ticker, key[1], key[2], day_to_str(as_of_day)),
+    )
+
+
+def calibration_cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction counters for the shared calibration cache."""
+    return _cache.stats()
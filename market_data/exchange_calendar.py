@@ -0,0 +1,50 @@
+from functools import lru_cache
+
+import numpy as np
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday,
+)
+
+# Full-day NYSE closures. Tickers on other exchanges are checked against the same
+# calendar: a local holiday missing here only means an empty range is fetched again.
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    rules = [
+        # Unlike the other fixed holidays, a Saturday New Year's Day isn't observed on Friday
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+@lru_cache(maxsize=1)
+def _holidays() -> np.ndarray:
+    holidays = NYSEHolidayCalendar().holidays(start="1950-01-01", end="2100-12-31")
+    return holidays.values.astype("datetime64[D]")
+
+
+def trading_day_count(start_day: int, end_day: int) -> int:
+    """Exchange trading days in the half-open day-number range [start_day, end_day)."""
+    if end_day <= start_day:
+        return 0
+    start = np.datetime64(int(start_day), "D")
+    end = np.datetime64(int(end_day), "D")
+    return int(np.busday_count(start, end, holidays=_holidays()))
+
@@ -0,0 +1,308 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from market_data.exchange_calendar import trading_day_count
+from market_data.providers import FIELDS, MarketDataProvider, get_provider
+
+# Directory holding one compressed NPZ file per ticker (in a subdirectory per provider).
+# Override with PRICE_STORE_DIR (e.g. a mounted volume on Railway) so the store
+# survives redeploys.
+PRICE_STORE_DIR = os.getenv(
+    "PRICE_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".price_store"),
+)
+
+# Adjusted prices are restated after every split or dividend. A stored bar refetched
+# with a relative difference above this means the stored bars are on an older basis.
+_ADJUSTMENT_RTOL = 1e-6
+# A stored bar at most this many days from a gap is fetched in the same request;
+# a farther one is checked with a separate one-day request
+_ANCHOR_MAX_DAYS = 7
+# Full stored close histories kept in memory (see PriceStore.history)
+_HISTORY_CACHE_SIZE = 256
+
+
+def to_day(value) -> int:
+    """Convert a date, datetime or YYYY-MM-DD string to days since the epoch."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(np.datetime64(pd.Timestamp(value).date(), "D").astype(np.int64))
+
+
+def day_to_str(day: int) -> str:
+    return str(np.datetime64(int(day), "D"))
+
+
+def _merge_intervals(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or touching half-open [start, end) day intervals."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _missing_ranges(coverage: List[Tuple[int, int]], start: int, end: int) -> List[Tuple[int, int]]:
+    """Return the parts of [start, end) not covered by the stored intervals."""
+    missing = []
+    cursor = start
+    for cov_start, cov_end in coverage:
+        if cov_end <= cursor:
+            continue
+        if cov_start >= end:
+            break
+        if cov_start > cursor:
+            missing.append((cursor, cov_start))
+        cursor = max(cursor, cov_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        missing.append((cursor, end))
+    return missing
+
+
+def _empty_record() -> dict:
+    return {
+        "days": np.empty(0, dtype=np.int64),
+        "columns": {field: np.empty(0) for field in FIELDS},
+        "coverage": [],
+    }
+
+
+def _anchor_day(stored_days: np.ndarray, gap_start: int, gap_end: int) -> Optional[int]:
+    """The stored bar nearest to a gap, before or after it (None if nothing is stored)."""
+    candidates = []
+    before = np.searchsorted(stored_days, gap_start, side="left")
+    if before > 0:
+        candidates.append((gap_start - stored_days[before - 1], int(stored_days[before - 1])))
+    after = np.searchsorted(stored_days, gap_end, side="left")
+    if after < len(stored_days):
+        candidates.append((stored_days[after] - gap_end + 1, int(stored_days[after])))
+    return min(candidates)[1] if candidates else None
+
+
+def _bars_to_arrays(bars: pd.DataFrame):
+    """Split a provider frame into (day numbers, {field: float64 array})."""
+    if bars is None or bars.empty:
+        return np.empty(0, dtype=np.int64), {field: np.empty(0) for field in FIELDS}
+    index = pd.DatetimeIndex(bars.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    days = index.values.astype("datetime64[D]").astype(np.int64)
+    columns = {field: bars[field].to_numpy(dtype=np.float64, na_value=np.nan) for field in FIELDS}
+    return days, columns
+
+
+class PriceStore:
+    """Persistent daily OHLCV store that only downloads date ranges it has not seen.
+
+    Each ticker lives in its own NPZ file holding the bar dates, the OHLCV columns and
+    the list of calendar ranges already fetched. Bars before today never change, so a
+    range is downloaded at most once; today's (still moving) bar is always refetched.
+
+    Adjusted prices are the exception: a split or dividend restates every earlier bar.
+    Each gap is therefore fetched together with the nearest stored bar, and if that bar
+    comes back different the stored bars are dropped and the requested range is
+    downloaded again, so a series never mixes two adjustment bases.
+    """
+
+    def __init__(self, provider: Optional[MarketDataProvider] = None, root: str = PRICE_STORE_DIR):
+        self.provider = provider or get_provider()
+        # Keep each provider's bars apart so switching to fixtures never mixes sources
+        self.root = os.path.join(root, self.provider.name)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._histories: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _path(self, ticker: str, auto_adjust: bool) -> str:
+        suffix = "" if auto_adjust else "_raw"
+        return os.path.join(self.root, f"{ticker.upper()}{suffix}.npz")
+
+    def _lock_for(self, path: str) -> threading.Lock:
+        with self._locks_guard:
+            if path not in self._locks:
+                self._locks[path] = threading.Lock()
+            return self._locks[path]
+
+    def _load(self, path: str) -> dict:
+        if not os.path.exists(path):
+            return _empty_record()
+        try:
+            with np.load(path) as data:
+                return {
+                    "days": data["days"],
+                    "columns": {field: data[field] for field in FIELDS},
+                    "coverage": [tuple(map(int, row)) for row in data["coverage"]],
+                }
+        except Exception as e:
+            # A corrupt file is treated as an empty store and rebuilt from upstream
+            print(f"Discarding unreadable price store file {path}: {e}")
+            return _empty_record()
+
+    def _save(self, path: str, record: dict) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        coverage = np.array(record["coverage"], dtype=np.int64).reshape(-1, 2)
+        with open(tmp_path, "wb") as fh:
+            np.savez_compressed(fh, days=record["days"], coverage=coverage, **record["columns"])
+        # Atomic rename so concurrent readers (other workers) never see a partial file
+        os.replace(tmp_path, path)
+
+    def _fetch(self, ticker: str, start: int, end: int, auto_adjust: bool):
+        bars = self.provider.get_bars(
+            ticker,
+            start=day_to_str(start),
+            end=day_to_str(end),
+            interval="1d",
+            auto_adjust=auto_adjust,
+        )
+        return _bars_to_arrays(bars)
+
+    def _fill_gaps(self, ticker: str, record: dict, gaps: List[Tuple[int, int]], auto_adjust: bool, today: int):
+        """
+        Fetch the gaps and merge the final bars into the record.
+
+        Returns:
+            (record, live days, live columns), or None if a stored bar fetched alongside
+            a gap disagrees with its stored copy (the adjustment basis changed)
+        """
+        stored_days = record["days"]
+        live_days = np.empty(0, dtype=np.int64)
+        live_columns = {field: np.empty(0) for field in FIELDS}
+        new_days = [stored_days]
+        new_columns = {field: [record["columns"][field]] for field in FIELDS}
+        new_coverage = list(record["coverage"])
+
+        for gap_start, gap_end in gaps:
+            anchor = _anchor_day(stored_days, gap_start, gap_end)
+            if anchor is not None and gap_start - _ANCHOR_MAX_DAYS <= anchor < gap_end + _ANCHOR_MAX_DAYS:
+                days, columns = self._fetch(ticker, min(gap_start, anchor), max(gap_end, anchor + 1), auto_adjust)
+                anchor_days, anchor_close = days, columns["Close"]
+                in_gap = (days >= gap_start) & (days < gap_end)
+                days = days[in_gap]
+                columns = {field: columns[field][in_gap] for field in FIELDS}
+            else:
+                days, columns = self._fetch(ticker, gap_start, gap_end, auto_adjust)
+                if anchor is not None:
+                    anchor_days, anchor_columns = self._fetch(ticker, anchor, anchor + 1, auto_adjust)
+                    anchor_close = anchor_columns["Close"]
+
+            if anchor is not None:
+                fetched = np.flatnonzero(anchor_days == anchor)
+                stored_close = record["columns"]["Close"][np.searchsorted(stored_days, anchor)]
+                if len(fetched) and not np.isclose(
+                    anchor_close[fetched[0]], stored_close, rtol=_ADJUSTMENT_RTOL, atol=0.0, equal_nan=True
+                ):
+                    return None
+            final = days < today
+
+            # Bars from today onward are still moving: serve them but don't persist
+            live_days = np.concatenate([live_days, days[~final]])
+            for field in FIELDS:
+                live_columns[field] = np.concatenate([live_columns[field], columns[field][~final]])
+
+            new_days.append(days[final])
+            for field in FIELDS:
+                new_columns[field].append(columns[field][final])
+
+            # yfinance returns an empty frame (instead of raising) when the network call
+            # fails, so an empty gap is only settled if the exchange had no session in it
+            covered_end = min(gap_end, today)
+            if covered_end > gap_start and (len(days) > 0 or trading_day_count(gap_start, covered_end) == 0):
+                new_coverage.append((gap_start, covered_end))
+
+        all_days = np.concatenate(new_days)
+        # Keep the newest copy of any duplicated day, then sort by date
+        order = np.argsort(all_days, kind="stable")[::-1]
+        _, first = np.unique(all_days[order], return_index=True)
+        keep = order[first]
+        record = {
+            "days": all_days[keep],
+            "columns": {field: np.concatenate(new_columns[field])[keep] for field in FIELDS},
+            "coverage": _merge_intervals(new_coverage),
+        }
+        return record, live_days, live_columns
+
+    def history(self, ticker: str, auto_adjust: bool = True) -> Optional[Tuple[np.ndarray, np.ndarray, str]]:
+        """
+        Every stored daily close of a ticker, for computing derived series once over it.
+
+        Returns:
+            (day numbers, closes, content fingerprint) of the stored bars with a close,
+            read-only and reloaded only when the file changes; None if the provider's
+            bars aren't stored or nothing is stored yet. Today's bar is never included.
+        """
+        if not self.provider.persistent:
+            return None
+        path = self._path(ticker.upper().strip(), auto_adjust)
+        try:
+            version = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._locks_guard:
+            cached = self._histories.get(path)
+            if cached is not None and cached[0] == version:
+                self._histories.move_to_end(path)
+                return cached[1]
+
+        record = self._load(path)
+        close = record["columns"]["Close"]
+        has_close = ~np.isnan(close)
+        days = np.ascontiguousarray(record["days"][has_close])
+        close = np.ascontiguousarray(close[has_close])
+        digest = hashlib.sha256(days.tobytes())
+        digest.update(close.tobytes())
+        days.flags.writeable = False
+        close.flags.writeable = False
+        history = (days, close, digest.hexdigest())
+        with self._locks_guard:
+            self._histories[path] = (version, history)
+            self._histories.move_to_end(path)
+            while len(self._histories) > _HISTORY_CACHE_SIZE:
+                self._histories.popitem(last=False)
+        return history
+
+    def get(self, ticker: str, start, end, auto_adjust: bool = True) -> pd.DataFrame:
+        """Return daily bars for [start, end), downloading only the missing ranges."""
+        ticker = ticker.upper().strip()
+        start_day, end_day = to_day(start), to_day(end)
+        if not self.provider.persistent:
+            days, columns = self._fetch(ticker, start_day, end_day, auto_adjust)
+            index = pd.DatetimeIndex(days.astype("datetime64[D]").astype("datetime64[ns]"), name="Date")
+            return pd.DataFrame(columns, index=index)
+
+        today = to_day(date.today())
+        path = self._path(ticker, auto_adjust)
+
+        with self._lock_for(path):
+            record = self._load(path)
+            gaps = _missing_ranges(record["coverage"], start_day, end_day)
+            live_days = np.empty(0, dtype=np.int64)
+            live_columns = {field: np.empty(0) for field in FIELDS}
+
+            if gaps:
+                filled = self._fill_gaps(ticker, record, gaps, auto_adjust, today)
+                if filled is None:
+                    print(f"Adjusted prices of {ticker} were restated (split or dividend); refetching {path}")
+                    filled = self._fill_gaps(ticker, _empty_record(), [(start_day, end_day)], auto_adjust, today)
+                record, live_days, live_columns = filled
+                self._save(path, record)
+
+        mask = (record["days"] >= start_day) & (record["days"] < end_day)
+        days = np.concatenate([record["days"][mask], live_days[(live_days >= start_day) & (live_days < end_day)]])
+        data = {}
+        for field in FIELDS:
+            live_values = live_columns[field][(live_days >= start_day) & (live_days < end_day)]
+            data[field] = np.concatenate([record["columns"][field][mask], live_values])
+
+        index = pd.DatetimeIndex(days.astype("datetime64[D]").astype("datetime64[ns]"), name="Date")
+        return pd.DataFrame(data, index=index)
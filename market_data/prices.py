@@ -0,0 +1,74 @@
+import hashlib
+from datetime import date
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from market_data.price_cache import PriceSeriesCache
+from market_data.price_store import PriceStore, day_to_str, to_day
+
+_store = PriceStore()
+_cache = PriceSeriesCache()
+
+
+def get_price_history(ticker: str, start, end, auto_adjust: bool = True) -> pd.DataFrame:
+    """
+    Single data-access function for daily OHLCV bars.
+
+    Lookups go through the in-process cache first, then the on-disk store, and only
+    reach upstream for date ranges neither has seen. Concurrent requests for the same
+    range share one upstream fetch.
+
+    Args:
+        ticker: Symbol to load (case-insensitive)
+        start: First date to include (date, datetime or YYYY-MM-DD string)
+        end: Date to stop before, matching yf.download's exclusive end
+        auto_adjust: Return split/dividend adjusted prices
+
+    Returns:
+        DataFrame indexed by date with Open/High/Low/Close/Volume columns. Empty if the
+        ticker has no bars in the range. The frame is shared with the cache, so callers
+        must not modify it in place.
+    """
+    ticker = ticker.upper().strip()
+    start_day, end_day = to_day(start), to_day(end)
+    key = (ticker, day_to_str(start_day), day_to_str(end_day), bool(auto_adjust), price_source_version(ticker))
+    touches_today = end_day > to_day(date.today())
+    return _cache.get_or_load(
+        key,
+        lambda: _store.get(ticker, key[1], key[2], auto_adjust=auto_adjust),
+        expires=touches_today,
+    )
+
+
+def get_stored_closes(ticker: str, auto_adjust: bool = True):
+    """
+    The ticker's full stored close history as (day numbers, closes, fingerprint), or None.
+
+    See PriceStore.history; call after get_price_history so the requested range is stored.
+    """
+    return _store.history(ticker, auto_adjust=auto_adjust)
+
+
+def price_source_version(ticker: str):
+    """The provider's version token for a ticker's bars, for keying anything derived from them."""
+    return _store.provider.bars_version(ticker)
+
+
+def price_cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction/coalesced-wait counters for the in-process price cache."""
+    return _cache.stats()
+
+
+def market_data_available() -> bool:
+    """True when the configured provider can serve requests (e.g. yfinance is installed)."""
+    return _store.provider.available()
+
+
+def price_fingerprint(prices: pd.Series) -> str:
+    """Content hash of a price series (dates and values), for keying derived results."""
+    digest = hashlib.sha256()
+    digest.update(np.asarray(prices.index.values.astype("datetime64[ns]").view("int64")).tobytes())
+    digest.update(np.ascontiguousarray(prices.to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
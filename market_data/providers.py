@@ -0,0 +1,267 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import yfinance as yf
+except Exception:
+    yf = None
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+# "yfinance" (default) talks to Yahoo. "local" serves CSV/Parquet fixtures from
+# MARKET_DATA_DIR so endpoints can be benchmarked without network access.
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yfinance").lower()
+MARKET_DATA_DIR = os.getenv("MARKET_DATA_DIR", "market_data_fixtures")
+
+# Calendar lookbacks for yfinance-style period strings (used by the local provider)
+_PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+
+def _empty_bars() -> pd.DataFrame:
+    return pd.DataFrame({field: np.empty(0) for field in FIELDS}, index=pd.DatetimeIndex([], name="Date"))
+
+
+def _normalize_bars(hist, ticker: str) -> pd.DataFrame:
+    """Flatten a yfinance frame (possibly MultiIndex columns) to Open/High/Low/Close/Volume."""
+    if hist is None or hist.empty:
+        return _empty_bars()
+
+    if isinstance(hist.columns, pd.MultiIndex):
+        if ticker in hist.columns.get_level_values(-1):
+            hist = hist.xs(ticker, axis=1, level=-1)
+        else:
+            hist = hist.droplevel(-1, axis=1)
+
+    index = pd.DatetimeIndex(hist.index, name="Date")
+    data = {}
+    for field in FIELDS:
+        if field in hist.columns:
+            data[field] = hist[field].to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            data[field] = np.full(len(index), np.nan)
+    return pd.DataFrame(data, index=index)
+
+
+class MarketDataProvider(ABC):
+    """Source of bars, news and quotes for the API and the price store."""
+
+    name = "base"
+    # Bars are worth keeping in the on-disk price store (slow or rate-limited upstream)
+    persistent = True
+
+    def available(self) -> bool:
+        return True
+
+    def bars_version(self, ticker: str) -> Optional[Any]:
+        """Token that changes when a ticker's daily bars are replaced at the source (None: never)."""
+        return None
+
+    @abstractmethod
+    def get_bars(
+        self,
+        ticker: str,
+        start=None,
+        end=None,
+        interval: str = "1d",
+        auto_adjust: bool = True,
+        period: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Load OHLCV bars.
+
+        Args:
+            ticker: Symbol to load
+            start: First date to include (ignored when period is given)
+            end: Date to stop before (exclusive, like yf.download)
+            interval: Bar size, e.g. "1d" or "1h"
+            auto_adjust: Return split/dividend adjusted prices
+            period: yfinance-style lookback such as "1mo" instead of start/end
+
+        Returns:
+            DataFrame indexed by timestamp with Open/High/Low/Close/Volume columns.
+        """
+
+    @abstractmethod
+    def get_news(self, ticker: str, count: int = 5) -> List[Dict[str, Any]]:
+        """Return recent articles in Yahoo's news format (dicts with a "content" key)."""
+
+    @abstractmethod
+    def get_quote(self, ticker: str) -> Dict[str, Any]:
+        """Return quote fields: regularMarketPrice, regularMarketChange, regularMarketChangePercent, shortName."""
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def available(self) -> bool:
+        return yf is not None
+
+    def get_bars(self, ticker, start=None, end=None, interval="1d", auto_adjust=True, period=None):
+        if yf is None:
+            raise RuntimeError("Server missing yfinance. Install backend requirements.")
+        if period:
+            hist = yf.Ticker(ticker).history(period=period, interval=interval, auto_adjust=auto_adjust)
+        else:
+            hist = yf.download(
+                ticker,
+                start=start,
+                end=end,
+                interval=interval,
+                progress=False,
+                auto_adjust=auto_adjust,
+            )
+        return _normalize_bars(hist, ticker)
+
+    def get_news(self, ticker, count=5):
+        if yf is None:
+            raise RuntimeError("Server missing yfinance. Install backend requirements.")
+        return yf.Ticker(ticker).get_news(count=count, tab="all") or []
+
+    def get_quote(self, ticker):
+        if yf is None:
+            raise RuntimeError("Server missing yfinance. Install backend requirements.")
+        return yf.Ticker(ticker).info or {}
+
+
+class LocalFileProvider(MarketDataProvider):
+    """
+    Offline provider reading fixtures from a directory:
+
+        {root}/{TICKER}.parquet or {root}/{TICKER}.csv        daily bars (Date + OHLCV columns)
+        {root}/{TICKER}_{interval}.csv / .parquet             bars for other intervals
+        {root}/{TICKER}.news.json                             list of Yahoo-format articles
+        {root}/{TICKER}.quote.json                            quote dict (derived from bars if missing)
+
+    auto_adjust is ignored; fixtures are served as stored. They are already on local
+    disk, so the price store reads them directly instead of keeping a copy, and edits
+    to a fixture take effect on the next request.
+    """
+
+    name = "local"
+    persistent = False
+
+    def __init__(self, root: str = MARKET_DATA_DIR):
+        self.root = root
+        self._frames: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _bars_path(self, ticker: str, interval: str) -> Optional[str]:
+        stem = ticker.upper() if interval == "1d" else f"{ticker.upper()}_{interval}"
+        for ext in (".parquet", ".csv"):
+            path = os.path.join(self.root, stem + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def bars_version(self, ticker: str) -> Optional[Any]:
+        path = self._bars_path(ticker, "1d")
+        return os.path.getmtime(path) if path is not None else None
+
+    def _read_bars(self, path: str) -> pd.DataFrame:
+        # Fixtures are re-read only when the file changes
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._frames.get(path)
+            if cached and cached[0] == mtime:
+                return cached[1]
+
+        if path.endswith(".parquet"):
+            raw = pd.read_parquet(path)
+        else:
+            raw = pd.read_csv(path)
+        date_col = next((c for c in raw.columns if str(c).lower() in ("date", "datetime", "timestamp")), None)
+        if date_col is not None:
+            raw = raw.set_index(date_col)
+        raw.index = pd.to_datetime(raw.index)
+        raw = raw.rename(columns={c: str(c).capitalize() for c in raw.columns})
+        if "Close" not in raw.columns and "Adj close" in raw.columns:
+            raw["Close"] = raw["Adj close"]
+        frame = _normalize_bars(raw.sort_index(), ticker="")
+
+        with self._lock:
+            self._frames[path] = (mtime, frame)
+        return frame
+
+    def get_bars(self, ticker, start=None, end=None, interval="1d", auto_adjust=True, period=None):
+        path = self._bars_path(ticker, interval)
+        if path is None:
+            return _empty_bars()
+        bars = self._read_bars(path)
+        if bars.empty:
+            return bars
+
+        if period:
+            if period in _PERIOD_OFFSETS:
+                bars = bars[bars.index > bars.index[-1] - _PERIOD_OFFSETS[period]]
+            elif period == "ytd":
+                bars = bars[bars.index >= pd.Timestamp(bars.index[-1].year, 1, 1)]
+            return bars
+
+        if start is not None:
+            bars = bars[bars.index >= pd.Timestamp(start)]
+        if end is not None:
+            bars = bars[bars.index < pd.Timestamp(end)]
+        return bars
+
+    def get_news(self, ticker, count=5):
+        path = os.path.join(self.root, f"{ticker.upper()}.news.json")
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)[:count]
+
+    def get_quote(self, ticker):
+        path = os.path.join(self.root, f"{ticker.upper()}.quote.json")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+
+        bars = self.get_bars(ticker)
+        closes = bars["Close"].dropna()
+        if closes.empty:
+            return {}
+        price = float(closes.iloc[-1])
+        previous = float(closes.iloc[-2]) if len(closes) > 1 else price
+        change = price - previous
+        return {
+            "shortName": ticker.upper(),
+            "regularMarketPrice": price,
+            "regularMarketChange": change,
+            "regularMarketChangePercent": (change / previous * 100.0) if previous else 0.0,
+            "regularMarketTime": int(datetime.combine(closes.index[-1].date(), datetime.min.time()).timestamp()),
+        }
+
+
+_provider: Optional[MarketDataProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> MarketDataProvider:
+    """Return the process-wide provider selected by MARKET_DATA_PROVIDER."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            if MARKET_DATA_PROVIDER == "local":
+                _provider = LocalFileProvider(MARKET_DATA_DIR)
+            elif MARKET_DATA_PROVIDER == "yfinance":
+                _provider = YFinanceProvider()
+            else:
+                raise ValueError(f"Unknown MARKET_DATA_PROVIDER '{MARKET_DATA_PROVIDER}'")
+        return _provider
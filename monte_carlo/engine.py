@@ -0,0 +1,474 @@
+import os
+import secrets
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from monte_carlo.fan_chart import FAN_CHART_MAX_PATHS, fan_chart_bands
+from backtest.core import total_wealth
+from monte_carlo.kernels import final_capitals_on_paths, strategy_results_on_paths
+from monte_carlo.memory import MONTE_CARLO_REQUEST_MEMORY_BYTES, MemoryBudgetExceeded, memory_budget
+from monte_carlo.paths import DEFAULT_BLOCK_LENGTH, generate_price_paths, simulation_dates
+from monte_carlo.risk import RiskSummary
+from monte_carlo.statistics import EXACT_QUANTILE_LIMIT, StreamingSummary
+from monte_carlo.variance_reduction import MeanEstimator, control_expectation
+from process_pool import PROCESS_POOL_WORKERS, get_process_pool
+
+# Paths are generated in fixed-size blocks, each with its own random stream spawned from
+# the run's seed. Results depend only on the seed and block size, never on how blocks
+# are spread across workers.
+SIMULATION_BLOCK_SIZE = int(os.getenv("MONTE_CARLO_BLOCK_SIZE", "1000"))
+
+PATH_DTYPES = {"float64": np.float64, "float32": np.float32}
+# (paths, days) matrices alive at the two peaks of a block, as (path dtype, 8-byte, 1-byte)
+# counts. Strategy evaluation holds the paths, signal, returns and equity, plus the
+# indicators' float64 work (float32 paths are upcast): the copy, running sums and both
+# averages. The risk pass holds the equity and the wealth (equity plus uninvested cash),
+# the wealth's finite-row copy, the running peak and two drawdown temporaries, three
+# int64 matrices for the underwater stretch (their peaks don't overlap value averaging's
+# float64 cash) and two masks. Path generation and comparisons (one strategy at a time)
+# need less than either.
+_STRATEGY_WORKING_SET = (4, 5, 1)
+_RISK_WORKING_SET = (6, 3, 2)
+
+
+class SimulationCancelled(Exception):
+    """Raised when a run is cancelled between blocks."""
+
+
+def _block_sizes(num_simulations: int, block_size: int) -> List[int]:
+    full, rest = divmod(num_simulations, block_size)
+    return [block_size] * full + ([rest] if rest else [])
+
+
+def plan_blocks(
+    num_simulations: int,
+    horizon_days: int,
+    workers: int,
+    dtype=np.float64,
+    fan_columns: int = 0,
+    request_budget: int = MONTE_CARLO_REQUEST_MEMORY_BYTES,
+) -> Dict[str, int]:
+    """
+    Size blocks, parallelism and fan chart retention so one run stays within its memory budget.
+
+    The fan chart keeps the equity of up to FAN_CHART_MAX_PATHS leading paths at
+    fan_columns days, plus one transient copy of it (rows in transit from a shard, or the
+    finite rows when some paths blew up), in at most half the request budget; fewer paths
+    are kept when that doesn't fit. Blocks get the rest: they keep SIMULATION_BLOCK_SIZE
+    paths unless that would not fit for long horizons, in which case they shrink (results
+    for a seed then depend on the budget and fan_columns too). Workers are capped so all
+    blocks in flight fit together.
+
+    Returns:
+        {"block_size", "workers", "block_bytes": estimated working set of one block,
+        "fan_paths": paths kept for the fan chart, "peak_bytes": estimated peak of the run}
+
+    Raises:
+        MemoryBudgetExceeded: If a single path doesn't fit in half the request budget
+    """
+    itemsize = np.dtype(dtype).itemsize
+    row_bytes = (horizon_days + 1) * max(
+        narrow * itemsize + wide * 8 + masks for narrow, wide, masks in (_STRATEGY_WORKING_SET, _RISK_WORKING_SET)
+    )
+    if row_bytes > request_budget // 2:
+        raise MemoryBudgetExceeded(
+            f"A {horizon_days}-day path needs {row_bytes} bytes, more than half the "
+            f"{request_budget}-byte Monte Carlo request budget"
+        )
+
+    fan_paths = 0
+    fan_bytes = 0
+    if fan_columns:
+        fan_row_bytes = 2 * fan_columns * itemsize
+        fan_paths = min(num_simulations, FAN_CHART_MAX_PATHS, (request_budget // 2) // fan_row_bytes)
+        fan_bytes = fan_paths * fan_row_bytes
+
+    block_budget = request_budget - fan_bytes
+    block_size = min(SIMULATION_BLOCK_SIZE, block_budget // row_bytes)
+    num_blocks = -(-num_simulations // block_size)
+    block_bytes = block_size * row_bytes
+    workers = max(1, min(int(workers or 1), PROCESS_POOL_WORKERS, num_blocks, block_budget // block_bytes))
+    return {
+        "block_size": block_size,
+        "workers": workers,
+        "block_bytes": block_bytes,
+        "fan_paths": fan_paths,
+        "peak_bytes": workers * block_bytes + fan_bytes,
+    }
+
+
+def _block_paths(
+    spec: Dict[str, Any],
+    block_size: int,
+    seed_sequence: np.random.SeedSequence,
+) -> Tuple[np.ndarray, pd.DatetimeIndex]:
+    rng = np.random.default_rng(seed_sequence)
+    paths = generate_price_paths(
+        spec["returns"], block_size, spec["horizon_days"], spec["initial_price"], spec["mode"], rng,
+        spec["variance_reduction"], spec["block_length"], spec["dtype"],
+    )
+    return paths, simulation_dates(spec["horizon_days"], spec["start_date"])
+
+
+def simulate_block(
+    spec: Dict[str, Any],
+    block_size: int,
+    seed_sequence: np.random.SeedSequence,
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    Generate one block of paths and evaluate the strategy on them.
+
+    Returns the strategy's result (the (paths, days) equity curves and any uninvested
+    cash) and each path's buy & hold growth (final price / initial price), which serves
+    as the control variate.
+    """
+    paths, dates = _block_paths(spec, block_size, seed_sequence)
+    result = strategy_results_on_paths(spec["strategy_type"], spec["params"], paths, dates, spec["capital"])
+    return result, paths[:, -1] / spec["initial_price"]
+
+
+def summarize_block(
+    spec: Dict[str, Any],
+    block_size: int,
+    seed_sequence: np.random.SeedSequence,
+    keep_equity: int = 0,
+) -> Dict[str, Any]:
+    """
+    Simulate one block and reduce it to mergeable results.
+
+    Returns {"summary": StreamingSummary, "estimator": MeanEstimator, "risk": RiskSummary,
+    "equity": the first keep_equity paths' equity at spec["fan_columns"], or None}.
+    """
+    result, control = simulate_block(spec, block_size, seed_sequence)
+    equity = result["equity"]
+    final_capitals = equity[:, -1]
+    estimator = _new_estimator(spec)
+    estimator.update(final_capitals, control)
+    # Drop paths that produced non-finite values (e.g. a simulated price hitting zero)
+    final_capitals = final_capitals[np.isfinite(final_capitals)]
+    summary = StreamingSummary(threshold=spec["capital"], exact_limit=spec["exact_limit"])
+    summary.update(final_capitals)
+    risk = _new_risk_summary(spec)
+    # Risk is measured on total wealth: scheduled strategies hold cash until they invest it
+    risk.update(total_wealth(result))
+    kept = equity[:keep_equity, spec["fan_columns"]] if keep_equity else None
+    return {"summary": summary, "estimator": estimator, "risk": risk, "equity": kept}
+
+
+def _new_estimator(spec: Dict[str, Any]) -> MeanEstimator:
+    return MeanEstimator(spec["variance_reduction"], spec["capital"], spec["control_mean"])
+
+
+def _new_risk_summary(spec: Dict[str, Any]) -> RiskSummary:
+    return RiskSummary(spec["exact_limit"], spec["stop_level"])
+
+
+def compare_block(
+    spec: Dict[str, Any],
+    block_size: int,
+    seed_sequence: np.random.SeedSequence,
+) -> Dict[str, Any]:
+    """
+    Evaluate every strategy in spec["strategies"] on one shared block of paths.
+
+    Returns {"summaries": one StreamingSummary of final capitals per strategy,
+    "wins": (k, k) counts of paths where strategy i's return beat strategy j's}.
+    Paths where any strategy produced a non-finite value are dropped for all of them.
+    """
+    paths, dates = _block_paths(spec, block_size, seed_sequence)
+    finals = np.column_stack([
+        final_capitals_on_paths(strategy_type, params, paths, dates, capital)
+        for strategy_type, params, capital in spec["strategies"]
+    ])
+    finals = finals[np.isfinite(finals).all(axis=1)]
+    capitals = np.array([capital for _, _, capital in spec["strategies"]])
+    # Compare returns rather than final capital, since initial capital can differ
+    returns = finals / capitals - 1.0
+
+    summaries = []
+    for i, capital in enumerate(capitals):
+        summary = StreamingSummary(threshold=capital, exact_limit=spec["exact_limit"])
+        summary.update(finals[:, i])
+        summaries.append(summary)
+    wins = (returns[:, :, None] > returns[:, None, :]).sum(axis=0)
+    return {"summaries": summaries, "wins": wins}
+
+
+def _simulate_shard(
+    spec: Dict[str, Any],
+    blocks: List[tuple],
+    block_fn: Callable[..., Dict[str, Any]] = summarize_block,
+) -> List[Dict[str, Any]]:
+    """Process-pool entry point: run a worker's share of blocks in order."""
+    return [block_fn(spec, *block) for block in blocks]
+
+
+def _iter_block_results(
+    spec: Dict[str, Any],
+    blocks: List[tuple],
+    workers: int,
+    check_cancelled: Callable[[], None],
+    block_fn: Callable[..., Dict[str, Any]] = summarize_block,
+) -> Iterator[Dict[str, Any]]:
+    """Yield each block's results in block order, sharding across the pool when workers > 1."""
+    workers = min(workers, len(blocks))
+    if workers == 1:
+        for block in blocks:
+            check_cancelled()
+            yield block_fn(spec, *block)
+        return
+
+    # Contiguous shards, consumed in shard order, keep the block order
+    bounds = np.linspace(0, len(blocks), workers + 1).astype(int)
+    pool = get_process_pool()
+    futures = [
+        pool.submit(_simulate_shard, spec, blocks[lo:hi], block_fn)
+        for lo, hi in zip(bounds[:-1], bounds[1:])
+    ]
+    try:
+        for future in futures:
+            # Poll so a cancel request is noticed while shards are still running
+            while True:
+                check_cancelled()
+                try:
+                    shard = future.result(timeout=0.25)
+                    break
+                except FutureTimeoutError:
+                    continue
+            yield from shard
+    finally:
+        # No-op for finished shards; drops queued ones when stopped early or cancelled
+        for future in futures:
+            future.cancel()
+
+
+def run_simulation(
+    strategy_type: str,
+    params: Dict[str, Any],
+    capital: float,
+    returns,
+    initial_price: float,
+    mode: str,
+    horizon_days: int,
+    num_simulations: int,
+    seed: Optional[int] = None,
+    workers: int = 1,
+    block_length: int = DEFAULT_BLOCK_LENGTH,
+    path_dtype: str = "float64",
+    variance_reduction: str = "none",
+    converged: Optional[Callable[[StreamingSummary], bool]] = None,
+    fan_columns: Optional[np.ndarray] = None,
+    stop_level: Optional[float] = None,
+    progress: Optional[Callable[[float], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Run a Monte Carlo simulation, optionally sharded across the process pool.
+
+    Args:
+        strategy_type / params: Strategy to evaluate (see monte_carlo.kernels)
+        capital: Initial capital
+        returns: Calibration daily returns
+        initial_price: Price every path starts from
+        mode: Path generation mode
+        horizon_days: Simulated trading days
+        num_simulations: Number of paths
+        seed: Root seed; a random one is drawn (and returned) when omitted
+        workers: Number of worker processes; 1 runs in the calling thread
+        block_length: Mean block length for block_bootstrap / stationary_bootstrap
+        path_dtype: "float64" or "float32" (half the memory per path)
+        variance_reduction: "none", "antithetic", "control_variate" or "sobol"
+        converged: Optional stopping rule, called with the merged summary after each block;
+            the run stops early once it returns True (num_simulations is then the budget)
+        fan_columns: Day columns for per-day percentile bands (see monte_carlo.fan_chart);
+            None skips the fan chart
+        stop_level: Optional equity level; the risk summary reports how often paths fall below it
+        progress: Optional callback receiving the completed fraction (0..1)
+        cancel_event: Optional event; when set the run stops and raises SimulationCancelled
+
+    Returns:
+        {"summary": StreamingSummary of final capitals, "estimator": MeanEstimator with
+        variance-reduced means and standard errors, "seed": root seed used, "workers": workers used,
+        "simulations_used": paths actually simulated, "converged": stopping rule result or None,
+        "fan_chart": per-day bands or None, "risk": RiskSummary of drawdowns and stop hits,
+        "memory": block size, dtype and the estimated peak bytes reserved for the run}
+        Paths are reduced block by block, so memory does not grow with num_simulations,
+        and the run waits until its estimated peak fits the process-wide memory budget.
+        Block summaries are merged in block order, so the same seed yields bit-identical
+        statistics for any worker count.
+    """
+    if seed is None:
+        # 32 bits keeps the seed exact when it round-trips through JSON / JavaScript
+        seed = secrets.randbits(32)
+    root = np.random.SeedSequence(seed)
+    dtype = PATH_DTYPES[path_dtype]
+    plan = plan_blocks(num_simulations, horizon_days, workers, dtype, len(fan_columns) if fan_columns is not None else 0)
+    sizes = _block_sizes(num_simulations, plan["block_size"])
+    # The leading blocks also return the equity of their first paths, up to
+    # plan["fan_paths"] paths in all, for the fan chart
+    starts = np.cumsum([0] + sizes[:-1])
+    keep_equity = [int(np.clip(plan["fan_paths"] - start, 0, size)) for start, size in zip(starts, sizes)]
+    blocks = list(zip(sizes, root.spawn(len(sizes)), keep_equity))
+    returns = np.asarray(returns, dtype=np.float64)
+    spec = {
+        "strategy_type": strategy_type,
+        "params": params,
+        "capital": capital,
+        "returns": returns,
+        "initial_price": initial_price,
+        "mode": mode,
+        "horizon_days": horizon_days,
+        "variance_reduction": variance_reduction,
+        "block_length": block_length,
+        "dtype": dtype,
+        "control_mean": control_expectation(returns, horizon_days, mode, block_length),
+        "fan_columns": fan_columns,
+        "stop_level": stop_level,
+        # Pin the date index so every worker builds the same schedule
+        "start_date": pd.Timestamp.now().normalize(),
+        # Small runs keep exact values; large ones go straight to the quantile sketch.
+        # Adaptive runs stay exact as long as they can, since they may stop early.
+        "exact_limit": (
+            EXACT_QUANTILE_LIMIT if num_simulations <= EXACT_QUANTILE_LIMIT or converged is not None else 0
+        ),
+    }
+    summary = StreamingSummary(threshold=capital, exact_limit=spec["exact_limit"])
+    estimator = _new_estimator(spec)
+    risk = _new_risk_summary(spec)
+    # Kept equity is copied into one preallocated matrix as blocks arrive
+    fan_equity = None
+    if fan_columns is not None:
+        fan_equity = np.empty((plan["fan_paths"], len(fan_columns)), dtype=dtype)
+    fan_filled = 0
+
+    def merge(block_result):
+        nonlocal fan_filled
+        summary.merge(block_result["summary"])
+        estimator.merge(block_result["estimator"])
+        risk.merge(block_result["risk"])
+        kept = block_result["equity"]
+        if kept is not None:
+            fan_equity[fan_filled:fan_filled + len(kept)] = kept
+            fan_filled += len(kept)
+
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise SimulationCancelled("Simulation cancelled")
+
+    workers = plan["workers"]
+    peak_bytes = plan["peak_bytes"]
+
+    # Adaptive runs compute one block per worker at a time and test for convergence after
+    # every block, in block order, so the stopping point doesn't depend on the worker count
+    round_size = len(blocks) if converged is None else workers
+    blocks_used = 0
+    is_converged = False
+    with memory_budget.reserve(peak_bytes, check_cancelled):
+        for start in range(0, len(blocks), round_size):
+            for block_result in _iter_block_results(spec, blocks[start:start + round_size], workers, check_cancelled):
+                merge(block_result)
+                blocks_used += 1
+                if progress:
+                    progress(blocks_used / len(blocks))
+                if converged is not None and converged(summary):
+                    is_converged = True
+                    break
+            if is_converged:
+                break
+
+        fan_chart = None
+        if fan_filled:
+            dates = simulation_dates(horizon_days, spec["start_date"])
+            fan_chart = fan_chart_bands(fan_equity[:fan_filled], dates, fan_columns)
+
+    return {
+        "summary": summary,
+        "estimator": estimator,
+        "seed": seed,
+        "workers": workers,
+        "simulations_used": sum(sizes[:blocks_used]),
+        "converged": is_converged if converged is not None else None,
+        "fan_chart": fan_chart,
+        "risk": risk,
+        "memory": {
+            "path_dtype": path_dtype,
+            "block_size": plan["block_size"],
+            "estimated_peak_bytes": peak_bytes,
+        },
+    }
+
+
+def run_comparison(
+    strategies: List[Tuple[str, Dict[str, Any], float]],
+    returns,
+    initial_price: float,
+    mode: str,
+    horizon_days: int,
+    num_simulations: int,
+    seed: Optional[int] = None,
+    workers: int = 1,
+    block_length: int = DEFAULT_BLOCK_LENGTH,
+    progress: Optional[Callable[[float], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Evaluate several strategies on the same simulated paths (common random numbers).
+
+    Every strategy sees identical paths, so differences between them are not blurred by
+    sampling noise, and each block of paths is generated once instead of once per strategy.
+
+    Args:
+        strategies: (strategy_type, params, capital) for each strategy
+        Remaining arguments as in run_simulation
+
+    Returns:
+        {"summaries": StreamingSummary per strategy, "wins": (k, k) win counts,
+        "paths": paths compared, "seed": root seed used, "workers": workers used}
+    """
+    if seed is None:
+        seed = secrets.randbits(32)
+    root = np.random.SeedSequence(seed)
+    plan = plan_blocks(num_simulations, horizon_days, workers)
+    sizes = _block_sizes(num_simulations, plan["block_size"])
+    blocks = list(zip(sizes, root.spawn(len(sizes))))
+    spec = {
+        "strategies": strategies,
+        "returns": np.asarray(returns, dtype=np.float64),
+        "initial_price": initial_price,
+        "mode": mode,
+        "horizon_days": horizon_days,
+        "variance_reduction": "none",
+        "block_length": block_length,
+        "dtype": np.float64,
+        "start_date": pd.Timestamp.now().normalize(),
+        "exact_limit": EXACT_QUANTILE_LIMIT if num_simulations <= EXACT_QUANTILE_LIMIT else 0,
+    }
+    summaries = [StreamingSummary(threshold=capital, exact_limit=spec["exact_limit"]) for _, _, capital in strategies]
+    wins = np.zeros((len(strategies), len(strategies)), dtype=np.int64)
+
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise SimulationCancelled("Simulation cancelled")
+
+    workers = plan["workers"]
+    with memory_budget.reserve(plan["peak_bytes"], check_cancelled):
+        for done, block_result in enumerate(
+            _iter_block_results(spec, blocks, workers, check_cancelled, compare_block), start=1
+        ):
+            for summary, block_summary in zip(summaries, block_result["summaries"]):
+                summary.merge(block_summary)
+            wins += block_result["wins"]
+            if progress:
+                progress(done / len(blocks))
+
+    return {
+        "summaries": summaries,
+        "wins": wins,
+        "paths": summaries[0].count,
+        "seed": seed,
+        "workers": workers,
+    }
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Background Monte Carlo jobs. Jobs live in this process's memory, so clients must poll
+# the same server process that accepted the submission.
+MONTE_CARLO_JOB_WORKERS = int(os.getenv("MONTE_CARLO_JOB_WORKERS", "2"))
+MONTE_CARLO_JOB_QUEUE_DEPTH = int(os.getenv("MONTE_CARLO_JOB_QUEUE_DEPTH", "20"))
+MONTE_CARLO_JOB_TTL_SECONDS = float(os.getenv("MONTE_CARLO_JOB_TTL_SECONDS", "3600"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+_FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at its configured depth."""
+
+
+class MonteCarloJob:
+    def __init__(self, job_id: str, payload: Dict[str, Any], dedupe_key: Optional[str]):
+        self.job_id = job_id
+        self.payload = payload
+        self.dedupe_key = dedupe_key
+        self.state = JOB_QUEUED
+        self.progress = 0.0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+
+    def set_progress(self, fraction: float) -> None:
+        # Called from the compute thread; a float assignment is atomic
+        self.progress = float(fraction)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "state": self.state,
+            "progress": round(self.progress, 4),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class MonteCarloJobManager:
+    """
+    Bounded queue of Monte Carlo jobs served by a fixed number of asyncio workers.
+
+    The runner coroutine does its heavy lifting on the executors in blocking_io, so the
+    workers only bound how many jobs are in progress at once. Finished jobs are kept for
+    ttl_seconds so a refreshed page can fetch the result instead of recomputing it, and
+    resubmitting an identical seeded request returns the existing job.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[..., Awaitable[Dict[str, Any]]],
+        workers: int = MONTE_CARLO_JOB_WORKERS,
+        queue_depth: int = MONTE_CARLO_JOB_QUEUE_DEPTH,
+        ttl_seconds: float = MONTE_CARLO_JOB_TTL_SECONDS,
+    ):
+        self.runner = runner
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, MonteCarloJob] = {}
+        self._by_key: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks = []
+
+    def _ensure_workers(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_depth)
+            self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self.ttl_seconds
+        ]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if job.dedupe_key and self._by_key.get(job.dedupe_key) == job_id:
+                del self._by_key[job.dedupe_key]
+
+    @staticmethod
+    def _dedupe_key(payload: Dict[str, Any]) -> Optional[str]:
+        # Only seeded runs are deterministic, so only those are safe to share
+        if payload.get("seed") is None:
+            return None
+        return json.dumps(payload, sort_keys=True, default=str)
+
+    def submit(self, payload: Dict[str, Any]) -> MonteCarloJob:
+        """Queue a job (or return the matching existing one). Raises QueueFullError when full."""
+        self._ensure_workers()
+        self._purge_expired()
+
+        key = self._dedupe_key(payload)
+        if key and key in self._by_key:
+            existing = self._jobs.get(self._by_key[key])
+            if existing and existing.state not in (JOB_FAILED, JOB_CANCELLED):
+                return existing
+
+        job = MonteCarloJob(uuid.uuid4().hex, payload, key)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError("Monte Carlo job queue is full, try again later")
+        self._jobs[job.job_id] = job
+        if key:
+            self._by_key[key] = job.job_id
+        return job
+
+    def get(self, job_id: str) -> Optional[MonteCarloJob]:
+        self._purge_expired()
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[MonteCarloJob]:
+        """Cancel a queued or running job. Finished jobs are returned unchanged."""
+        job = self.get(job_id)
+        if job is None or job.state in _FINISHED_STATES:
+            return job
+        job.cancel_event.set()
+        if job.state == JOB_QUEUED:
+            # The worker skips it when dequeued
+            job.state = JOB_CANCELLED
+            job.finished_at = time.time()
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.state] = counts.get(job.state, 0) + 1
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "queue_depth": self.queue_depth,
+            "workers": self.workers,
+            "jobs": counts,
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.cancel_event.is_set():
+                    continue
+                job.state = JOB_RUNNING
+                job.started_at = time.time()
+                try:
+                    result = await self.runner(job.payload, progress=job.set_progress, cancel_event=job.cancel_event)
+                except Exception as e:
+                    result = {"status": "error", "message": str(e)}
+
+                if job.cancel_event.is_set():
+                    job.state = JOB_CANCELLED
+                elif result.get("status") == "success":
+                    job.state = JOB_SUCCEEDED
+                    job.result = result.get("data")
+                    job.progress = 1.0
+                else:
+                    job.state = JOB_FAILED
+                    job.error = result.get("message", "Monte Carlo run failed")
+                job.finished_at = time.time()
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,58 @@
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from backtest.core import day_numbers
+from backtest.strategies import STRATEGIES
+
+# Monte Carlo runs the same array strategies as the historical endpoints
+# (backtest.strategies), on a (paths, days) matrix of simulated prices that share one
+# business-day index.
+
+MONTE_CARLO_STRATEGY_TYPES = ["simple_moving_average_crossover", "dca", "buy_hold_markers", "value_averaging"]
+
+
+def _eligible_strategy(strategy_type: str):
+    if strategy_type not in MONTE_CARLO_STRATEGY_TYPES:
+        raise ValueError(f"Strategy type '{strategy_type}' is not eligible for Monte Carlo simulation")
+    return STRATEGIES[strategy_type]
+
+
+def strategy_params_from_metadata(strategy_type: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a saved strategy's metadata into the strategy's parameters."""
+    return _eligible_strategy(strategy_type).parse_params(metadata)
+
+
+def strategy_results_on_paths(
+    strategy_type: str,
+    params: Dict[str, Any],
+    paths: np.ndarray,
+    dates: pd.DatetimeIndex,
+    capital: float,
+) -> Dict[str, np.ndarray]:
+    """Run a strategy on every path and return its result ("equity" and, if any, uninvested "cash")."""
+    return _eligible_strategy(strategy_type).run(paths, day_numbers(dates), capital, params)
+
+
+def equity_curves_on_paths(
+    strategy_type: str,
+    params: Dict[str, Any],
+    paths: np.ndarray,
+    dates: pd.DatetimeIndex,
+    capital: float,
+) -> np.ndarray:
+    """Run a strategy on every path and return its (paths, days) equity matrix."""
+    return strategy_results_on_paths(strategy_type, params, paths, dates, capital)["equity"]
+
+
+def final_capitals_on_paths(
+    strategy_type: str,
+    params: Dict[str, Any],
+    paths: np.ndarray,
+    dates: pd.DatetimeIndex,
+    capital: float,
+) -> np.ndarray:
+    """Run a strategy on every path and return the vector of final capitals."""
+    # A copy, not a view, so the equity matrix is freed before the next strategy runs
+    return equity_curves_on_paths(strategy_type, params, paths, dates, capital)[:, -1].copy()
@@ -0,0 +1,70 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# Memory limits for path matrices. The request budget bounds one run (all of its blocks
+# in flight at once); the global budget bounds every run in this server process together.
+MONTE_CARLO_REQUEST_MEMORY_BYTES = int(os.getenv("MONTE_CARLO_REQUEST_MEMORY_BYTES", str(256 * 1024 * 1024)))
+MONTE_CARLO_MEMORY_BUDGET_BYTES = int(os.getenv("MONTE_CARLO_MEMORY_BUDGET_BYTES", str(1024 * 1024 * 1024)))
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when a single reservation is larger than the whole budget."""
+
+
+class MemoryBudget:
+    """
+    Byte budget shared by concurrent Monte Carlo runs.
+
+    A run reserves its estimated working set before it starts and releases it when it
+    finishes; reservations that don't fit wait until enough memory is released, so the
+    sum of reserved bytes never exceeds total_bytes.
+    """
+
+    def __init__(self, total_bytes: int = MONTE_CARLO_MEMORY_BUDGET_BYTES):
+        self.total_bytes = total_bytes
+        self._in_use = 0
+        self._peak = 0
+        self._waits = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def reserve(self, nbytes: int, check_cancelled: Optional[Callable[[], None]] = None) -> Iterator[None]:
+        """
+        Hold nbytes of the budget for the duration of the with block.
+
+        Waits while the budget is exhausted, calling check_cancelled (which may raise)
+        between waits. Raises MemoryBudgetExceeded if nbytes can never fit.
+        """
+        if nbytes > self.total_bytes:
+            raise MemoryBudgetExceeded(
+                f"Run needs {nbytes} bytes but the Monte Carlo memory budget is {self.total_bytes} bytes"
+            )
+        with self._condition:
+            if self._in_use + nbytes > self.total_bytes:
+                self._waits += 1
+            while self._in_use + nbytes > self.total_bytes:
+                if check_cancelled is not None:
+                    check_cancelled()
+                self._condition.wait(timeout=0.25)
+            self._in_use += nbytes
+            self._peak = max(self._peak, self._in_use)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_use -= nbytes
+                self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "total_bytes": self.total_bytes,
+                "in_use_bytes": self._in_use,
+                "peak_bytes": self._peak,
+                "waits": self._waits,
+            }
+
+
+memory_budget = MemoryBudget()
@@ -0,0 +1,160 @@
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from monte_carlo.variance_reduction import standard_normals
+
+PATH_MODES = ["historical_bootstrap", "block_bootstrap", "stationary_bootstrap", "forward_sim"]
+BOOTSTRAP_BLOCK_MODES = ("block_bootstrap", "stationary_bootstrap")
+# Mean block length in trading days for the block bootstrap modes (about one month)
+DEFAULT_BLOCK_LENGTH = 20
+
+
+@lru_cache(maxsize=64)
+def _business_days(start: pd.Timestamp, periods: int) -> pd.DatetimeIndex:
+    return pd.date_range(start=start, periods=periods, freq="B")
+
+
+def simulation_dates(horizon_days: int, start: Optional[pd.Timestamp] = None) -> pd.DatetimeIndex:
+    """Business-day index shared by every simulated path (horizon_days + 1 points, starting today)."""
+    if start is None:
+        start = pd.Timestamp.now().normalize()
+    return _business_days(pd.Timestamp(start), horizon_days + 1)
+
+
+def bootstrap_indices(
+    num_returns: int,
+    num_paths: int,
+    horizon_days: int,
+    mode: str,
+    block_length: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    (num_paths, horizon_days) matrix of indices into the calibration returns for the
+    block bootstrap modes, built with index arithmetic and no per-path loops.
+
+    block_bootstrap: consecutive runs of block_length returns from uniform random starts.
+    stationary_bootstrap (Politis-Romano): block lengths are geometric with mean
+    block_length (each day starts a new block with probability 1 / block_length).
+
+    Blocks wrap around the end of the returns, so every return is equally likely.
+    Indices are left unwrapped (below num_returns + horizon_days); index a circularly
+    extended array or take them modulo num_returns.
+    """
+    if block_length == 1:
+        # Every block is a single day, i.e. the IID bootstrap
+        return rng.integers(0, num_returns, size=(num_paths, horizon_days))
+
+    if mode == "block_bootstrap":
+        num_blocks = -(-horizon_days // block_length)
+        starts = rng.integers(0, num_returns, size=(num_paths, num_blocks))
+        idx = starts[:, :, None] + np.arange(min(block_length, horizon_days))
+        return idx.reshape(num_paths, -1)[:, :horizon_days]
+
+    if mode == "stationary_bootstrap":
+        p = 1.0 / block_length
+        # Enough geometric block lengths to cover the horizon on every path (redrawn with
+        # more blocks in the rare case they don't)
+        num_blocks = int(horizon_days * p + 6 * np.sqrt(horizon_days * p) + 10)
+        while True:
+            lengths = rng.geometric(p, size=(num_paths, num_blocks))
+            block_day = np.cumsum(lengths, axis=1) - lengths
+            if (block_day[:, -1] + lengths[:, -1] >= horizon_days).all():
+                break
+            num_blocks *= 2
+        starts = rng.integers(0, num_returns, size=(num_paths, num_blocks))
+
+        # Within a block, index = day + (start - block_day). Scatter the change of that
+        # offset at each block's first day and cumsum along time to fill it in.
+        offset_change = np.diff(starts - block_day, axis=1, prepend=0)
+        in_horizon = block_day < horizon_days
+        offsets = np.zeros((num_paths, horizon_days), dtype=np.int64)
+        offsets[np.nonzero(in_horizon)[0], block_day[in_horizon]] = offset_change[in_horizon]
+        idx = np.cumsum(offsets, axis=1, out=offsets)
+        idx += np.arange(horizon_days)
+        return idx
+
+    raise ValueError(f"Unknown bootstrap mode '{mode}'")
+
+
+def sample_returns(
+    returns: np.ndarray,
+    num_paths: int,
+    horizon_days: int,
+    mode: str,
+    rng: np.random.Generator,
+    variance_reduction: str = "none",
+    block_length: int = DEFAULT_BLOCK_LENGTH,
+) -> np.ndarray:
+    """
+    Draw a (num_paths, horizon_days) matrix of daily returns in one call.
+
+    historical_bootstrap resamples the observed returns with replacement;
+    block_bootstrap / stationary_bootstrap resample runs of consecutive returns, which
+    keeps volatility clustering within blocks; forward_sim draws from a normal fitted to their mean and (population) std, using
+    antithetic or Sobol' normals when variance_reduction asks for them.
+    """
+    if mode == "historical_bootstrap":
+        idx = rng.integers(0, len(returns), size=(num_paths, horizon_days))
+        return returns[idx]
+    if mode in BOOTSTRAP_BLOCK_MODES:
+        idx = bootstrap_indices(len(returns), num_paths, horizon_days, mode, block_length, rng)
+        # Blocks run past the end by less than the horizon; a wrapped copy saves a modulo pass
+        return np.resize(returns, len(returns) + horizon_days)[idx]
+    if mode == "forward_sim":
+        if variance_reduction in ("antithetic", "sobol"):
+            z = standard_normals(num_paths, horizon_days, variance_reduction, rng)
+            return np.mean(returns) + np.std(returns) * z
+        if returns.dtype == np.float32:
+            # Draw single precision directly rather than casting a float64 matrix
+            z = rng.standard_normal((num_paths, horizon_days), dtype=np.float32)
+            return np.float32(np.mean(returns)) + np.float32(np.std(returns)) * z
+        return rng.normal(np.mean(returns), np.std(returns), size=(num_paths, horizon_days))
+    raise ValueError(f"Unknown simulation mode '{mode}'")
+
+
+def generate_price_paths(
+    returns,
+    num_paths: int,
+    horizon_days: int,
+    initial_price: float,
+    mode: str,
+    rng: Optional[np.random.Generator] = None,
+    variance_reduction: str = "none",
+    block_length: int = DEFAULT_BLOCK_LENGTH,
+    dtype=np.float64,
+) -> np.ndarray:
+    """
+    Build every synthetic price path at once.
+
+    Args:
+        returns: Historical daily returns used for calibration (array or Series)
+        num_paths: Number of paths (rows)
+        horizon_days: Simulated trading days after the initial price
+        initial_price: Price every path starts from
+        mode: One of PATH_MODES
+        rng: numpy Generator; a fresh unseeded one is used if omitted
+        variance_reduction: Sampling scheme for forward_sim (see monte_carlo.variance_reduction)
+        block_length: Mean block length for the block bootstrap modes
+        dtype: np.float64, or np.float32 to halve the memory of the path matrix
+
+    Returns:
+        (num_paths, horizon_days + 1) matrix of the given dtype whose first column is initial_price.
+        Returns None when there are no calibration returns.
+    """
+    returns = np.asarray(returns, dtype=dtype)
+    if len(returns) == 0:
+        return None
+    if rng is None:
+        rng = np.random.default_rng()
+
+    growth = np.empty((num_paths, horizon_days + 1), dtype=dtype)
+    growth[:, 0] = initial_price
+    growth[:, 1:] = 1.0 + sample_returns(
+        returns, num_paths, horizon_days, mode, rng, variance_reduction, block_length
+    )
+    # Cumulative product along time: price[t] = price[t-1] * (1 + r[t]), same order as a per-path loop
+    return np.cumprod(growth, axis=1, out=growth)
@@ -0,0 +1,89 @@
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set
+
+# Finished Monte Carlo results for seeded runs, which are deterministic for a given key
+MONTE_CARLO_RESULT_CACHE_SIZE = int(os.getenv("MONTE_CARLO_RESULT_CACHE_SIZE", "256"))
+MONTE_CARLO_RESULT_CACHE_TTL_SECONDS = float(os.getenv("MONTE_CARLO_RESULT_CACHE_TTL_SECONDS", "86400"))
+
+
+class MonteCarloResultCache:
+    """
+    Thread-safe LRU cache of Monte Carlo response data.
+
+    Keys are tuples whose first element is the strategy_id, so every entry for a strategy
+    can be dropped when its row changes. Entries also expire after ttl_seconds. Values
+    are deep-copied on the way in and out so callers can't mutate a cached result.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = MONTE_CARLO_RESULT_CACHE_SIZE,
+        ttl_seconds: float = MONTE_CARLO_RESULT_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._by_strategy: Dict[str, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def _remove(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        keys = self._by_strategy.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_strategy[key[0]]
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return copy.deepcopy(entry[0])
+
+    def put(self, key: Hashable, value: Dict[str, Any]) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (copy.deepcopy(value), time.monotonic() + self.ttl_seconds)
+            self._by_strategy.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate_strategy(self, strategy_id: str) -> None:
+        """Drop every cached result for a strategy (called when its row is updated or deleted)."""
+        with self._lock:
+            for key in list(self._by_strategy.get(str(strategy_id), ())):
+                self._remove(key)
+                self._invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_strategy.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
@@ -0,0 +1,94 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from monte_carlo.statistics import StreamingSummary
+
+RISK_PERCENTILES = [50, 75, 90, 95, 99]
+VAR_LEVELS = [95, 99]
+
+
+def path_risk_metrics(equity: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-path risk measures of a (paths, days) wealth matrix, all computed along the time axis.
+
+    max_drawdown: largest peak-to-trough drop as a fraction of the running peak
+    time_under_water: longest stretch of consecutive days spent below the running peak
+    min_equity: lowest wealth reached on the path
+    """
+    running_max = np.maximum.accumulate(equity, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdown = np.where(running_max > 0, 1.0 - equity / running_max, 0.0)
+
+    # For each day, the index of the latest day at a new peak; the gap is the current
+    # underwater stretch, and its maximum is the longest one
+    days = np.arange(equity.shape[1])
+    last_peak = np.maximum.accumulate(np.where(equity >= running_max, days, 0), axis=1)
+    return {
+        "max_drawdown": drawdown.max(axis=1),
+        "time_under_water": (days - last_peak).max(axis=1).astype(np.float64),
+        "min_equity": equity.min(axis=1),
+    }
+
+
+class RiskSummary:
+    """
+    Mergeable distributions of per-path drawdown, time under water, minimum and final wealth.
+
+    Wealth is the strategy's invested value plus the cash it hasn't invested. The
+    minimum-wealth summary counts paths below stop_level, which gives the probability
+    of hitting the stop at any point during the horizon.
+    """
+
+    def __init__(self, exact_limit: int, stop_level: Optional[float] = None):
+        self.stop_level = stop_level
+        self.max_drawdown = StreamingSummary(exact_limit=exact_limit)
+        self.time_under_water = StreamingSummary(exact_limit=exact_limit)
+        self.min_equity = StreamingSummary(threshold=stop_level, exact_limit=exact_limit)
+        self.final_wealth = StreamingSummary(exact_limit=exact_limit)
+
+    def update(self, wealth: np.ndarray) -> None:
+        wealth = wealth[np.isfinite(wealth).all(axis=1)]
+        metrics = path_risk_metrics(wealth)
+        self.max_drawdown.update(metrics["max_drawdown"])
+        self.time_under_water.update(metrics["time_under_water"])
+        self.min_equity.update(metrics["min_equity"])
+        self.final_wealth.update(wealth[:, -1])
+
+    def merge(self, other: "RiskSummary") -> None:
+        self.max_drawdown.merge(other.max_drawdown)
+        self.time_under_water.merge(other.time_under_water)
+        self.min_equity.merge(other.min_equity)
+        self.final_wealth.merge(other.final_wealth)
+
+    def report(self, capital: float) -> Optional[Dict[str, Any]]:
+        """Risk section of the API response; VaR / CVaR are losses of final wealth vs. capital."""
+        if self.max_drawdown.count == 0:
+            return None
+
+        def distribution(summary: StreamingSummary, scale: float, digits: int) -> Dict[str, float]:
+            stats = {"mean": round(summary.mean * scale, digits), "max": round(summary.max * scale, digits)}
+            for percent, value in summary.quantiles(RISK_PERCENTILES).items():
+                stats[f"p{percent}"] = round(value * scale, digits)
+            return stats
+
+        value_at_risk = {}
+        for level in VAR_LEVELS:
+            tail = 100 - level
+            var_loss = capital - self.final_wealth.quantiles([tail])[tail]
+            cvar_loss = capital - self.final_wealth.tail_mean(tail)
+            value_at_risk[f"var_{level}"] = round(var_loss, 2)
+            value_at_risk[f"var_{level}_percent"] = round(var_loss / capital * 100.0, 2)
+            value_at_risk[f"cvar_{level}"] = round(cvar_loss, 2)
+            value_at_risk[f"cvar_{level}_percent"] = round(cvar_loss / capital * 100.0, 2)
+
+        report = {
+            "max_drawdown_percent": distribution(self.max_drawdown, 100.0, 2),
+            "time_under_water_days": distribution(self.time_under_water, 1.0, 1),
+            "value_at_risk": value_at_risk,
+            "stop_level": self.stop_level,
+            "probability_of_hitting_stop": None,
+        }
+        if self.stop_level is not None:
+            report["probability_of_hitting_stop"] = round(self.min_equity.fraction_below_threshold * 100.0, 2)
+        return report
@@ -0,0 +1,527 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from blocking_io import run_compute, run_supabase, run_yahoo
+from db_supabase.db_strategy_storage_util import get_strategy_by_id, on_strategy_change
+from market_data.calibration import CalibrationError, get_calibration
+from monte_carlo.engine import PATH_DTYPES, plan_blocks, run_comparison, run_simulation
+from monte_carlo.fan_chart import fan_chart_columns
+from monte_carlo.kernels import MONTE_CARLO_STRATEGY_TYPES, strategy_params_from_metadata
+from monte_carlo.memory import MemoryBudgetExceeded, memory_budget
+from monte_carlo.paths import BOOTSTRAP_BLOCK_MODES, DEFAULT_BLOCK_LENGTH, PATH_MODES
+from monte_carlo.statistics import percentile_confidence_interval, percentile_standard_error, percentiles_converged
+from monte_carlo.result_cache import MonteCarloResultCache
+from monte_carlo.variance_reduction import validate_variance_reduction
+
+# Paths are reduced block by block into streaming summaries, so memory no longer grows
+# with the path count and runs can go well past the old 10,000 cap.
+MONTE_CARLO_MAX_SIMULATIONS = int(os.getenv("MONTE_CARLO_MAX_SIMULATIONS", "1000000"))
+REPORTED_PERCENTILES = [10, 25, 50, 75, 90]
+# save_strategy allows at most five strategies per user
+MONTE_CARLO_MAX_COMPARE_STRATEGIES = 5
+# Path budget for adaptive runs (tolerance given) that don't set num_simulations
+MONTE_CARLO_ADAPTIVE_BUDGET = 10000
+
+# Seeded runs are deterministic, so their results are reused until the strategy changes
+_result_cache = MonteCarloResultCache()
+on_strategy_change(_result_cache.invalidate_strategy)
+
+
+def monte_carlo_cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction/invalidation counters for the Monte Carlo result cache."""
+    return _result_cache.stats()
+
+
+def monte_carlo_memory_stats() -> Dict[str, Any]:
+    """Reserved and peak bytes of the process-wide Monte Carlo memory budget."""
+    return memory_budget.stats()
+
+
+def _strategy_row_hash(strategy: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(strategy, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _parse_metadata(metadata_raw) -> Dict[str, Any]:
+    """Strategy metadata may be stored as a dict or a JSON string."""
+    if isinstance(metadata_raw, str):
+        try:
+            return json.loads(metadata_raw)
+        except (json.JSONDecodeError, TypeError):
+            return {}
+    if isinstance(metadata_raw, dict):
+        return metadata_raw
+    return {}
+
+
+async def _load_calibration(ticker: str, mode: str, start_date, end_date) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Load the calibration for a run from the shared calibration cache.
+
+    forward_sim uses the last 5 years and starts from the latest price; the bootstrap
+    modes use the strategy's date range (or the last 5 years) and start from its first price.
+
+    Returns:
+        ({"calibration", "returns", "initial_price"}, None) or (None, error message)
+    """
+    try:
+        if mode == "forward_sim" or not (start_date and end_date):
+            calibration = await run_yahoo(get_calibration, ticker)
+        else:
+            calibration = await run_yahoo(get_calibration, ticker, start_date, end_date)
+    except CalibrationError as exc:
+        return None, str(exc)
+    except Exception as exc:
+        return None, f"Data fetch failed: {exc}"
+    
+    if len(calibration.returns) == 0:
+        return None, "No valid returns calculated"
+    
+    # Get initial price for simulation
+    if mode == "forward_sim":
+        initial_price = float(calibration.prices.iloc[-1])  # Most recent price
+    else:
+        initial_price = float(calibration.prices.iloc[0])  # Start of calibration period
+    
+    return {"calibration": calibration, "returns": calibration.returns, "initial_price": initial_price}, None
+
+
+def _summary_statistics(summary, capital: float) -> Dict[str, Any]:
+    """Final-capital statistics of a merged StreamingSummary, as returned by the API."""
+    # Returns are an affine function of final capital, so their percentiles follow from the capital ones
+    capital_percentiles = summary.quantiles(REPORTED_PERCENTILES)
+    return {
+        "mean_final_capital": round(summary.mean, 2),
+        "std_final_capital": round(summary.std, 2),
+        "min_final_capital": summary.min,
+        "max_final_capital": summary.max,
+        "percentiles": {f"p{p}": round(v, 2) for p, v in capital_percentiles.items()},
+        "return_percentiles": {
+            f"p{p}": round(((v - capital) / capital) * 100.0, 2) for p, v in capital_percentiles.items()
+        },
+        "probability_of_loss": round(summary.fraction_below_threshold * 100.0, 2),
+        # "exact" percentiles up to EXACT_QUANTILE_LIMIT paths, "sketch" (within 0.5%) beyond
+        "quantile_method": "exact" if summary.is_exact else "sketch",
+    }
+
+
+async def run_monte_carlo_request(
+    payload: Dict[str, Any],
+    progress: Optional[Callable[[float], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Validate a Monte Carlo request, load the strategy and calibration data, and run it.
+
+    Shared by the synchronous /api/montecarlo/run endpoint and the background job queue.
+    Blocking work goes through the Supabase / Yahoo / compute executors.
+
+    Args:
+        payload: Request body (strategy_id, mode, horizon_days or horizon_years, ...)
+        progress: Optional callback receiving the completed fraction of paths
+        cancel_event: Optional event that stops the simulation between blocks
+
+    Returns:
+        API response dict with "status" and either "data" or "message".
+    """
+    strategy_id = payload.get("strategy_id")
+    user_id = payload.get("user_id")  # Optional, but recommended for security
+    mode = payload.get("mode")  # One of PATH_MODES, e.g. "historical_bootstrap" or "forward_sim"
+    block_length = payload.get("block_length", DEFAULT_BLOCK_LENGTH)  # Mean block length for block modes
+    horizon_days = payload.get("horizon_days")
+    horizon_years = payload.get("horizon_years")
+    # Adaptive mode: stop once every reported percentile's confidence interval is narrower
+    # than tolerance * initial capital; num_simulations is then the maximum budget
+    tolerance = payload.get("tolerance")
+    confidence = payload.get("confidence", 0.95)
+    num_simulations = payload.get("num_simulations", 1000 if tolerance is None else MONTE_CARLO_ADAPTIVE_BUDGET)
+    seed = payload.get("seed")  # Optional; same seed gives identical results
+    workers = payload.get("workers", 1)  # Worker processes to shard the paths across
+    variance_reduction = payload.get("variance_reduction") or "none"
+    fan_chart = bool(payload.get("fan_chart", False))  # Per-day p5..p95 equity bands
+    fan_chart_points = payload.get("fan_chart_points")  # Days in the bands (default FAN_CHART_DEFAULT_POINTS)
+    stop_level_percent = payload.get("stop_level_percent")  # e.g. 80 = wealth falls below 80% of capital
+    path_dtype = payload.get("path_dtype") or "float64"  # "float32" halves path memory
+    
+    if not strategy_id:
+        return {"status": "error", "message": "Missing strategy_id"}
+    if mode not in PATH_MODES:
+        return {"status": "error", "message": f"Invalid mode. Must be one of: {', '.join(PATH_MODES)}"}
+    if not horizon_days and not horizon_years:
+        return {"status": "error", "message": "Must provide either horizon_days or horizon_years"}
+    if num_simulations < 1 or num_simulations > MONTE_CARLO_MAX_SIMULATIONS:
+        return {"status": "error", "message": f"num_simulations must be between 1 and {MONTE_CARLO_MAX_SIMULATIONS}"}
+    try:
+        seed = int(seed) if seed is not None else None
+        workers = int(workers or 1)
+    except (TypeError, ValueError):
+        return {"status": "error", "message": "seed and workers must be integers"}
+    if seed is not None and seed < 0:
+        return {"status": "error", "message": "seed must be a non-negative integer"}
+    try:
+        tolerance = float(tolerance) if tolerance is not None else None
+        confidence = float(confidence)
+    except (TypeError, ValueError):
+        return {"status": "error", "message": "tolerance and confidence must be numbers"}
+    if tolerance is not None and tolerance <= 0:
+        return {"status": "error", "message": "tolerance must be positive (fraction of initial capital)"}
+    if not 0 < confidence < 1:
+        return {"status": "error", "message": "confidence must be between 0 and 1"}
+    try:
+        block_length = int(block_length)
+    except (TypeError, ValueError):
+        return {"status": "error", "message": "block_length must be an integer"}
+    if block_length < 1:
+        return {"status": "error", "message": "block_length must be at least 1"}
+    if mode not in BOOTSTRAP_BLOCK_MODES:
+        block_length = DEFAULT_BLOCK_LENGTH  # Unused; keeps cache keys stable
+    if fan_chart_points is not None:
+        try:
+            fan_chart_points = int(fan_chart_points)
+        except (TypeError, ValueError):
+            return {"status": "error", "message": "fan_chart_points must be an integer"}
+        if fan_chart_points < 2:
+            return {"status": "error", "message": "fan_chart_points must be at least 2"}
+    if path_dtype not in PATH_DTYPES:
+        return {"status": "error", "message": f"Invalid path_dtype. Must be one of: {', '.join(PATH_DTYPES)}"}
+    if stop_level_percent is not None:
+        try:
+            stop_level_percent = float(stop_level_percent)
+        except (TypeError, ValueError):
+            return {"status": "error", "message": "stop_level_percent must be a number"}
+        if stop_level_percent <= 0:
+            return {"status": "error", "message": "stop_level_percent must be positive"}
+    
+    # Convert years to days if needed (approximate 252 trading days per year)
+    if horizon_years:
+        horizon_days = int(horizon_years * 252)
+    
+    variance_error = validate_variance_reduction(variance_reduction, mode, horizon_days)
+    if variance_error:
+        return {"status": "error", "message": variance_error}
+    
+    # Fan chart retention and blocks have to fit the per-request memory budget together
+    fan_columns = fan_chart_columns(horizon_days, fan_chart_points) if fan_chart else None
+    try:
+        plan = plan_blocks(
+            num_simulations,
+            horizon_days,
+            workers,
+            PATH_DTYPES[path_dtype],
+            len(fan_columns) if fan_columns is not None else 0,
+        )
+    except MemoryBudgetExceeded as e:
+        return {"status": "error", "message": str(e)}
+    
+    # Load strategy from database with user ownership validation
+    # This ensures users can only run MC on their own strategies
+    strategy = await run_supabase(get_strategy_by_id, strategy_id, user_id)
+    if not strategy:
+        return {"status": "error", "message": "Strategy not found or access denied"}
+    
+    strategy_type = strategy.get("strategy_type")
+    ticker = strategy.get("ticker_name")
+    capital = float(strategy.get("money_invested", 1000))
+    start_date = strategy.get("start_date")
+    end_date = strategy.get("end_date")
+    metadata = _parse_metadata(strategy.get("metadata", {}))
+    
+    # Check if strategy is eligible for Monte Carlo
+    if strategy_type not in MONTE_CARLO_STRATEGY_TYPES:
+        return {
+            "status": "error",
+            "message": f"Strategy type '{strategy_type}' is not eligible for Monte Carlo simulation"
+        }
+    
+    calibration, calibration_error = await _load_calibration(ticker, mode, start_date, end_date)
+    if calibration_error:
+        return {"status": "error", "message": calibration_error}
+    returns = calibration["returns"]
+    initial_price = calibration["initial_price"]
+    
+    # Everything the result depends on; the date pins the simulated calendar
+    cache_key = None
+    if seed is not None:
+        cache_key = (
+            str(strategy_id),
+            _strategy_row_hash(strategy),
+            mode,
+            block_length,
+            horizon_days,
+            num_simulations,
+            seed,
+            variance_reduction,
+            tolerance,
+            confidence,
+            calibration["calibration"].fingerprint,
+            pd.Timestamp.now().normalize().isoformat(),
+            plan["block_size"],
+            path_dtype,
+            fan_chart,
+            fan_chart_points,
+            stop_level_percent,
+        )
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            cached["cached"] = True
+            return {"status": "success", "data": cached}
+    
+    # Generate and evaluate the paths in seeded blocks, off the event loop
+    try:
+        params = strategy_params_from_metadata(strategy_type, metadata)
+        converged = None
+        if tolerance is not None:
+            converged = partial(
+                percentiles_converged,
+                percents=REPORTED_PERCENTILES,
+                max_width=tolerance * capital,
+                confidence=confidence,
+            )
+        simulation = await run_compute(
+            run_simulation,
+            strategy_type,
+            params,
+            capital,
+            returns,
+            initial_price,
+            mode,
+            horizon_days,
+            num_simulations,
+            seed=seed,
+            workers=workers,
+            block_length=block_length,
+            path_dtype=path_dtype,
+            variance_reduction=variance_reduction,
+            converged=converged,
+            fan_columns=fan_columns,
+            stop_level=capital * stop_level_percent / 100.0 if stop_level_percent is not None else None,
+            progress=progress,
+            cancel_event=cancel_event,
+        )
+    except Exception as e:
+        print(f"Error running strategy on synthetic paths: {e}")
+        return {"status": "error", "message": f"Simulation failed: {e}"}
+    
+    summary = simulation["summary"]
+    
+    if summary.count == 0:
+        return {"status": "error", "message": "No valid simulations completed"}
+    
+    statistics = _summary_statistics(summary, capital)
+    
+    # Control variates adjust the mean and loss probability; the other methods only change
+    # the draws, so the plain sample values stay unbiased
+    estimates = simulation["estimator"].estimates()
+    if variance_reduction == "control_variate":
+        statistics["mean_final_capital"] = round(estimates["mean_final_capital"]["value"], 2)
+        statistics["probability_of_loss"] = round(estimates["probability_of_loss"]["value"] * 100.0, 2)
+    
+    # Percentile errors use the independent-draw formula, so they are conservative for
+    # antithetic and Sobol draws
+    mean_error = estimates["mean_final_capital"]["standard_error"]
+    loss_error = estimates["probability_of_loss"]["standard_error"]
+    percentile_errors = {f"p{p}": percentile_standard_error(summary, p) for p in REPORTED_PERCENTILES}
+    standard_errors = {
+        "mean_final_capital": round(mean_error, 4) if mean_error is not None else None,
+        "probability_of_loss": round(loss_error * 100.0, 4) if loss_error is not None else None,
+        "percentiles": {k: round(v, 4) if v is not None else None for k, v in percentile_errors.items()},
+    }
+    statistics["standard_errors"] = standard_errors
+    adaptive = None
+    if tolerance is not None:
+        intervals = {f"p{p}": percentile_confidence_interval(summary, p, confidence) for p in REPORTED_PERCENTILES}
+        adaptive = {
+            "tolerance": tolerance,
+            "confidence": confidence,
+            "max_simulations": num_simulations,
+            "simulations_used": simulation["simulations_used"],
+            "converged": simulation["converged"],
+            "confidence_intervals": {
+                k: [round(v[0], 2), round(v[1], 2)] if v is not None else None for k, v in intervals.items()
+            },
+        }
+    
+    preview = summary.preview
+    preview_returns = ((preview - capital) / capital) * 100.0
+    
+    data = {
+        "strategy_id": strategy_id,
+        "strategy_type": strategy_type,
+        "ticker": ticker,
+        "initial_capital": capital,
+        "mode": mode,
+        "block_length": block_length if mode in BOOTSTRAP_BLOCK_MODES else None,
+        "horizon_days": horizon_days,
+        "num_simulations": summary.count,
+        "seed": simulation["seed"],
+        "workers": simulation["workers"],
+        "variance_reduction": variance_reduction,
+        "adaptive": adaptive,
+        "statistics": statistics,
+        "risk": simulation["risk"].report(capital),
+        "fan_chart": simulation["fan_chart"],
+        "calibration": calibration["calibration"].describe(),
+        "memory": simulation["memory"],
+        "distribution": {
+            "final_capitals": [round(float(x), 2) for x in preview],  # First 100 for preview
+            "returns": [round(float(x), 2) for x in preview_returns],
+        },
+    }
+    if cache_key is not None:
+        _result_cache.put(cache_key, data)
+    data["cached"] = False
+    return {"status": "success", "data": data}
+
+
+async def run_monte_carlo_comparison(
+    payload: Dict[str, Any],
+    progress: Optional[Callable[[float], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Run several saved strategies on the same ticker against one shared set of paths.
+
+    Calibration data is loaded once (bootstrap modes use the union of the strategies'
+    date ranges), and every strategy is evaluated on identical paths, so the pairwise
+    win rates compare strategies rather than random draws.
+
+    Args:
+        payload: Request body (strategy_ids, mode, horizon_days or horizon_years,
+            num_simulations, seed, workers, block_length, user_id)
+
+    Returns:
+        API response dict with "status" and either "data" or "message".
+    """
+    strategy_ids = payload.get("strategy_ids") or []
+    user_id = payload.get("user_id")
+    mode = payload.get("mode")
+    block_length = payload.get("block_length", DEFAULT_BLOCK_LENGTH)
+    horizon_days = payload.get("horizon_days")
+    horizon_years = payload.get("horizon_years")
+    num_simulations = payload.get("num_simulations", 1000)
+    seed = payload.get("seed")
+    workers = payload.get("workers", 1)
+    
+    if not isinstance(strategy_ids, list) or not 2 <= len(strategy_ids) <= MONTE_CARLO_MAX_COMPARE_STRATEGIES:
+        return {
+            "status": "error",
+            "message": f"strategy_ids must list between 2 and {MONTE_CARLO_MAX_COMPARE_STRATEGIES} strategies",
+        }
+    if len(set(map(str, strategy_ids))) != len(strategy_ids):
+        return {"status": "error", "message": "strategy_ids must not contain duplicates"}
+    if mode not in PATH_MODES:
+        return {"status": "error", "message": f"Invalid mode. Must be one of: {', '.join(PATH_MODES)}"}
+    if not horizon_days and not horizon_years:
+        return {"status": "error", "message": "Must provide either horizon_days or horizon_years"}
+    if num_simulations < 1 or num_simulations > MONTE_CARLO_MAX_SIMULATIONS:
+        return {"status": "error", "message": f"num_simulations must be between 1 and {MONTE_CARLO_MAX_SIMULATIONS}"}
+    try:
+        seed = int(seed) if seed is not None else None
+        workers = int(workers or 1)
+        block_length = int(block_length)
+    except (TypeError, ValueError):
+        return {"status": "error", "message": "seed, workers and block_length must be integers"}
+    if seed is not None and seed < 0:
+        return {"status": "error", "message": "seed must be a non-negative integer"}
+    if block_length < 1:
+        return {"status": "error", "message": "block_length must be at least 1"}
+    
+    if horizon_years:
+        horizon_days = int(horizon_years * 252)
+    
+    # Load every strategy concurrently, with the same ownership check as a single run
+    strategies = await asyncio.gather(
+        *(run_supabase(get_strategy_by_id, strategy_id, user_id) for strategy_id in strategy_ids)
+    )
+    for strategy_id, strategy in zip(strategy_ids, strategies):
+        if not strategy:
+            return {"status": "error", "message": f"Strategy {strategy_id} not found or access denied"}
+        if strategy.get("strategy_type") not in MONTE_CARLO_STRATEGY_TYPES:
+            return {
+                "status": "error",
+                "message": f"Strategy type '{strategy.get('strategy_type')}' is not eligible for Monte Carlo simulation",
+            }
+    
+    tickers = {str(strategy.get("ticker_name", "")).upper() for strategy in strategies}
+    if len(tickers) != 1:
+        return {"status": "error", "message": "All strategies must use the same ticker"}
+    ticker = strategies[0].get("ticker_name")
+    
+    start_dates = [strategy.get("start_date") for strategy in strategies]
+    end_dates = [strategy.get("end_date") for strategy in strategies]
+    calibration, calibration_error = await _load_calibration(
+        ticker,
+        mode,
+        min(start_dates) if all(start_dates) else None,
+        max(end_dates) if all(end_dates) else None,
+    )
+    if calibration_error:
+        return {"status": "error", "message": calibration_error}
+    
+    try:
+        specs = [
+            (
+                strategy["strategy_type"],
+                strategy_params_from_metadata(strategy["strategy_type"], _parse_metadata(strategy.get("metadata", {}))),
+                float(strategy.get("money_invested", 1000)),
+            )
+            for strategy in strategies
+        ]
+        comparison = await run_compute(
+            run_comparison,
+            specs,
+            calibration["returns"],
+            calibration["initial_price"],
+            mode,
+            horizon_days,
+            num_simulations,
+            seed=seed,
+            workers=workers,
+            block_length=block_length,
+            progress=progress,
+            cancel_event=cancel_event,
+        )
+    except Exception as e:
+        print(f"Error comparing strategies on synthetic paths: {e}")
+        return {"status": "error", "message": f"Simulation failed: {e}"}
+    
+    paths = comparison["paths"]
+    if paths == 0:
+        return {"status": "error", "message": "No valid simulations completed"}
+    
+    ids = [str(strategy_id) for strategy_id in strategy_ids]
+    wins = comparison["wins"]
+    # Share of paths on which the row strategy's return beat the column strategy's
+    win_rates = {
+        ids[i]: {ids[j]: round(float(wins[i, j]) / paths * 100.0, 2) for j in range(len(ids)) if j != i}
+        for i in range(len(ids))
+    }
+    
+    return {
+        "status": "success",
+        "data": {
+            "ticker": ticker,
+            "mode": mode,
+            "block_length": block_length if mode in BOOTSTRAP_BLOCK_MODES else None,
+            "horizon_days": horizon_days,
+            "num_simulations": paths,
+            "seed": comparison["seed"],
+            "workers": comparison["workers"],
+            "strategies": [
+                {
+                    "strategy_id": strategy_id,
+                    "strategy_type": strategy_type,
+                    "initial_capital": capital,
+                    "statistics": _summary_statistics(summary, capital),
+                }
+                for strategy_id, (strategy_type, _, capital), summary in zip(ids, specs, comparison["summaries"])
+            ],
+            "pairwise_win_rates": win_rates,
+        },
+    }
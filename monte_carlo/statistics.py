@@ -0,0 +1,314 @@
+import math
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Runs up to this many paths keep every value and report exact percentiles; larger runs
+# switch to a relative-error quantile sketch so memory stays constant.
+EXACT_QUANTILE_LIMIT = 10000
+SKETCH_RELATIVE_ACCURACY = 0.005
+PREVIEW_SIZE = 100
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a relative-error guarantee (DDSketch).
+
+    Values are counted in logarithmic buckets of ratio gamma = (1 + a) / (1 - a), so any
+    quantile is returned within a relative error a of the true value. Memory grows
+    with the log of the value range, not with the number of values, and merging two
+    sketches just adds bucket counts.
+    """
+
+    def __init__(self, relative_accuracy: float = SKETCH_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _add_to(self, store: Dict[int, int], magnitudes: np.ndarray) -> None:
+        if len(magnitudes) == 0:
+            return
+        keys = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        unique, counts = np.unique(keys, return_counts=True)
+        for key, count in zip(unique.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        self._add_to(self.positive, values[values > 0])
+        self._add_to(self.negative, -values[values < 0])
+        self.zero_count += int(np.count_nonzero(values == 0))
+        self.count += len(values)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def _bucket_value(self, key: int) -> float:
+        return 2.0 * self.gamma ** key / (self.gamma + 1.0)
+
+    def _ordered_buckets(self):
+        """(value, count) pairs from the smallest value to the largest."""
+        buckets = [(-self._bucket_value(key), self.negative[key]) for key in sorted(self.negative, reverse=True)]
+        if self.zero_count:
+            buckets.append((0.0, self.zero_count))
+        buckets.extend((self._bucket_value(key), self.positive[key]) for key in sorted(self.positive))
+        return buckets
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float("nan")
+        rank = q * (self.count - 1)
+        seen = 0
+        for value, count in self._ordered_buckets():
+            seen += count
+            if seen > rank:
+                return value
+        return self._ordered_buckets()[-1][0]
+
+    def tail_mean(self, q: float) -> float:
+        """Mean of the lowest q fraction of values (bucket representatives, last bucket prorated)."""
+        if self.count == 0 or q <= 0:
+            return float("nan")
+        target = q * self.count
+        taken = 0.0
+        total = 0.0
+        for value, count in self._ordered_buckets():
+            use = min(count, target - taken)
+            total += value * use
+            taken += use
+            if taken >= target:
+                break
+        return total / taken
+
+
+class StreamingSummary:
+    """
+    Mergeable summary of a stream of simulated values.
+
+    Tracks count, mean and variance (Welford / Chan merge), min, max, the fraction of
+    values below a fixed threshold, a preview of the first values, and quantiles. Values
+    are kept verbatim until exact_limit is passed, after which they are folded into a
+    QuantileSketch. Merging summaries in a fixed order gives identical results however
+    the values were split into chunks or workers.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        exact_limit: int = EXACT_QUANTILE_LIMIT,
+        relative_accuracy: float = SKETCH_RELATIVE_ACCURACY,
+    ):
+        self.threshold = threshold
+        self.exact_limit = exact_limit
+        self.relative_accuracy = relative_accuracy
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.below_threshold = 0
+        self.preview = np.empty(0)
+        self._exact: Optional[List[np.ndarray]] = [] if exact_limit > 0 else None
+        self._sketch: Optional[QuantileSketch] = None if exact_limit > 0 else QuantileSketch(relative_accuracy)
+
+    @property
+    def is_exact(self) -> bool:
+        return self._exact is not None
+
+    def _fold_into_sketch(self) -> None:
+        self._sketch = QuantileSketch(self.relative_accuracy)
+        for chunk in self._exact:
+            self._sketch.update(chunk)
+        self._exact = None
+
+    def _merge_moments(self, count: int, mean: float, m2: float) -> None:
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        mean = float(np.mean(values))
+        self._merge_moments(len(values), mean, float(np.sum((values - mean) ** 2)))
+        self.min = min(self.min, float(np.min(values)))
+        self.max = max(self.max, float(np.max(values)))
+        if self.threshold is not None:
+            self.below_threshold += int(np.count_nonzero(values < self.threshold))
+        if len(self.preview) < PREVIEW_SIZE:
+            self.preview = np.concatenate([self.preview, values[: PREVIEW_SIZE - len(self.preview)]])
+
+        if self._exact is not None:
+            self._exact.append(values.copy())
+            if self.count > self.exact_limit:
+                self._fold_into_sketch()
+        else:
+            self._sketch.update(values)
+
+    def merge(self, other: "StreamingSummary") -> None:
+        self._merge_moments(other.count, other.mean, other.m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.below_threshold += other.below_threshold
+        if len(self.preview) < PREVIEW_SIZE:
+            self.preview = np.concatenate([self.preview, other.preview[: PREVIEW_SIZE - len(self.preview)]])
+
+        if self._exact is not None and other._exact is not None and self.count <= self.exact_limit:
+            self._exact.extend(other._exact)
+            return
+        if self._exact is not None:
+            self._fold_into_sketch()
+        if other._exact is not None:
+            for chunk in other._exact:
+                self._sketch.update(chunk)
+        else:
+            self._sketch.merge(other._sketch)
+
+    def values(self) -> Optional[np.ndarray]:
+        """All values in arrival order while the summary is still exact, else None."""
+        if self._exact is None:
+            return None
+        return np.concatenate(self._exact) if self._exact else np.empty(0)
+
+    def quantiles(self, percents: List[float]) -> Dict[float, float]:
+        """Percentiles (0-100) using linear interpolation when exact, the sketch otherwise."""
+        if self._exact is not None:
+            values = self.values()
+            return {p: float(np.percentile(values, p)) for p in percents}
+        return {p: self._sketch.quantile(p / 100.0) for p in percents}
+
+    def tail_mean(self, percent: float) -> float:
+        """Mean of the values at or below the given percentile (expected shortfall)."""
+        if self._exact is not None:
+            values = self.values()
+            if len(values) == 0:
+                return float("nan")
+            return float(np.mean(values[values <= np.percentile(values, percent)]))
+        return self._sketch.tail_mean(percent / 100.0)
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation (matches np.std)."""
+        return math.sqrt(self.m2 / self.count) if self.count else float("nan")
+
+    @property
+    def fraction_below_threshold(self) -> float:
+        return self.below_threshold / self.count if self.count else float("nan")
+
+
+class CoMoments:
+    """
+    Mergeable mean vector and co-moment matrix of multivariate observations.
+
+    Uses the pairwise (Chan et al.) update, so blocks can be summarized on separate
+    workers and merged afterwards.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.count = 0
+        self.mean = np.zeros(dim)
+        self.comoment = np.zeros((dim, dim))
+
+    def _merge(self, count: int, mean: np.ndarray, comoment: np.ndarray) -> None:
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * (self.count * count / total)
+        self.mean = self.mean + delta * (count / total)
+        self.count = total
+
+    def update(self, rows: np.ndarray) -> None:
+        """Add observations given as a (n, dim) array."""
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, self.dim)
+        if len(rows) == 0:
+            return
+        mean = rows.mean(axis=0)
+        centered = rows - mean
+        self._merge(len(rows), mean, centered.T @ centered)
+
+    def merge(self, other: "CoMoments") -> None:
+        self._merge(other.count, other.mean, other.comoment)
+
+    def covariance(self) -> Optional[np.ndarray]:
+        """Sample covariance matrix (ddof=1), or None with fewer than two observations."""
+        if self.count < 2:
+            return None
+        return self.comoment / (self.count - 1)
+
+
+def percentile_standard_error(summary: StreamingSummary, percent: float, bandwidth: float = 0.02) -> Optional[float]:
+    """
+    Standard error of a percentile estimate from independent draws.
+
+    Uses sqrt(p(1 - p) / n) / f(q), with the density f estimated from the spread of the
+    neighbouring quantiles (Siddiqui's estimator).
+    """
+    if summary.count < 2:
+        return None
+    p = percent / 100.0
+    h = min(bandwidth, p / 2, (1 - p) / 2)
+    if h <= 0:
+        return None
+    neighbours = summary.quantiles([100.0 * (p - h), 100.0 * (p + h)])
+    spread = neighbours[100.0 * (p + h)] - neighbours[100.0 * (p - h)]
+    return math.sqrt(p * (1 - p) / summary.count) * spread / (2 * h)
+
+
+def percentile_confidence_interval(
+    summary: StreamingSummary,
+    percent: float,
+    confidence: float = 0.95,
+) -> Optional[Tuple[float, float]]:
+    """
+    Distribution-free confidence interval for a percentile from order statistics.
+
+    The bounds are the values at ranks n * p -/+ z * sqrt(n * p * (1 - p)). Once the
+    summary has switched to the sketch, the bounds are widened by its relative accuracy.
+    Returns None while there are too few values for both ranks to fall inside the sample.
+    """
+    n = summary.count
+    if n < 2:
+        return None
+    p = percent / 100.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    half_width = z * math.sqrt(p * (1 - p) / n)
+    lower, upper = p - half_width, p + half_width
+    if lower < 0 or upper > 1:
+        return None
+    bounds = summary.quantiles([100.0 * lower, 100.0 * upper])
+    low, high = bounds[100.0 * lower], bounds[100.0 * upper]
+    if not summary.is_exact:
+        low -= summary.relative_accuracy * abs(low)
+        high += summary.relative_accuracy * abs(high)
+    return low, high
+
+
+def percentiles_converged(
+    summary: StreamingSummary,
+    percents: List[float],
+    max_width: float,
+    confidence: float = 0.95,
+) -> bool:
+    """True once every percentile's confidence interval is at most max_width wide."""
+    for percent in percents:
+        interval = percentile_confidence_interval(summary, percent, confidence)
+        if interval is None or interval[1] - interval[0] > max_width:
+            return False
+    return True
@@ -0,0 +1,173 @@
+import math
+import warnings
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from monte_carlo.statistics import CoMoments
+
+try:
+    from scipy.special import ndtri
+    from scipy.stats import qmc
+except Exception:
+    ndtri = None
+    qmc = None
+
+# Variance-reduction methods selectable per request. "antithetic" and "sobol" change how
+# the normal draws of forward_sim are made; "control_variate" works with every mode.
+VARIANCE_REDUCTION_METHODS = ["none", "antithetic", "control_variate", "sobol"]
+_FORWARD_SIM_ONLY = ("antithetic", "sobol")
+
+# Scrambled Sobol' sequences in scipy support at most this many dimensions (days)
+SOBOL_MAX_DIMENSIONS = 21201
+# Independently scrambled replicates per block; their spread gives the standard error
+SOBOL_REPLICATES = 8
+
+
+def validate_variance_reduction(method: str, mode: str, horizon_days: int) -> Optional[str]:
+    """Return an error message if the method can't be used for this request, else None."""
+    if method not in VARIANCE_REDUCTION_METHODS:
+        return f"Invalid variance_reduction. Must be one of: {', '.join(VARIANCE_REDUCTION_METHODS)}"
+    if method in _FORWARD_SIM_ONLY and mode != "forward_sim":
+        return f"variance_reduction '{method}' requires mode 'forward_sim'"
+    if method == "sobol":
+        if qmc is None:
+            return "variance_reduction 'sobol' requires scipy, which is not installed"
+        if horizon_days > SOBOL_MAX_DIMENSIONS:
+            return f"variance_reduction 'sobol' supports horizons up to {SOBOL_MAX_DIMENSIONS} days"
+    return None
+
+
+def sobol_replicate_bounds(num_paths: int) -> np.ndarray:
+    """Row boundaries splitting a block into SOBOL_REPLICATES contiguous, near-equal replicates."""
+    replicates = max(1, min(SOBOL_REPLICATES, num_paths))
+    return np.linspace(0, num_paths, replicates + 1).astype(int)
+
+
+def standard_normals(num_paths: int, horizon_days: int, method: str, rng: np.random.Generator) -> np.ndarray:
+    """
+    (num_paths, horizon_days) matrix of standard normal draws for forward_sim.
+
+    antithetic: the second half of the rows mirrors the first (z, -z), so row i pairs
+    with row i + ceil(num_paths / 2).
+    sobol: scrambled Sobol' point sets (one dimension per day) mapped through the
+    inverse normal CDF; the rows are split into replicates (sobol_replicate_bounds),
+    each with its own scramble from rng.
+    """
+    if method == "antithetic":
+        half = rng.standard_normal((math.ceil(num_paths / 2), horizon_days))
+        return np.concatenate([half, -half])[:num_paths]
+    if method == "sobol":
+        bounds = sobol_replicate_bounds(num_paths)
+        points = np.empty((num_paths, horizon_days))
+        with warnings.catch_warnings():
+            # Balance is best for powers of two, but any replicate size stays unbiased
+            warnings.simplefilter("ignore", UserWarning)
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                points[lo:hi] = qmc.Sobol(d=horizon_days, scramble=True, rng=rng).random(hi - lo)
+        return ndtri(np.clip(points, 1e-12, 1 - 1e-12))
+    return rng.standard_normal((num_paths, horizon_days))
+
+
+def control_expectation(
+    returns: np.ndarray,
+    horizon_days: int,
+    mode: str = "historical_bootstrap",
+    block_length: int = 1,
+) -> float:
+    """
+    Expected growth of buy & hold over the horizon, P_T / P_0.
+
+    When daily returns are drawn independently with the calibration mean (historical
+    bootstrap and the fitted normal), E[prod(1 + r_t)] = (1 + mean) ** horizon_days.
+    The block bootstrap modes walk the returns in order between random jumps, so the
+    expectation is propagated exactly over the index chain: v[j] is the expected growth
+    so far on paths currently at return j, and each day either jumps to a uniform
+    index (with probability 1, 1 / block_length or 0) or moves to the next one.
+    """
+    if mode not in ("block_bootstrap", "stationary_bootstrap"):
+        return float((1.0 + np.mean(returns)) ** horizon_days)
+
+    growth = 1.0 + np.asarray(returns, dtype=np.float64)
+    v = growth / len(growth)
+    for day in range(1, horizon_days):
+        if mode == "block_bootstrap":
+            jump = 1.0 if day % block_length == 0 else 0.0
+        else:
+            jump = 1.0 / block_length
+        v = growth * ((1.0 - jump) * np.roll(v, 1) + jump * v.sum() / len(growth))
+    return float(v.sum())
+
+
+class MeanEstimator:
+    """
+    Mergeable estimates of the mean final capital and the probability of loss, with
+    standard errors that account for the variance-reduction method.
+
+    none: independent draws, SE = sd / sqrt(n).
+    antithetic: SE from the spread of the (z, -z) pair averages.
+    control_variate: regression on buy & hold growth, whose expectation is known; the
+        adjusted estimate is y - beta * (x - E[x]) and its SE uses the residual variance.
+    sobol: randomized QMC, SE from the spread of the per-replicate (per-scramble) means;
+        every block holds several replicates, so a one-block run has an SE too.
+    """
+
+    def __init__(self, method: str, threshold: float, control_mean: Optional[float] = None):
+        self.method = method
+        self.threshold = threshold
+        self.control_mean = control_mean
+        # Columns: final capital, loss indicator (and control growth for control_variate)
+        self.moments = CoMoments(3 if method == "control_variate" else 2)
+
+    def update(self, final_capitals: np.ndarray, control: np.ndarray) -> None:
+        """Add one block's raw results; paths with non-finite values are dropped."""
+        finite = np.isfinite(final_capitals) & np.isfinite(control)
+        losses = (final_capitals < self.threshold).astype(np.float64)
+
+        if self.method == "antithetic":
+            partner = math.ceil(len(final_capitals) / 2)
+            pairs = np.arange(len(final_capitals) - partner)
+            keep = pairs[finite[pairs] & finite[pairs + partner]]
+            rows = np.column_stack([
+                (final_capitals[keep] + final_capitals[keep + partner]) / 2,
+                (losses[keep] + losses[keep + partner]) / 2,
+            ])
+        elif self.method == "sobol":
+            bounds = sobol_replicate_bounds(len(final_capitals))
+            rows = np.array([
+                [final_capitals[lo:hi][finite[lo:hi]].mean(), losses[lo:hi][finite[lo:hi]].mean()]
+                for lo, hi in zip(bounds[:-1], bounds[1:])
+                if finite[lo:hi].any()
+            ]).reshape(-1, 2)
+        elif self.method == "control_variate":
+            rows = np.column_stack([final_capitals[finite], losses[finite], control[finite]])
+        else:
+            rows = np.column_stack([final_capitals[finite], losses[finite]])
+        self.moments.update(rows)
+
+    def merge(self, other: "MeanEstimator") -> None:
+        self.moments.merge(other.moments)
+
+    def estimates(self) -> Dict[str, Dict[str, Any]]:
+        """{"mean_final_capital": {"value", "standard_error"}, "probability_of_loss": {...}}"""
+        moments = self.moments
+        values = moments.mean[:2].copy()
+        cov = moments.covariance()
+        errors = [None, None]
+
+        if cov is not None:
+            if self.method == "control_variate" and cov[2, 2] > 0:
+                x_offset = moments.mean[2] - self.control_mean
+                for i in range(2):
+                    beta = cov[i, 2] / cov[2, 2]
+                    values[i] -= beta * x_offset
+                    residual = max(cov[i, i] - beta * cov[i, 2], 0.0)
+                    errors[i] = math.sqrt(residual / moments.count)
+                values[1] = min(max(values[1], 0.0), 1.0)
+            else:
+                errors = [math.sqrt(max(cov[i, i], 0.0) / moments.count) for i in range(2)]
+
+        return {
+            "mean_final_capital": {"value": float(values[0]), "standard_error": errors[0]},
+            "probability_of_loss": {"value": float(values[1]), "standard_error": errors[1]},
+        }
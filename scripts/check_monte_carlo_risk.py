@@ -0,0 +1,81 @@
+"""
+Check Monte Carlo stop-hit probabilities for scheduled strategies against a naive loop.
+
+Runs DCA and value averaging through monte_carlo.engine.run_simulation, then replays the
+same simulated paths one path and one day at a time, tracking cash and shares by hand,
+and compares how many paths fall below each stop level. Exits non-zero on a mismatch.
+
+    python scripts/check_monte_carlo_risk.py
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest.calendar import trading_calendar  # noqa: E402
+from backtest.core import day_numbers  # noqa: E402
+from monte_carlo.engine import run_simulation  # noqa: E402
+from monte_carlo.paths import generate_price_paths, simulation_dates  # noqa: E402
+
+CAPITAL = 10000.0
+INITIAL_PRICE = 100.0
+HORIZON_DAYS = 504
+NUM_SIMULATIONS = 500
+SEED = 1234
+STOP_LEVEL_PERCENTS = [50.0, 90.0, 97.0]
+
+
+def naive_min_wealth(strategy_type, prices, buy_columns):
+    """Lowest cash + shares * price on one path, stepping through the days."""
+    cash, shares, lowest = CAPITAL, 0.0, np.inf
+    buys = {col: period for period, col in enumerate(buy_columns)}
+    contribution = CAPITAL / len(buy_columns)
+    for col, price in enumerate(prices):
+        if col in buys:
+            if strategy_type == "dca":
+                amount = min(contribution, cash)
+            else:
+                # Value averaging: top the holding up to a target growing 1% per period
+                target = contribution * 1.01 ** buys[col]
+                amount = min(max(target - shares * price, 0.0), cash)
+            shares += amount / price
+            cash -= amount
+        lowest = min(lowest, cash + shares * price)
+    return lowest
+
+
+def main() -> int:
+    returns = np.random.default_rng(0).normal(0.0003, 0.015, 1500)
+    params = {
+        "dca": {"frequency": "monthly", "contribution": None},
+        "value_averaging": {"frequency": "monthly", "target_growth_rate": None},
+    }
+    failures = 0
+    for strategy_type, strategy_params in params.items():
+        for percent in STOP_LEVEL_PERCENTS:
+            stop_level = CAPITAL * percent / 100.0
+            simulation = run_simulation(
+                strategy_type, strategy_params, CAPITAL, returns, INITIAL_PRICE, "historical_bootstrap",
+                HORIZON_DAYS, NUM_SIMULATIONS, seed=SEED, stop_level=stop_level,
+            )
+            reported = simulation["risk"].report(CAPITAL)["probability_of_hitting_stop"]
+
+            # The run fits one block, whose stream is the root seed's first child
+            rng = np.random.default_rng(np.random.SeedSequence(SEED).spawn(1)[0])
+            paths = generate_price_paths(returns, NUM_SIMULATIONS, HORIZON_DAYS, INITIAL_PRICE, "historical_bootstrap", rng)
+            dates = simulation_dates(HORIZON_DAYS, pd.Timestamp.now().normalize())
+            buy_columns = trading_calendar(day_numbers(dates)).buy_columns(strategy_params["frequency"])
+            hits = sum(naive_min_wealth(strategy_type, row, buy_columns) < stop_level for row in paths)
+            expected = round(hits / NUM_SIMULATIONS * 100.0, 2)
+
+            status = "ok" if reported == expected else "MISMATCH"
+            failures += status != "ok"
+            print(f"{strategy_type:16} stop {percent:5.1f}%  engine {reported:6.2f}%  naive {expected:6.2f}%  {status}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())